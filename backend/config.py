@@ -23,25 +23,69 @@ class Config:
     # OpenAI
     OPENAI_API_KEY: str = os.getenv('VITE_OPENAI_API_KEY', '')
     EMBEDDING_MODEL: str = 'text-embedding-3-small'
+    OPENAI_BASE_URL: str = os.getenv('OPENAI_BASE_URL', '')  # e.g. a local stub embedding server
+
+    # Embedding micro-batching (concurrent single-text requests share one API call)
+    EMBEDDING_BATCH_ENABLED: bool = os.getenv('EMBEDDING_BATCH_ENABLED', 'true').lower() == 'true'
+    EMBEDDING_BATCH_WINDOW_MS: float = float(os.getenv('EMBEDDING_BATCH_WINDOW_MS', '5'))
+    EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv('EMBEDDING_BATCH_MAX_SIZE', '64'))
+    EMBEDDING_BATCH_MAX_IN_FLIGHT: int = int(os.getenv('EMBEDDING_BATCH_MAX_IN_FLIGHT', '4'))
+
+    # Embedding provider quotas (used by the backfill rate limiter)
+    EMBEDDING_RPM: int = int(os.getenv('EMBEDDING_RPM', '3000'))
+    EMBEDDING_TPM: int = int(os.getenv('EMBEDDING_TPM', '1000000'))
     CHAT_MODEL: str = 'gpt-4o-mini'
 
     # TMDB
     TMDB_API_KEY: str = os.getenv('TMDB_API_KEY', '')
+    TMDB_BASE_URL: str = os.getenv('TMDB_BASE_URL', 'https://api.themoviedb.org/3')  # e.g. a local fixture server
+    TMDB_REQUESTS_PER_SECOND: float = float(os.getenv('TMDB_REQUESTS_PER_SECOND', '20'))  # TMDB allows ~40/sec
+    TMDB_CONCURRENCY: int = int(os.getenv('TMDB_CONCURRENCY', '8'))
 
     # Redis
     REDIS_HOST: str = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT: int = int(os.getenv('REDIS_PORT', '6379'))
     REDIS_PASSWORD: str = os.getenv('REDIS_PASSWORD', '')
     REDIS_TLS: bool = os.getenv('REDIS_TLS', 'false').lower() == 'true'
+    MOVIE_DETAIL_CACHE_TTL: int = int(os.getenv('MOVIE_DETAIL_CACHE_TTL', '600'))  # Seconds; 0 disables
+
+    # Change feed (catalog triggers NOTIFY; each API process invalidates caches)
+    CHANGE_LISTENER_ENABLED: bool = os.getenv('CHANGE_LISTENER_ENABLED', 'true').lower() == 'true'
+    CHANGE_DEBOUNCE_MS: float = float(os.getenv('CHANGE_DEBOUNCE_MS', '250'))
+    CHANGE_MAX_DELAY_MS: float = float(os.getenv('CHANGE_MAX_DELAY_MS', '2000'))
 
     # Vector Search
     EMBEDDING_DIMENSIONS: int = 1536
+    # Stored with each embedding; rows embedded under another profile are re-embedded
+    EMBEDDING_PROFILE: str = f"{EMBEDDING_MODEL}:{EMBEDDING_DIMENSIONS}"
     VECTOR_SIMILARITY_THRESHOLD: float = 0.7
+    NEIGHBORS_K: int = int(os.getenv('NEIGHBORS_K', '20'))  # Precomputed similar movies per movie
+    # Vector index maintenance (services/index_maintenance.py)
+    INDEX_MAINTENANCE_WORK_MEM: str = os.getenv('INDEX_MAINTENANCE_WORK_MEM', '512MB')
+    INDEX_REBUILD_GROWTH: float = float(os.getenv('INDEX_REBUILD_GROWTH', '1.5'))  # Embedded-rows change factor
     MAX_VECTOR_RESULTS: int = 5
+    # Chat review retrieval: 'scoped' searches only the reviews of the retrieved movies, 'global' all reviews
+    REVIEW_RETRIEVAL_MODE: str = os.getenv('REVIEW_RETRIEVAL_MODE', 'scoped')
+
+    # Ingestion API (disabled unless a token is set; clients send it as X-Ingest-Token)
+    INGEST_API_TOKEN: str = os.getenv('INGEST_API_TOKEN', '')
+    INGEST_MAX_BATCH: int = int(os.getenv('INGEST_MAX_BATCH', '1000'))
+    INGEST_EMBED_ON_WRITE: bool = os.getenv('INGEST_EMBED_ON_WRITE', 'true').lower() == 'true'
+
+    # Background jobs (embedding backfills, stats and index rebuilds run by the API process)
+    JOB_RUNNER_ENABLED: bool = os.getenv('JOB_RUNNER_ENABLED', 'true').lower() == 'true'
+    JOB_DB_CONNECTIONS: int = int(os.getenv('JOB_DB_CONNECTIONS', '4'))  # Shared by all runners
+    JOB_API_RATE_SHARE: float = float(os.getenv('JOB_API_RATE_SHARE', '0.5'))  # Of EMBEDDING_RPM/TPM
+    JOB_PAUSE_P99_MS: float = float(os.getenv('JOB_PAUSE_P99_MS', '750'))  # 0 never pauses
+    # Path prefixes left out of that p99: LLM-bound routes are slow regardless of load
+    JOB_LATENCY_EXCLUDE: tuple = tuple(
+        p.strip() for p in os.getenv('JOB_LATENCY_EXCLUDE', '/api/chat').split(',') if p.strip())
+    JOB_POLL_SECONDS: float = float(os.getenv('JOB_POLL_SECONDS', '2'))
 
     # Server
     API_HOST: str = '0.0.0.0'
     API_PORT: int = 8080
+    COMPRESSION_MIN_SIZE: int = int(os.getenv('COMPRESSION_MIN_SIZE', '1000'))  # Bytes
 
     @classmethod
     def get_database_url(cls) -> str:
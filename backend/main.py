@@ -3,18 +3,37 @@ Main FastAPI application entry point.
 Configures routes, CORS, and starts the server.
 """
 
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
 
 from config import config
-from routes import chat_router, movies_router
+from routes import chat_router, movies_router, ingest_router, jobs_router
+from services.change_listener import start_change_listener, stop_change_listener
+from services.job_runner import start_job_runner, stop_job_runner
+from utils.latency import request_latency
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the catalog change listener and job runner for as long as this worker serves requests."""
+    start_change_listener()
+    start_job_runner()
+    yield
+    stop_job_runner()
+    stop_change_listener()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Movie RAG API",
     description="Hybrid RAG system combining vector search with PostgreSQL for movie queries",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS for frontend access
@@ -24,11 +43,33 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # Pagination cursor and conditional GET
 )
 
+# Compress large responses (stats, list pages); brotli when brotli-asgi is installed
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=config.COMPRESSION_MIN_SIZE)  # Falls back to gzip
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=config.COMPRESSION_MIN_SIZE)
+
+# Record request latency; background jobs pause while p99 is high. LLM-bound routes
+# (config.JOB_LATENCY_EXCLUDE) would keep p99 above the threshold whenever chat is used.
+@app.middleware("http")
+async def track_latency(request: Request, call_next):
+    if request.url.path.startswith(config.JOB_LATENCY_EXCLUDE):
+        return await call_next(request)
+    started = time.perf_counter()
+    response = await call_next(request)
+    request_latency.record((time.perf_counter() - started) * 1000)
+    return response
+
+
 # Register routers
 app.include_router(chat_router, prefix="/api")
 app.include_router(movies_router, prefix="/api")
+app.include_router(ingest_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
 
 
 @app.get("/")
@@ -41,7 +82,9 @@ async def root():
             "chat": "/api/chat/",
             "movies": "/api/movies/",
             "semantic_search": "/api/movies/search/semantic",
-            "stats": "/api/movies/stats"
+            "stats": "/api/movies/stats",
+            "ingest": "/api/ingest/",
+            "jobs": "/api/jobs/"
         }
     }
 
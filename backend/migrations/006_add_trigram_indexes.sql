@@ -0,0 +1,22 @@
+-- Trigram indexes for case-insensitive partial and fuzzy lookups
+-- The lookups use LOWER(col) LIKE '%x%', which the btree/GIN indexes from
+-- 001/003 cannot serve. pg_trgm GIN indexes on the same expressions can,
+-- and also back the similarity operators used for misspelled names.
+-- Actor names are indexed on rag_people (migration 007), not over the actors array.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_rag_movies_director_trgm ON rag_movies
+    USING gin (LOWER(director) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_rag_movies_genre_trgm ON rag_movies
+    USING gin (LOWER(genre) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_rag_movies_title_trgm ON rag_movies
+    USING gin (LOWER(title) gin_trgm_ops);
+
+-- Keyword search matches title OR plot; both sides need an index for a BitmapOr
+CREATE INDEX IF NOT EXISTS idx_rag_movies_plot_trgm ON rag_movies
+    USING gin (LOWER(plot) gin_trgm_ops);
+
+ANALYZE rag_movies;
@@ -0,0 +1,72 @@
+-- Normalized people tables for actor and director queries
+-- rag_movies.director / rag_movies.actors stay as the denormalized source of
+-- truth written by the ingestion scripts; rag_movie_people is derived from them
+-- via rag_sync_movie_people() so lookups and distinct counts never unnest arrays.
+
+CREATE TABLE IF NOT EXISTS rag_people (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS rag_movie_people (
+    movie_id INTEGER NOT NULL REFERENCES rag_movies(id) ON DELETE CASCADE,
+    person_id INTEGER NOT NULL REFERENCES rag_people(id) ON DELETE CASCADE,
+    role TEXT NOT NULL CHECK (role IN ('actor', 'director')),
+    billing_order SMALLINT,
+    PRIMARY KEY (movie_id, role, person_id)
+);
+
+-- Person -> movies lookups and COUNT(DISTINCT person_id) per role
+CREATE INDEX IF NOT EXISTS idx_rag_movie_people_role_person ON rag_movie_people(role, person_id, movie_id);
+
+-- Partial and fuzzy name matching (pg_trgm enabled in 006)
+CREATE INDEX IF NOT EXISTS idx_rag_people_name_trgm ON rag_people
+    USING gin (LOWER(name) gin_trgm_ops);
+
+-- Rebuild the people links for the given movies (all movies when NULL)
+CREATE OR REPLACE FUNCTION rag_sync_movie_people(movie_ids INTEGER[])
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO rag_people (name)
+    SELECT DISTINCT n.name
+    FROM rag_movies m
+    CROSS JOIN LATERAL (
+        SELECT m.director AS name
+        UNION ALL
+        SELECT unnest(m.actors)
+    ) n
+    WHERE (movie_ids IS NULL OR m.id = ANY(movie_ids))
+      AND n.name IS NOT NULL AND n.name <> ''
+    ON CONFLICT (name) DO NOTHING;
+
+    DELETE FROM rag_movie_people
+    WHERE movie_ids IS NULL OR movie_id = ANY(movie_ids);
+
+    INSERT INTO rag_movie_people (movie_id, person_id, role, billing_order)
+    SELECT m.id, p.id, 'director', NULL
+    FROM rag_movies m
+    JOIN rag_people p ON p.name = m.director
+    WHERE movie_ids IS NULL OR m.id = ANY(movie_ids)
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO rag_movie_people (movie_id, person_id, role, billing_order)
+    SELECT m.id, p.id, 'actor', MIN(a.ord)
+    FROM rag_movies m
+    CROSS JOIN LATERAL unnest(m.actors) WITH ORDINALITY AS a(name, ord)
+    JOIN rag_people p ON p.name = a.name
+    WHERE movie_ids IS NULL OR m.id = ANY(movie_ids)
+    GROUP BY m.id, p.id
+    ON CONFLICT DO NOTHING;
+END;
+$$;
+
+-- Backfill from the existing arrays
+SELECT rag_sync_movie_people(NULL);
+
+ANALYZE rag_people;
+ANALYZE rag_movie_people;
+
+COMMENT ON TABLE rag_people IS 'Distinct actor and director names';
+COMMENT ON TABLE rag_movie_people IS 'Movie credits derived from rag_movies.director/actors via rag_sync_movie_people()';
@@ -0,0 +1,14 @@
+-- Composite indexes for keyset pagination
+-- List endpoints page with ORDER BY <sort key> DESC, id DESC and continue with
+-- WHERE (<sort key>, id) < (cursor values), which these indexes serve directly.
+
+CREATE INDEX IF NOT EXISTS idx_rag_movies_rating_id ON rag_movies(rating DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_rag_movies_year_rating_id ON rag_movies(year, rating DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_rag_reviews_movie_date_id ON rag_reviews(movie_id, review_date DESC, id DESC);
+
+-- Superseded by the composite indexes above
+DROP INDEX IF EXISTS idx_rag_movies_rating;
+DROP INDEX IF EXISTS idx_rag_movies_year;
+
+ANALYZE rag_movies;
+ANALYZE rag_reviews;
@@ -0,0 +1,140 @@
+-- Precomputed catalog statistics for /api/movies/stats/detailed
+-- One single-row materialized view holds every aggregate the dashboard shows.
+-- rag_movies and rag_reviews are each scanned once per refresh (the MATERIALIZED
+-- CTEs are computed once and reused by every aggregate below).
+-- Refresh after ingestion with: REFRESH MATERIALIZED VIEW CONCURRENTLY rag_detailed_stats;
+
+DROP MATERIALIZED VIEW IF EXISTS rag_detailed_stats;
+
+CREATE MATERIALIZED VIEW rag_detailed_stats AS
+WITH m AS MATERIALIZED (
+    SELECT year, director, genre, rating, runtime_minutes,
+           plot_embedding IS NOT NULL AS has_embedding
+    FROM rag_movies
+),
+r AS MATERIALIZED (
+    SELECT movie_id, reviewer_name, rating,
+           review_embedding IS NOT NULL AS has_embedding
+    FROM rag_reviews
+),
+movie_totals AS (
+    SELECT
+        COUNT(*) as total_movies,
+        ROUND(AVG(rating)::numeric, 2) as avg_rating,
+        ROUND(MIN(rating)::numeric, 2) as min_rating,
+        ROUND(MAX(rating)::numeric, 2) as max_rating,
+        ROUND(STDDEV(rating)::numeric, 2) as rating_stddev,
+        MIN(year) as earliest_year,
+        MAX(year) as latest_year,
+        COUNT(DISTINCT genre) as unique_genres,
+        ROUND(AVG(runtime_minutes)::numeric, 0) as avg_runtime,
+        MIN(runtime_minutes) as min_runtime,
+        MAX(runtime_minutes) as max_runtime,
+        SUM(runtime_minutes) as total_runtime_minutes,
+        COUNT(*) FILTER (WHERE has_embedding) as movies_with_embeddings
+    FROM m
+),
+review_totals AS (
+    SELECT
+        COUNT(*) as total_reviews,
+        ROUND(AVG(rating)::numeric, 2) as avg_review_rating,
+        COUNT(DISTINCT reviewer_name) as unique_reviewers,
+        COUNT(DISTINCT movie_id) as movies_with_reviews,
+        COUNT(*) FILTER (WHERE has_embedding) as reviews_with_embeddings
+    FROM r
+)
+SELECT
+    1 AS id,
+    NOW() AS refreshed_at,
+    jsonb_build_object(
+        'total_movies', mt.total_movies,
+        'avg_rating', mt.avg_rating,
+        'min_rating', mt.min_rating,
+        'max_rating', mt.max_rating,
+        'rating_stddev', mt.rating_stddev,
+        'earliest_year', mt.earliest_year,
+        'latest_year', mt.latest_year,
+        'unique_directors', (SELECT COUNT(DISTINCT person_id) FROM rag_movie_people WHERE role = 'director'),
+        'unique_genres', mt.unique_genres,
+        'avg_runtime', mt.avg_runtime,
+        'min_runtime', mt.min_runtime,
+        'max_runtime', mt.max_runtime,
+        'total_runtime_minutes', mt.total_runtime_minutes
+    ) AS movies,
+    jsonb_build_object(
+        'total_reviews', rt.total_reviews,
+        'avg_review_rating', rt.avg_review_rating,
+        'unique_reviewers', rt.unique_reviewers,
+        'movies_with_reviews', rt.movies_with_reviews
+    ) AS reviews,
+    jsonb_build_object(
+        'movies_with_embeddings', mt.movies_with_embeddings,
+        'total_movies', mt.total_movies,
+        'embedding_coverage_percent',
+            ROUND((mt.movies_with_embeddings::float / NULLIF(mt.total_movies, 0) * 100)::numeric, 1)
+    ) AS vector_db,
+    jsonb_build_object(
+        'reviews_with_embeddings', rt.reviews_with_embeddings,
+        'total_reviews', rt.total_reviews,
+        'embedding_coverage_percent',
+            ROUND((rt.reviews_with_embeddings::float / NULLIF(rt.total_reviews, 0) * 100)::numeric, 1)
+    ) AS review_vector_db,
+    (SELECT vector_dims(plot_embedding) FROM rag_movies WHERE plot_embedding IS NOT NULL LIMIT 1)
+        AS embedding_dimensions,
+    COALESCE((
+        SELECT jsonb_agg(jsonb_build_object('genre', genre, 'count', count) ORDER BY count DESC)
+        FROM (SELECT genre, COUNT(*) as count FROM m GROUP BY genre ORDER BY count DESC LIMIT 15) g
+    ), '[]'::jsonb) AS genre_distribution,
+    COALESCE((
+        SELECT jsonb_agg(jsonb_build_object('decade', decade, 'count', count, 'avg_rating', avg_rating) ORDER BY decade)
+        FROM (
+            SELECT (year / 10) * 10 as decade, COUNT(*) as count, ROUND(AVG(rating)::numeric, 2) as avg_rating
+            FROM m GROUP BY (year / 10) * 10
+        ) d
+    ), '[]'::jsonb) AS decade_distribution,
+    COALESCE((
+        SELECT jsonb_agg(jsonb_build_object('rating_bucket', rating_bucket, 'count', count) ORDER BY min_rating DESC)
+        FROM (
+            SELECT
+                CASE
+                    WHEN rating >= 9 THEN '9-10 (Excellent)'
+                    WHEN rating >= 8 THEN '8-9 (Great)'
+                    WHEN rating >= 7 THEN '7-8 (Good)'
+                    WHEN rating >= 6 THEN '6-7 (Above Average)'
+                    WHEN rating >= 5 THEN '5-6 (Average)'
+                    ELSE 'Below 5 (Poor)'
+                END as rating_bucket,
+                COUNT(*) as count,
+                MIN(rating) as min_rating
+            FROM m GROUP BY rating_bucket
+        ) rb
+    ), '[]'::jsonb) AS rating_distribution,
+    COALESCE((
+        SELECT jsonb_agg(jsonb_build_object('director', director, 'movie_count', movie_count, 'avg_rating', avg_rating)
+                         ORDER BY movie_count DESC)
+        FROM (
+            SELECT director, COUNT(*) as movie_count, ROUND(AVG(rating)::numeric, 2) as avg_rating
+            FROM m GROUP BY director ORDER BY movie_count DESC LIMIT 10
+        ) td
+    ), '[]'::jsonb) AS top_directors,
+    COALESCE((
+        SELECT jsonb_agg(jsonb_build_object('runtime_category', runtime_category, 'count', count) ORDER BY min_runtime)
+        FROM (
+            SELECT
+                CASE
+                    WHEN runtime_minutes < 90 THEN 'Short (<90 min)'
+                    WHEN runtime_minutes < 120 THEN 'Standard (90-120 min)'
+                    WHEN runtime_minutes < 150 THEN 'Long (120-150 min)'
+                    ELSE 'Epic (150+ min)'
+                END as runtime_category,
+                COUNT(*) as count,
+                MIN(runtime_minutes) as min_runtime
+            FROM m GROUP BY runtime_category
+        ) rc
+    ), '[]'::jsonb) AS runtime_distribution
+FROM movie_totals mt, review_totals rt;
+
+-- REFRESH ... CONCURRENTLY requires a unique index
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rag_detailed_stats_id ON rag_detailed_stats(id);
+
+COMMENT ON MATERIALIZED VIEW rag_detailed_stats IS 'Precomputed dashboard statistics; refreshed after ingestion';
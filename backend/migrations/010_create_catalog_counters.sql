@@ -0,0 +1,312 @@
+-- Incrementally maintained catalog counters
+-- Statement-level triggers on rag_movies / rag_reviews fold each write's net
+-- changes into these tables, so get_statistics() reads a handful of rows
+-- regardless of catalog size. Distinct values are tracked exactly: every
+-- (dimension, bucket) row holds a reference count and is deleted at zero.
+-- Every write touches the totals, so they are split into shards picked by backend:
+-- concurrent writers update different rows instead of queueing on one row lock,
+-- and readers sum the shards.
+
+-- Global totals, one row per shard
+CREATE TABLE IF NOT EXISTS rag_catalog_counters (
+    shard SMALLINT PRIMARY KEY,
+    movie_count BIGINT NOT NULL DEFAULT 0,
+    rating_sum NUMERIC NOT NULL DEFAULT 0,
+    review_count BIGINT NOT NULL DEFAULT 0
+);
+
+-- Per-bucket counts: genre, decade, rating_bucket, year, director, actor, reviewer
+CREATE TABLE IF NOT EXISTS rag_catalog_distribution (
+    dimension TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    rating_sum NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, bucket)
+);
+
+-- Number of live buckets per dimension (= distinct directors, actors, ...), sharded like the totals
+CREATE TABLE IF NOT EXISTS rag_catalog_distinct (
+    dimension TEXT NOT NULL,
+    shard SMALLINT NOT NULL,
+    distinct_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, shard)
+);
+
+-- Shard for the current backend; a connection keeps hitting the same rows
+CREATE OR REPLACE FUNCTION rag_counter_shard()
+RETURNS SMALLINT
+LANGUAGE sql
+STABLE PARALLEL SAFE
+AS $$
+    SELECT (pg_backend_pid() % 16)::SMALLINT
+$$;
+
+CREATE OR REPLACE FUNCTION rag_add_catalog_totals(movie_delta BIGINT, rating_delta NUMERIC, review_delta BIGINT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO rag_catalog_counters AS cc (shard, movie_count, rating_sum, review_count)
+    SELECT rag_counter_shard(), movie_delta, rating_delta, review_delta
+    WHERE movie_delta <> 0 OR rating_delta <> 0 OR review_delta <> 0
+    ON CONFLICT (shard) DO UPDATE
+        SET movie_count = cc.movie_count + EXCLUDED.movie_count,
+            rating_sum = cc.rating_sum + EXCLUDED.rating_sum,
+            review_count = cc.review_count + EXCLUDED.review_count
+$$;
+
+-- Only the columns the counters need, so transition rows are cheap to pass around
+DROP TYPE IF EXISTS rag_movie_counter_row CASCADE;
+CREATE TYPE rag_movie_counter_row AS (
+    year INTEGER,
+    director TEXT,
+    genre TEXT,
+    rating NUMERIC,
+    actors TEXT[]
+);
+
+CREATE OR REPLACE FUNCTION rag_rating_bucket(rating NUMERIC)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT CASE
+        WHEN rating >= 9 THEN '9-10 (Excellent)'
+        WHEN rating >= 8 THEN '8-9 (Great)'
+        WHEN rating >= 7 THEN '7-8 (Good)'
+        WHEN rating >= 6 THEN '6-7 (Above Average)'
+        WHEN rating >= 5 THEN '5-6 (Average)'
+        ELSE 'Below 5 (Poor)'
+    END
+$$;
+
+-- Fold (dimension, bucket, count delta, rating delta) rows into the distribution
+-- and keep the distinct counts in step with buckets appearing/disappearing
+CREATE OR REPLACE FUNCTION rag_apply_distribution_deltas(deltas JSONB)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    emptied_dimensions TEXT[];
+    emptied_buckets TEXT[];
+BEGIN
+    WITH d AS (
+        SELECT x.dimension, x.bucket, x.count, x.rating_sum
+        FROM jsonb_to_recordset(deltas) AS x(dimension TEXT, bucket TEXT, count BIGINT, rating_sum NUMERIC)
+        WHERE x.bucket IS NOT NULL AND x.count <> 0
+        ORDER BY x.dimension, x.bucket  -- consistent lock order across concurrent writers
+    ),
+    upserted AS (
+        INSERT INTO rag_catalog_distribution AS cd (dimension, bucket, count, rating_sum)
+        SELECT dimension, bucket, count, rating_sum FROM d
+        ON CONFLICT (dimension, bucket) DO UPDATE
+            SET count = cd.count + EXCLUDED.count,
+                rating_sum = cd.rating_sum + EXCLUDED.rating_sum
+        RETURNING cd.dimension, cd.bucket, cd.count, (cd.xmax = 0) AS inserted
+    ),
+    distinct_deltas AS (
+        SELECT dimension,
+               SUM(CASE WHEN inserted AND count > 0 THEN 1
+                        WHEN NOT inserted AND count <= 0 THEN -1
+                        ELSE 0 END) AS delta
+        FROM upserted
+        GROUP BY dimension
+    ),
+    distinct_upserted AS (
+        INSERT INTO rag_catalog_distinct AS cdi (dimension, shard, distinct_count)
+        SELECT dimension, rag_counter_shard(), delta FROM distinct_deltas WHERE delta <> 0
+        ON CONFLICT (dimension, shard) DO UPDATE SET distinct_count = cdi.distinct_count + EXCLUDED.distinct_count
+    )
+    SELECT array_agg(dimension), array_agg(bucket) INTO emptied_dimensions, emptied_buckets
+    FROM upserted
+    WHERE count <= 0;
+
+    -- Only the buckets this statement emptied; their row locks are already held
+    IF emptied_buckets IS NOT NULL THEN
+        DELETE FROM rag_catalog_distribution cd
+        USING unnest(emptied_dimensions, emptied_buckets) AS e(dimension, bucket)
+        WHERE cd.dimension = e.dimension AND cd.bucket = e.bucket AND cd.count <= 0;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION rag_apply_movie_changes(added rag_movie_counter_row[], removed rag_movie_counter_row[])
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM rag_add_catalog_totals(
+        cardinality(added) - cardinality(removed),
+        COALESCE((SELECT SUM(rating) FROM unnest(added)), 0) - COALESCE((SELECT SUM(rating) FROM unnest(removed)), 0),
+        0
+    );
+
+    PERFORM rag_apply_distribution_deltas((
+        WITH changes AS (
+            SELECT 1 AS sign, a.* FROM unnest(added) a
+            UNION ALL
+            SELECT -1, r.* FROM unnest(removed) r
+        )
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+            'dimension', dimension, 'bucket', bucket, 'count', count, 'rating_sum', rating_sum
+        )), '[]'::jsonb)
+        FROM (
+            SELECT 'genre' AS dimension, genre AS bucket, SUM(sign) AS count, SUM(sign * rating) AS rating_sum
+            FROM changes GROUP BY genre
+            UNION ALL
+            SELECT 'decade', ((year / 10) * 10)::text, SUM(sign), SUM(sign * rating)
+            FROM changes GROUP BY (year / 10) * 10
+            UNION ALL
+            SELECT 'year', lpad(year::text, 4, '0'), SUM(sign), SUM(sign * rating)
+            FROM changes GROUP BY year
+            UNION ALL
+            SELECT 'rating_bucket', rag_rating_bucket(rating), SUM(sign), SUM(sign * rating)
+            FROM changes GROUP BY rag_rating_bucket(rating)
+            UNION ALL
+            SELECT 'director', director, SUM(sign), SUM(sign * rating)
+            FROM changes GROUP BY director
+            UNION ALL
+            SELECT 'actor', a.actor, SUM(c.sign), SUM(c.sign * c.rating)
+            FROM changes c
+            CROSS JOIN LATERAL (SELECT DISTINCT unnest(c.actors) AS actor) a
+            GROUP BY a.actor
+        ) deltas
+    ));
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION rag_movies_counters_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    added rag_movie_counter_row[] := '{}';
+    removed rag_movie_counter_row[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT COALESCE(array_agg(ROW(year, director, genre, rating, actors)::rag_movie_counter_row), '{}')
+        INTO added FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT COALESCE(array_agg(ROW(year, director, genre, rating, actors)::rag_movie_counter_row), '{}')
+        INTO removed FROM old_rows;
+    END IF;
+
+    PERFORM rag_apply_movie_changes(added, removed);
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION rag_reviews_counters_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    deltas JSONB;
+    count_delta BIGINT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'dimension', 'reviewer', 'bucket', reviewer_name, 'count', n, 'rating_sum', 0)), '[]'::jsonb)
+        INTO deltas
+        FROM (SELECT reviewer_name, COUNT(*) AS n FROM new_rows GROUP BY reviewer_name) g;
+        count_delta := (SELECT COUNT(*) FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'dimension', 'reviewer', 'bucket', reviewer_name, 'count', -n, 'rating_sum', 0)), '[]'::jsonb)
+        INTO deltas
+        FROM (SELECT reviewer_name, COUNT(*) AS n FROM old_rows GROUP BY reviewer_name) g;
+        count_delta := -(SELECT COUNT(*) FROM old_rows);
+    ELSE
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'dimension', 'reviewer', 'bucket', reviewer_name, 'count', n, 'rating_sum', 0)), '[]'::jsonb)
+        INTO deltas
+        FROM (
+            SELECT reviewer_name, SUM(sign) AS n
+            FROM (
+                SELECT reviewer_name, 1 AS sign FROM new_rows
+                UNION ALL
+                SELECT reviewer_name, -1 FROM old_rows
+            ) c
+            GROUP BY reviewer_name
+        ) g;
+        count_delta := 0;
+    END IF;
+
+    PERFORM rag_add_catalog_totals(0, 0, count_delta);
+    PERFORM rag_apply_distribution_deltas(deltas);
+    RETURN NULL;
+END;
+$$;
+
+-- Transition tables allow only one event per trigger
+DROP TRIGGER IF EXISTS rag_movies_counters_insert ON rag_movies;
+DROP TRIGGER IF EXISTS rag_movies_counters_update ON rag_movies;
+DROP TRIGGER IF EXISTS rag_movies_counters_delete ON rag_movies;
+CREATE TRIGGER rag_movies_counters_insert AFTER INSERT ON rag_movies
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_movies_counters_trigger();
+CREATE TRIGGER rag_movies_counters_update AFTER UPDATE ON rag_movies
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_movies_counters_trigger();
+CREATE TRIGGER rag_movies_counters_delete AFTER DELETE ON rag_movies
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_movies_counters_trigger();
+
+DROP TRIGGER IF EXISTS rag_reviews_counters_insert ON rag_reviews;
+DROP TRIGGER IF EXISTS rag_reviews_counters_update ON rag_reviews;
+DROP TRIGGER IF EXISTS rag_reviews_counters_delete ON rag_reviews;
+CREATE TRIGGER rag_reviews_counters_insert AFTER INSERT ON rag_reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_reviews_counters_trigger();
+CREATE TRIGGER rag_reviews_counters_update AFTER UPDATE ON rag_reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_reviews_counters_trigger();
+CREATE TRIGGER rag_reviews_counters_delete AFTER DELETE ON rag_reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_reviews_counters_trigger();
+
+-- Recompute everything from the base tables (initial backfill, or after a load
+-- that ran with the counter triggers disabled)
+CREATE OR REPLACE FUNCTION rag_rebuild_catalog_counters()
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    LOCK TABLE rag_catalog_counters, rag_catalog_distribution, rag_catalog_distinct IN EXCLUSIVE MODE;
+
+    DELETE FROM rag_catalog_counters;
+    INSERT INTO rag_catalog_counters (shard, movie_count, rating_sum, review_count)
+    SELECT 0,
+           (SELECT COUNT(*) FROM rag_movies),
+           (SELECT COALESCE(SUM(rating), 0) FROM rag_movies),
+           (SELECT COUNT(*) FROM rag_reviews);
+
+    DELETE FROM rag_catalog_distribution;
+    INSERT INTO rag_catalog_distribution (dimension, bucket, count, rating_sum)
+    SELECT 'genre', genre, COUNT(*), SUM(rating) FROM rag_movies GROUP BY genre
+    UNION ALL
+    SELECT 'decade', ((year / 10) * 10)::text, COUNT(*), SUM(rating) FROM rag_movies GROUP BY (year / 10) * 10
+    UNION ALL
+    SELECT 'year', lpad(year::text, 4, '0'), COUNT(*), SUM(rating) FROM rag_movies GROUP BY year
+    UNION ALL
+    SELECT 'rating_bucket', rag_rating_bucket(rating), COUNT(*), SUM(rating) FROM rag_movies GROUP BY rag_rating_bucket(rating)
+    UNION ALL
+    SELECT 'director', director, COUNT(*), SUM(rating) FROM rag_movies GROUP BY director
+    UNION ALL
+    SELECT 'actor', a.actor, COUNT(*), SUM(m.rating)
+    FROM rag_movies m CROSS JOIN LATERAL (SELECT DISTINCT unnest(m.actors) AS actor) a
+    GROUP BY a.actor
+    UNION ALL
+    SELECT 'reviewer', reviewer_name, COUNT(*), 0 FROM rag_reviews GROUP BY reviewer_name;
+
+    DELETE FROM rag_catalog_distinct;
+    INSERT INTO rag_catalog_distinct (dimension, shard, distinct_count)
+    SELECT dimension, 0, COUNT(*) FROM rag_catalog_distribution GROUP BY dimension;
+END;
+$$;
+
+SELECT rag_rebuild_catalog_counters();
+
+COMMENT ON TABLE rag_catalog_counters IS 'Global catalog totals (one row per shard) maintained by statement-level triggers';
+COMMENT ON TABLE rag_catalog_distribution IS 'Per-dimension bucket counts maintained by statement-level triggers';
+COMMENT ON TABLE rag_catalog_distinct IS 'Live bucket count per dimension (distinct directors, actors, ...)';
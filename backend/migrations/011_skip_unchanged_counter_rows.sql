@@ -0,0 +1,86 @@
+-- Catalog counter trigger: ignore updates that don't touch counted columns
+-- Embedding backfills rewrite every row's plot_embedding; without this filter each
+-- of those statements re-aggregated the whole batch just to apply zero deltas.
+-- (Transition tables can't be combined with UPDATE OF column lists, hence the join.)
+
+CREATE OR REPLACE FUNCTION rag_movies_counters_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    added rag_movie_counter_row[] := '{}';
+    removed rag_movie_counter_row[] := '{}';
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT COALESCE(array_agg(ROW(year, director, genre, rating, actors)::rag_movie_counter_row), '{}')
+        INTO added FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT COALESCE(array_agg(ROW(year, director, genre, rating, actors)::rag_movie_counter_row), '{}')
+        INTO removed FROM old_rows;
+    ELSE
+        SELECT COALESCE(array_agg(ROW(n.year, n.director, n.genre, n.rating, n.actors)::rag_movie_counter_row), '{}'),
+               COALESCE(array_agg(ROW(o.year, o.director, o.genre, o.rating, o.actors)::rag_movie_counter_row), '{}')
+        INTO added, removed
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        WHERE (o.year, o.director, o.genre, o.rating, o.actors)
+              IS DISTINCT FROM (n.year, n.director, n.genre, n.rating, n.actors);
+
+        IF cardinality(added) = 0 THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+
+    PERFORM rag_apply_movie_changes(added, removed);
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION rag_reviews_counters_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    deltas JSONB;
+    count_delta BIGINT := 0;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'dimension', 'reviewer', 'bucket', reviewer_name, 'count', n, 'rating_sum', 0)), '[]'::jsonb)
+        INTO deltas
+        FROM (SELECT reviewer_name, COUNT(*) AS n FROM new_rows GROUP BY reviewer_name) g;
+        count_delta := (SELECT COUNT(*) FROM new_rows);
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'dimension', 'reviewer', 'bucket', reviewer_name, 'count', -n, 'rating_sum', 0)), '[]'::jsonb)
+        INTO deltas
+        FROM (SELECT reviewer_name, COUNT(*) AS n FROM old_rows GROUP BY reviewer_name) g;
+        count_delta := -(SELECT COUNT(*) FROM old_rows);
+    ELSE
+        SELECT COALESCE(jsonb_agg(jsonb_build_object(
+                   'dimension', 'reviewer', 'bucket', reviewer_name, 'count', n, 'rating_sum', 0)), '[]'::jsonb)
+        INTO deltas
+        FROM (
+            SELECT reviewer_name, SUM(sign) AS n
+            FROM (
+                SELECT n.reviewer_name, 1 AS sign
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE o.reviewer_name IS DISTINCT FROM n.reviewer_name
+                UNION ALL
+                SELECT o.reviewer_name, -1
+                FROM old_rows o JOIN new_rows n ON n.id = o.id
+                WHERE o.reviewer_name IS DISTINCT FROM n.reviewer_name
+            ) c
+            GROUP BY reviewer_name
+        ) g;
+
+        IF deltas = '[]'::jsonb THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+
+    PERFORM rag_add_catalog_totals(0, 0, count_delta);
+    PERFORM rag_apply_distribution_deltas(deltas);
+    RETURN NULL;
+END;
+$$;
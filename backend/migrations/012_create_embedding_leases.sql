@@ -0,0 +1,16 @@
+-- Work leases for distributed embedding backfills
+-- Workers claim pending rows with FOR UPDATE SKIP LOCKED and record a lease here,
+-- so any number of processes/nodes embed disjoint batches. Leases of crashed workers
+-- simply expire and the rows become claimable again.
+
+CREATE TABLE IF NOT EXISTS rag_embedding_leases (
+    kind TEXT NOT NULL CHECK (kind IN ('movies', 'reviews')),
+    row_id INTEGER NOT NULL,
+    worker_id TEXT NOT NULL,
+    leased_until TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (kind, row_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rag_embedding_leases_worker ON rag_embedding_leases(worker_id);
+
+COMMENT ON TABLE rag_embedding_leases IS 'Rows currently claimed by embedding backfill workers';
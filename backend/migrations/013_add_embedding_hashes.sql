@@ -0,0 +1,50 @@
+-- Content hashes for embeddings
+-- Each row records the SHA-256 of the exact text that was embedded and the embedding
+-- profile (model:dimensions). The backfill treats a row as pending when either no longer
+-- matches, so edited plots/reviews and model changes are re-embedded automatically,
+-- and rows with identical text share one embedding.
+-- The hash of each row's current text is a stored generated column, so finding pending
+-- rows compares two columns instead of re-hashing every text on every scan.
+
+-- Hash of the text as sent to the embeddings API (hex SHA-256 of its UTF-8 bytes)
+CREATE OR REPLACE FUNCTION rag_text_hash(content TEXT)
+RETURNS TEXT AS $$
+    SELECT encode(sha256(convert_to(content, 'UTF8')), 'hex');
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+-- The content hash expressions must match SOURCES in services/embedding_backfill.py
+-- (texts are capped at 30000 characters)
+ALTER TABLE rag_movies
+    ADD COLUMN IF NOT EXISTS plot_embedding_hash TEXT,
+    ADD COLUMN IF NOT EXISTS plot_embedding_profile TEXT,
+    ADD COLUMN IF NOT EXISTS plot_content_hash TEXT
+        GENERATED ALWAYS AS (rag_text_hash(left('Movie: ' || title || '. Plot: ' || plot, 30000))) STORED;
+
+ALTER TABLE rag_reviews
+    ADD COLUMN IF NOT EXISTS review_embedding_hash TEXT,
+    ADD COLUMN IF NOT EXISTS review_embedding_profile TEXT,
+    ADD COLUMN IF NOT EXISTS review_content_hash TEXT
+        GENERATED ALWAYS AS (rag_text_hash(left(review_text, 30000))) STORED;
+
+-- Looked up when copying an existing embedding to rows with the same text
+CREATE INDEX IF NOT EXISTS idx_rag_movies_plot_embedding_hash ON rag_movies(plot_embedding_hash);
+CREATE INDEX IF NOT EXISTS idx_rag_reviews_review_embedding_hash ON rag_reviews(review_embedding_hash);
+
+-- Existing embeddings were produced from the same texts with the default model
+-- (text-embedding-3-small, 1536 dimensions)
+UPDATE rag_movies
+SET plot_embedding_hash = plot_content_hash,
+    plot_embedding_profile = 'text-embedding-3-small:1536'
+WHERE plot_embedding IS NOT NULL AND plot_embedding_hash IS NULL;
+
+UPDATE rag_reviews
+SET review_embedding_hash = review_content_hash,
+    review_embedding_profile = 'text-embedding-3-small:1536'
+WHERE review_embedding IS NOT NULL AND review_embedding_hash IS NULL;
+
+COMMENT ON COLUMN rag_movies.plot_embedding_hash IS 'SHA-256 of the text plot_embedding was computed from';
+COMMENT ON COLUMN rag_movies.plot_embedding_profile IS 'Model and dimensions plot_embedding was computed with';
+COMMENT ON COLUMN rag_reviews.review_embedding_hash IS 'SHA-256 of the text review_embedding was computed from';
+COMMENT ON COLUMN rag_reviews.review_embedding_profile IS 'Model and dimensions review_embedding was computed with';
+COMMENT ON COLUMN rag_movies.plot_content_hash IS 'SHA-256 of the text plot_embedding should be computed from';
+COMMENT ON COLUMN rag_reviews.review_content_hash IS 'SHA-256 of the text review_embedding should be computed from';
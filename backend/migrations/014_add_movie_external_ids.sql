@@ -0,0 +1,9 @@
+-- Stable source identifiers for ingested movies (e.g. 'tmdb:238')
+-- Ingestion upserts on external_id, so re-running an import updates rows in place
+-- instead of inserting duplicates. Synthetic and mock movies leave it NULL.
+
+ALTER TABLE rag_movies ADD COLUMN IF NOT EXISTS external_id TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rag_movies_external_id ON rag_movies(external_id);
+
+COMMENT ON COLUMN rag_movies.external_id IS 'Source identifier (<source>:<id>); unique, NULL for generated movies';
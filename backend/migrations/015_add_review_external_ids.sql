@@ -0,0 +1,9 @@
+-- Stable source identifiers for ingested reviews
+-- The ingestion API upserts reviews on external_id, so re-sending a batch updates
+-- rows in place instead of inserting duplicates. Generated reviews leave it NULL.
+
+ALTER TABLE rag_reviews ADD COLUMN IF NOT EXISTS external_id TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rag_reviews_external_id ON rag_reviews(external_id);
+
+COMMENT ON COLUMN rag_reviews.external_id IS 'Source identifier (<source>:<id>); unique, NULL for generated reviews';
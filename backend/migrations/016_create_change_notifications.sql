@@ -0,0 +1,82 @@
+-- Change feed for cache invalidation across API processes
+-- Statement-level triggers on rag_movies / rag_reviews send one NOTIFY per write
+-- statement on the 'rag_changes' channel. Notifications are delivered on commit
+-- (never for rolled-back writes) and each API process's listener turns them into
+-- cache invalidations (services/change_listener.py).
+--
+-- Payload: {"table": "rag_movies", "op": "update", "count": 3,
+--           "ids": [...], "movie_ids": [...]}
+-- ids / movie_ids are NULL when a statement touched more rows than fit in one
+-- payload (NOTIFY allows 8000 bytes); listeners then invalidate everything.
+
+CREATE OR REPLACE FUNCTION rag_notify_changes()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    max_ids CONSTANT INTEGER := 250;
+    row_count BIGINT;
+    ids INTEGER[];
+    movie_ids INTEGER[];
+BEGIN
+    -- Transition tables are only planned in the branch that runs, so each
+    -- branch may reference just the tables its event provides
+    IF TG_OP = 'DELETE' THEN
+        SELECT COUNT(*), array_agg(id) INTO row_count, ids FROM old_rows;
+    ELSE
+        SELECT COUNT(*), array_agg(id) INTO row_count, ids FROM new_rows;
+    END IF;
+
+    IF row_count = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_TABLE_NAME = 'rag_movies' THEN
+        movie_ids := ids;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT movie_id) INTO movie_ids FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT movie_id) INTO movie_ids FROM old_rows;
+    ELSE
+        -- A review moved to another movie changes both movies
+        SELECT array_agg(DISTINCT movie_id) INTO movie_ids
+        FROM (SELECT movie_id FROM new_rows UNION SELECT movie_id FROM old_rows) m;
+    END IF;
+
+    PERFORM pg_notify('rag_changes', json_build_object(
+        'table', TG_TABLE_NAME,
+        'op', lower(TG_OP),
+        'count', row_count,
+        'ids', CASE WHEN cardinality(ids) <= max_ids THEN ids END,
+        'movie_ids', CASE WHEN cardinality(movie_ids) <= max_ids THEN movie_ids END
+    )::text);
+    RETURN NULL;
+END;
+$$;
+
+-- Transition tables allow only one event per trigger
+DROP TRIGGER IF EXISTS rag_movies_notify_insert ON rag_movies;
+DROP TRIGGER IF EXISTS rag_movies_notify_update ON rag_movies;
+DROP TRIGGER IF EXISTS rag_movies_notify_delete ON rag_movies;
+CREATE TRIGGER rag_movies_notify_insert AFTER INSERT ON rag_movies
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_notify_changes();
+CREATE TRIGGER rag_movies_notify_update AFTER UPDATE ON rag_movies
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_notify_changes();
+CREATE TRIGGER rag_movies_notify_delete AFTER DELETE ON rag_movies
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_notify_changes();
+
+DROP TRIGGER IF EXISTS rag_reviews_notify_insert ON rag_reviews;
+DROP TRIGGER IF EXISTS rag_reviews_notify_update ON rag_reviews;
+DROP TRIGGER IF EXISTS rag_reviews_notify_delete ON rag_reviews;
+CREATE TRIGGER rag_reviews_notify_insert AFTER INSERT ON rag_reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_notify_changes();
+CREATE TRIGGER rag_reviews_notify_update AFTER UPDATE ON rag_reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_notify_changes();
+CREATE TRIGGER rag_reviews_notify_delete AFTER DELETE ON rag_reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_notify_changes();
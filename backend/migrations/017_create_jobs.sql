@@ -0,0 +1,30 @@
+-- Background maintenance jobs (services/job_runner.py)
+-- Any API process may enqueue a job or report on it; runners claim queued jobs
+-- with FOR UPDATE SKIP LOCKED and publish progress here, so status is the same
+-- whichever worker answers. db_connections is the job's share of the global
+-- connection budget, checked when a job is claimed.
+
+CREATE TABLE IF NOT EXISTS rag_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    params JSONB NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'paused', 'succeeded', 'failed', 'cancelled')),
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    db_connections INTEGER NOT NULL DEFAULT 1,
+    done BIGINT NOT NULL DEFAULT 0,
+    total BIGINT,
+    rate DOUBLE PRECISION,            -- Units of work per second since the job started
+    message TEXT,
+    result JSONB,
+    error TEXT,
+    runner_id TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    heartbeat_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Runners only ever scan unfinished jobs
+CREATE INDEX IF NOT EXISTS idx_rag_jobs_active ON rag_jobs(id)
+    WHERE status IN ('queued', 'running', 'paused');
@@ -0,0 +1,11 @@
+-- pg_prewarm lets index maintenance load freshly rebuilt vector indexes into
+-- shared buffers, so the first searches after a bulk load don't read from disk.
+-- It ships with PostgreSQL's contrib modules; skip quietly where it isn't installed.
+
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_prewarm;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_prewarm not available (%); vector indexes will not be pre-warmed', SQLERRM;
+END;
+$$;
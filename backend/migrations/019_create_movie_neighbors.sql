@@ -0,0 +1,22 @@
+-- Precomputed "more like this" neighbor graph (services/neighbor_service.py)
+-- Each embedded movie stores its top-k most similar movies by plot embedding, so
+-- /api/movies/{id}/similar is one primary-key range scan with no embedding call.
+
+CREATE TABLE IF NOT EXISTS rag_movie_neighbors (
+    movie_id INTEGER NOT NULL REFERENCES rag_movies(id) ON DELETE CASCADE,
+    rank SMALLINT NOT NULL,           -- 1 = most similar
+    neighbor_id INTEGER NOT NULL REFERENCES rag_movies(id) ON DELETE CASCADE,
+    similarity REAL NOT NULL,         -- Cosine similarity of the plot embeddings
+    PRIMARY KEY (movie_id, rank)
+);
+
+-- Finds the lists a changed or deleted movie appears in
+CREATE INDEX IF NOT EXISTS idx_rag_movie_neighbors_neighbor ON rag_movie_neighbors(neighbor_id);
+
+-- Which embedding each movie's list was computed from; incremental refreshes
+-- recompute movies that are missing here or whose plot_embedding_hash moved on
+CREATE TABLE IF NOT EXISTS rag_movie_neighbor_state (
+    movie_id INTEGER PRIMARY KEY REFERENCES rag_movies(id) ON DELETE CASCADE,
+    embedding_hash TEXT,
+    computed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,82 @@
+-- Change feed: tell content changes from embedding-only updates, and number notifications
+-- Every API process receives every notification, but the shared Redis work should run
+-- once: 'seq' identifies a notification so the first listener to claim it does that work.
+-- Embedding backfills update thousands of rows that only change embedding, hash and
+-- profile columns, which no cached payload shows: such statements now send
+-- "content": false, and ids / movie_ids list only rows whose other columns changed.
+-- (Transition tables can't be combined with UPDATE OF column lists, hence the join.)
+--
+-- Payload: {"seq": 42, "table": "rag_movies", "op": "update", "count": 3,
+--           "content": true, "ids": [...], "movie_ids": [...]}
+
+CREATE SEQUENCE IF NOT EXISTS rag_change_seq;
+
+CREATE OR REPLACE FUNCTION rag_notify_changes()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    max_ids CONSTANT INTEGER := 250;
+    row_count BIGINT;
+    ids INTEGER[];
+    movie_ids INTEGER[];
+BEGIN
+    -- Transition tables are only planned in the branch that runs, so each
+    -- branch may reference just the tables its event provides
+    IF TG_OP = 'DELETE' THEN
+        SELECT COUNT(*), array_agg(id) INTO row_count, ids FROM old_rows;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT COUNT(*), array_agg(id) INTO row_count, ids FROM new_rows;
+    ELSIF TG_TABLE_NAME = 'rag_movies' THEN
+        SELECT COUNT(*) INTO row_count FROM new_rows;
+        SELECT array_agg(n.id) INTO ids
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        WHERE (o.title, o.year, o.director, o.genre, o.plot, o.rating, o.runtime_minutes, o.actors, o.external_id)
+              IS DISTINCT FROM
+              (n.title, n.year, n.director, n.genre, n.plot, n.rating, n.runtime_minutes, n.actors, n.external_id);
+    ELSE
+        SELECT COUNT(*) INTO row_count FROM new_rows;
+        -- A review moved to another movie changes both movies
+        SELECT array_agg(n.id), array_agg(DISTINCT m.movie_id) INTO ids, movie_ids
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id
+        CROSS JOIN LATERAL (VALUES (o.movie_id), (n.movie_id)) m(movie_id)
+        WHERE (o.movie_id, o.reviewer_name, o.review_text, o.rating, o.review_date, o.external_id)
+              IS DISTINCT FROM
+              (n.movie_id, n.reviewer_name, n.review_text, n.rating, n.review_date, n.external_id);
+        SELECT array_agg(DISTINCT id) INTO ids FROM unnest(ids) AS id;
+    END IF;
+
+    IF row_count = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_TABLE_NAME = 'rag_movies' THEN
+        movie_ids := ids;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT movie_id) INTO movie_ids FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT movie_id) INTO movie_ids FROM old_rows;
+    END IF;
+
+    PERFORM pg_notify('rag_changes', json_build_object(
+        'seq', nextval('rag_change_seq'),
+        'table', TG_TABLE_NAME,
+        'op', lower(TG_OP),
+        'count', row_count,
+        'content', ids IS NOT NULL,
+        'ids', CASE WHEN ids IS NULL THEN '{}'::INTEGER[]
+                    WHEN cardinality(ids) <= max_ids THEN ids END,
+        'movie_ids', CASE WHEN movie_ids IS NULL THEN '{}'::INTEGER[]
+                          WHEN cardinality(movie_ids) <= max_ids THEN movie_ids END
+    )::text);
+    RETURN NULL;
+END;
+$$;
+
+-- Movie updates now compare old and new rows too
+DROP TRIGGER IF EXISTS rag_movies_notify_update ON rag_movies;
+CREATE TRIGGER rag_movies_notify_update AFTER UPDATE ON rag_movies
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION rag_notify_changes();
@@ -2,3 +2,5 @@
 
 from .chat_routes import router as chat_router
 from .movies_routes import router as movies_router
+from .ingest_routes import router as ingest_router
+from .jobs_routes import router as jobs_router
@@ -9,6 +9,7 @@ from typing import List, Optional
 import sys
 sys.path.append('..')
 from services.chat_service import process_chat_message
+from services.embedding_batcher import get_batcher_metrics
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -33,9 +34,11 @@ class ChatResponse(BaseModel):
 
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+def chat(request: ChatRequest):
     """
     Process a chat message and return AI response.
+    Runs in the threadpool (the pipeline is blocking I/O), so concurrent chats
+    proceed in parallel and their query embeddings can be micro-batched.
 
     The system will:
     1. Analyze the query intent (semantic vs structured)
@@ -62,4 +65,4 @@ async def chat(request: ChatRequest):
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "chat"}
+    return {"status": "healthy", "service": "chat", "embedding_batcher": get_batcher_metrics()}
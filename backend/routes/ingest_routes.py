@@ -0,0 +1,112 @@
+"""
+Ingestion API routes.
+Bulk, idempotent upserts of movies and reviews keyed by their source identifier.
+Only caches for changed rows are invalidated; the stats view refresh runs after the
+response is sent, and changed rows are embedded by a queued embedding_backfill job.
+"""
+
+import hmac
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException
+from pydantic import BaseModel, Field, model_validator
+import sys
+sys.path.append('..')
+from config import config
+from services.ingestion_service import ingest_movies, ingest_reviews, embed_ingested
+from services.sql_search_service import refresh_statistics
+from utils.serialization import FastJSONResponse
+
+
+def require_ingest_token(x_ingest_token: Optional[str] = Header(None)):
+    """Reject requests without the configured ingestion token (the API is off when none is set)."""
+    if not config.INGEST_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Ingestion API disabled (set INGEST_API_TOKEN)")
+    if not x_ingest_token or not hmac.compare_digest(x_ingest_token, config.INGEST_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid ingestion token")
+
+
+router = APIRouter(prefix="/ingest", tags=["ingest"], default_response_class=FastJSONResponse,
+                   dependencies=[Depends(require_ingest_token)])
+
+
+class MovieIn(BaseModel):
+    """Movie to upsert, keyed by external_id (e.g. 'tmdb:238')."""
+    external_id: str = Field(..., min_length=1)
+    title: str = Field(..., min_length=1)
+    year: int = Field(..., ge=1870, le=2100)
+    director: str
+    genre: str
+    plot: str
+    rating: float = Field(..., ge=0, le=10)
+    runtime_minutes: Optional[int] = Field(None, ge=1)
+    actors: List[str] = []
+
+
+class ReviewIn(BaseModel):
+    """Review to upsert, keyed by external_id; names its movie by id or external_id."""
+    external_id: str = Field(..., min_length=1)
+    movie_id: Optional[int] = None
+    movie_external_id: Optional[str] = None
+    reviewer_name: str = Field(..., min_length=1)
+    review_text: str = Field(..., min_length=1)
+    rating: float = Field(..., ge=0, le=10)
+    review_date: Optional[date] = None  # Defaults to today
+
+    @model_validator(mode='after')
+    def check_movie_reference(self):
+        if (self.movie_id is None) == (self.movie_external_id is None):
+            raise ValueError("Provide exactly one of movie_id or movie_external_id")
+        return self
+
+
+class MovieBatch(BaseModel):
+    """Movie upsert request."""
+    movies: List[MovieIn] = Field(..., min_length=1, max_length=config.INGEST_MAX_BATCH)
+
+
+class ReviewBatch(BaseModel):
+    """Review upsert request."""
+    reviews: List[ReviewIn] = Field(..., min_length=1, max_length=config.INGEST_MAX_BATCH)
+
+
+def _after_write(background_tasks: BackgroundTasks, result: dict, kind: str, ids: List[int]):
+    """Queue embedding of changed rows and the stats view refresh; records the embedding status."""
+    result["embedding"], result["embedding_job_id"] = "unchanged", None
+    if not ids:
+        return
+    background_tasks.add_task(refresh_statistics)
+    result["embedding"] = "pending"  # Picked up by the next backfill or generate_embeddings.py run
+    if config.INGEST_EMBED_ON_WRITE:
+        job = embed_ingested(kind, ids)
+        if job is not None:
+            result["embedding"], result["embedding_job_id"] = "queued", job["id"]
+
+
+@router.post("/movies")
+def upsert_movies_endpoint(request: MovieBatch, background_tasks: BackgroundTasks):
+    """
+    Insert or update movies by external_id. Re-sending the same batch changes nothing.
+    Returns the ids of movies that were inserted or changed.
+    """
+    try:
+        result = ingest_movies([movie.model_dump() for movie in request.movies])
+        _after_write(background_tasks, result, "movies", result["movie_ids"])
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/reviews")
+def upsert_reviews_endpoint(request: ReviewBatch, background_tasks: BackgroundTasks):
+    """
+    Insert or update reviews by external_id. Reviews whose movie does not exist are
+    skipped and listed under rejected.
+    """
+    try:
+        result = ingest_reviews([review.model_dump() for review in request.reviews])
+        _after_write(background_tasks, result, "reviews", result["review_ids"])
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,70 @@
+"""
+Background job routes.
+Queue maintenance jobs and follow their progress, throughput and ETA.
+Protected by the same token as the ingestion API.
+"""
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+import sys
+sys.path.append('..')
+from services.job_runner import JOB_TYPES, enqueue_job, get_job, list_jobs, cancel_job, get_job_runner
+from services.index_maintenance import inspect_vector_indexes
+from routes.ingest_routes import require_ingest_token
+from utils.serialization import FastJSONResponse
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], default_response_class=FastJSONResponse,
+                   dependencies=[Depends(require_ingest_token)])
+
+
+class JobRequest(BaseModel):
+    """Job submission model."""
+    type: str = Field(..., description=f"One of: {', '.join(JOB_TYPES)}")
+    params: Dict[str, Any] = {}
+
+
+@router.get("/")
+def get_jobs(limit: int = Query(50, ge=1, le=500), active: bool = False):
+    """Recent jobs (newest first) and this worker's runner status."""
+    runner = get_job_runner()
+    return {"jobs": list_jobs(limit, active_only=active), "runner": runner.status() if runner else None}
+
+
+@router.post("/", status_code=202)
+def submit_job(request: JobRequest):
+    """
+    Queue a job, e.g. {"type": "embedding_backfill", "params": {"kind": "reviews"}},
+    {"type": "stats_refresh", "params": {"rebuild_counters": true}} or
+    {"type": "index_rebuild", "params": {"index": "idx_rag_movies_plot_embedding"}} or
+    {"type": "index_maintenance", "params": {"force": false}}.
+    """
+    try:
+        return enqueue_job(request.type, request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/indexes")
+def get_vector_indexes():
+    """Row counts, embedding coverage and lists of each vector index, and whether it needs a rebuild."""
+    return {"indexes": inspect_vector_indexes()}
+
+
+@router.get("/{job_id}")
+def get_job_status(job_id: int):
+    """Job status with done/total, rate (units per second) and eta_seconds."""
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/{job_id}/cancel")
+def cancel_job_endpoint(job_id: int):
+    """Cancel a queued job, or stop a running one at its next unit of work."""
+    job = cancel_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
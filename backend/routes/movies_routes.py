@@ -3,37 +3,63 @@ Movies API routes.
 Direct access to movie data and search endpoints.
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from datetime import date
 import sys
 sys.path.append('..')
+from config import config
 from services.sql_search_service import (
     get_movies_by_year,
     get_movies_by_director,
     get_movies_by_genre,
     get_top_rated_movies,
     get_movie_with_reviews,
+    get_movies_with_reviews,
     search_movies_keyword,
     get_statistics,
     get_detailed_statistics,
-    get_reviews_for_movie
+    get_reviews_for_movie,
+    get_similar_movies,
+    PROJECTIONS
 )
-from services.vector_search_service import search_movies_by_similarity, search_reviews_by_similarity
+from services.vector_search_service import (
+    search_movies_by_similarity,
+    search_movies_by_similarity_batch,
+    search_reviews_by_similarity,
+    search_reviews_for_movies
+)
+from services.redis_cache import get_data_version
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    MOVIE_CURSOR_KEYS,
+    REVIEW_CURSOR_KEYS,
+    decode_cursor,
+    next_cursor
+)
+from utils.serialization import FastJSONResponse
+from utils.http_cache import conditional_response
 
-router = APIRouter(prefix="/movies", tags=["movies"])
+# Endpoints returning trusted SQL rows bypass response_model validation by returning
+# FastJSONResponse directly; everything else is still encoded with orjson
+router = APIRouter(prefix="/movies", tags=["movies"], default_response_class=FastJSONResponse)
+
+FIELDS_PATTERN = f"^({'|'.join(PROJECTIONS)})$"
 
 
 class Movie(BaseModel):
-    """Movie response model."""
+    """Movie response model. Fields outside the requested projection are omitted."""
     id: int
     title: str
     year: int
-    director: str
-    genre: str
-    plot: str
     rating: float
-    runtime_minutes: int
+    director: Optional[str] = None
+    genre: Optional[str] = None
+    plot: Optional[str] = None
+    runtime_minutes: Optional[int] = None
+    actors: Optional[List[str]] = None
 
 
 class Review(BaseModel):
@@ -42,7 +68,7 @@ class Review(BaseModel):
     reviewer_name: str
     review_text: str
     rating: float
-    review_date: str
+    review_date: date
 
 
 class MovieWithReviews(Movie):
@@ -50,107 +76,240 @@ class MovieWithReviews(Movie):
     reviews: List[Review] = []
 
 
+class MovieBatchRequest(BaseModel):
+    """Batch detail request model."""
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_PAGE_SIZE)
+
+
+class SemanticBatchRequest(BaseModel):
+    """Batch semantic search request model."""
+    queries: List[str] = Field(..., min_length=1, max_length=20)
+    limit: int = Field(5, ge=1, le=20)
+
+
+def _decode_cursor_param(cursor: Optional[str]):
+    """Decode the `cursor` query parameter, rejecting malformed cursors with a 400."""
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _page_response(rows: list, limit: int, keys: tuple) -> FastJSONResponse:
+    """Serialize a page of SQL rows, exposing the next-page cursor (if any) in X-Next-Cursor."""
+    cursor = next_cursor(rows, limit, keys)
+    headers = {"X-Next-Cursor": cursor} if cursor else None
+    return FastJSONResponse(rows, headers=headers)
+
+
 @router.get("/", response_model=List[Movie])
 async def get_movies(
+    request: Request,
     year: Optional[int] = Query(None, description="Filter by year"),
     director: Optional[str] = Query(None, description="Filter by director"),
     genre: Optional[str] = Query(None, description="Filter by genre"),
-    keyword: Optional[str] = Query(None, description="Search in title/plot")
+    keyword: Optional[str] = Query(None, description="Search in title/plot"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    fields: str = Query("full", pattern=FIELDS_PATTERN, description="Projection: summary, card or full")
 ):
     """
     Get movies with optional filters.
+    Results are keyset-paginated; pass the X-Next-Cursor response header back as `cursor`.
     """
-    try:
-        if year:
-            return get_movies_by_year(year)
-        elif director:
-            return get_movies_by_director(director)
-        elif genre:
-            return get_movies_by_genre(genre)
-        elif keyword:
-            return search_movies_keyword(keyword)
-        else:
-            return get_top_rated_movies(50)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    after = _decode_cursor_param(cursor)
+
+    def build():
+        try:
+            if year:
+                movies = get_movies_by_year(year, limit, after, fields)
+            elif director:
+                movies = get_movies_by_director(director, limit, after, fields)
+            elif genre:
+                movies = get_movies_by_genre(genre, limit, after, fields)
+            elif keyword:
+                movies = search_movies_keyword(keyword, limit, after, fields)
+            else:
+                movies = get_top_rated_movies(limit, after, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return _page_response(movies, limit, MOVIE_CURSOR_KEYS)
+
+    return conditional_response(request, get_data_version(), build)
 
 
 @router.get("/top", response_model=List[Movie])
-async def get_top_movies(limit: int = Query(10, ge=1, le=50)):
+async def get_top_movies(
+    request: Request,
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    fields: str = Query("full", pattern=FIELDS_PATTERN, description="Projection: summary, card or full")
+):
     """Get top rated movies."""
-    try:
-        return get_top_rated_movies(limit)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    after = _decode_cursor_param(cursor)
+
+    def build():
+        try:
+            movies = get_top_rated_movies(limit, after, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return _page_response(movies, limit, MOVIE_CURSOR_KEYS)
+
+    return conditional_response(request, get_data_version(), build)
 
 
 @router.get("/search/semantic")
-async def semantic_search(
+def semantic_search(
     query: str = Query(..., description="Natural language search query"),
     limit: int = Query(5, ge=1, le=20)
 ):
     """
     Search movies using semantic similarity.
     Uses vector embeddings to find movies with similar themes/plots.
+    Sync so the embedding call and the cache miss path run in the threadpool.
     """
     try:
-        return search_movies_by_similarity(query, limit)
+        return FastJSONResponse(search_movies_by_similarity(query, limit))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/search/semantic/batch")
+async def semantic_search_batch(request: SemanticBatchRequest):
+    """
+    Run several semantic searches in one call.
+    Query embeddings are generated in one batched request and all lookups share one
+    database round trip. Returns one entry per query, in request order.
+    """
+    try:
+        results = search_movies_by_similarity_batch(request.queries, request.limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return FastJSONResponse([
+        {"query": query, "results": movies} for query, movies in zip(request.queries, results)
+    ])
+
+
 @router.get("/search/reviews")
 async def search_reviews(
     query: str = Query(..., description="Search query for reviews"),
-    limit: int = Query(5, ge=1, le=20)
+    limit: int = Query(5, ge=1, le=20),
+    movie_id: Optional[List[int]] = Query(None, max_length=50, description="Only search these movies' reviews")
 ):
     """Search reviews using semantic similarity."""
     try:
-        return search_reviews_by_similarity(query, limit)
+        if movie_id:
+            return FastJSONResponse(search_reviews_for_movies(query, movie_id, limit))
+        return FastJSONResponse(search_reviews_by_similarity(query, limit))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/stats")
-async def get_movie_stats():
+async def get_movie_stats(request: Request):
     """Get basic database statistics."""
-    try:
-        return get_statistics()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    def build():
+        try:
+            return FastJSONResponse(get_statistics())
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return conditional_response(request, get_data_version(), build)
 
 
 @router.get("/stats/detailed")
-async def get_detailed_stats():
+def get_detailed_stats(request: Request):
     """
     Get comprehensive database and vector statistics.
     Includes: movie stats, review stats, vector DB coverage, genre/decade/rating distributions,
     storage info, and index information.
+    Supports If-None-Match: unchanged data returns 304 without recomputing anything.
+    Sync so a cache miss is computed in the threadpool, off the event loop.
+    """
+    def build():
+        try:
+            return FastJSONResponse(get_detailed_statistics())
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return conditional_response(request, get_data_version(), build)
+
+
+@router.post("/batch", response_model=List[MovieWithReviews])
+async def get_movies_batch(request: MovieBatchRequest):
+    """
+    Get several movies with their reviews in one call.
+    Results follow the order of `ids`; unknown ids are omitted.
     """
     try:
-        return get_detailed_statistics()
+        return FastJSONResponse(get_movies_with_reviews(request.ids))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{movie_id}", response_model=MovieWithReviews)
-async def get_movie(movie_id: int):
+async def get_movie(movie_id: int, request: Request):
     """Get a specific movie with its reviews."""
-    try:
-        movie = get_movie_with_reviews(movie_id)
+    def build():
+        try:
+            movie = get_movie_with_reviews(movie_id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
         if not movie:
             raise HTTPException(status_code=404, detail="Movie not found")
-        return movie
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return FastJSONResponse(movie)
+
+    return conditional_response(request, get_data_version(), build)
+
+
+@router.get("/{movie_id}/similar")
+async def get_movie_similar(
+    movie_id: int,
+    request: Request,
+    limit: int = Query(10, ge=1, le=config.NEIGHBORS_K, description="Number of similar movies"),
+    fields: str = Query("card", pattern=FIELDS_PATTERN, description="Projection: summary, card or full")
+):
+    """
+    Get the movies most similar to this one, best first, each with its similarity.
+    Served from the precomputed neighbor lists (scripts/compute_neighbors.py), so no
+    embedding is generated; movies without a plot embedding have no neighbors yet
+    (an empty list). Unknown movies return 404.
+    """
+    def build():
+        try:
+            movies = get_similar_movies(movie_id, limit, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        if movies is None:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        return FastJSONResponse(movies)
+
+    return conditional_response(request, get_data_version(), build)
 
 
 @router.get("/{movie_id}/reviews", response_model=List[Review])
-async def get_movie_reviews(movie_id: int):
-    """Get all reviews for a specific movie."""
-    try:
-        return get_reviews_for_movie(movie_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_movie_reviews(
+    movie_id: int,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header")
+):
+    """Get reviews for a specific movie, newest first."""
+    after = _decode_cursor_param(cursor)
+
+    def build():
+        try:
+            reviews = get_reviews_for_movie(movie_id, limit, after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return _page_response(reviews, limit, REVIEW_CURSOR_KEYS)
+
+    return conditional_response(request, get_data_version(), build)
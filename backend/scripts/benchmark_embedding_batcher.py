@@ -0,0 +1,101 @@
+"""
+Benchmark concurrent single-text embedding calls with and without micro-batching.
+Runs against the local stub provider (started in-process), so no API key or
+network access is needed.
+
+    python scripts/benchmark_embedding_batcher.py --concurrency 32 --requests 512
+"""
+
+import sys
+import os
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from config import config
+from services.embedding_batcher import EmbeddingBatcher
+from scripts.stub_embedding_server import start_server
+
+
+def run_load(embed_one, texts: list, concurrency: int) -> tuple:
+    """Call embed_one for every text from `concurrency` threads; returns (wall seconds, sorted latencies ms)."""
+    latencies = []
+
+    def call(text):
+        start = time.perf_counter()
+        embed_one(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, texts))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def report(name: str, wall: float, latencies: list, requests: int):
+    p = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+    print(f"\n{name}")
+    print(f"  throughput:    {len(latencies) / wall:8.1f} texts/s")
+    print(f"  latency p50:   {p(0.50):8.1f}ms")
+    print(f"  latency p95:   {p(0.95):8.1f}ms")
+    print(f"  API requests:  {requests:8,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark embedding micro-batching')
+    parser.add_argument('--requests', type=int, default=512, help='Texts to embed (default: 512)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent callers (default: 32)')
+    parser.add_argument('--window-ms', type=float, default=config.EMBEDDING_BATCH_WINDOW_MS,
+                        help='Batch window in ms')
+    parser.add_argument('--max-batch', type=int, default=config.EMBEDDING_BATCH_MAX_SIZE, help='Max batch size')
+    parser.add_argument('--max-in-flight', type=int, default=config.EMBEDDING_BATCH_MAX_IN_FLIGHT,
+                        help='Concurrent batches')
+    parser.add_argument('--latency-ms', type=float, default=80, help='Stub latency per request (default: 80)')
+    parser.add_argument('--port', type=int, default=9100, help='Stub port (default: 9100)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("EMBEDDING MICRO-BATCHING BENCHMARK")
+    print("=" * 60)
+    print(f"{args.requests} texts, {args.concurrency} concurrent callers, "
+          f"window {args.window_ms}ms, max batch {args.max_batch}, stub latency {args.latency_ms}ms")
+
+    server, stats = start_server(args.port, args.latency_ms)
+    client = OpenAI(api_key="stub", base_url=f"http://127.0.0.1:{args.port}/v1", max_retries=0)
+
+    def embed_single(text):
+        return client.embeddings.create(model=config.EMBEDDING_MODEL, input=text).data[0].embedding
+
+    def embed_batch(texts):
+        data = client.embeddings.create(model=config.EMBEDDING_MODEL, input=texts).data
+        return [item.embedding for item in sorted(data, key=lambda x: x.index)]
+
+    # Unbatched: one HTTP request per text
+    texts = [f"Search query: unbatched movie query {i}" for i in range(args.requests)]
+    before = stats.requests
+    wall, latencies = run_load(embed_single, texts, args.concurrency)
+    report("one request per text", wall, latencies, stats.requests - before)
+
+    # Batched through the dispatcher
+    batcher = EmbeddingBatcher(embed_batch, window_ms=args.window_ms, max_batch=args.max_batch,
+                               max_in_flight=args.max_in_flight)
+    texts = [f"Search query: batched movie query {i}" for i in range(args.requests)]
+    before = stats.requests
+    wall, latencies = run_load(batcher.embed, texts, args.concurrency)
+    report("micro-batched", wall, latencies, stats.requests - before)
+
+    metrics = batcher.metrics()
+    print(f"  avg batch:     {metrics['avg_batch_size']:8.1f} (max {metrics['max_batch_size']})")
+    print(f"  queue delay:   p50 {metrics['queue_delay_ms']['p50']}ms, p95 {metrics['queue_delay_ms']['p95']}ms")
+
+    batcher.close()
+    server.shutdown()
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark embedding writes: one UPDATE per row (own connection + commit, the old
+generate_embeddings.py path) vs bulk_update (COPY into a temp table + UPDATE ... FROM).
+Vectors are synthetic; existing embeddings are saved first and restored afterwards.
+
+    python scripts/benchmark_embedding_writes.py --rows 2000 --batch-size 500
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from utils.database import get_cursor, execute_query, bulk_update
+
+
+def row_by_row(pairs: list):
+    """Previous behaviour: a connection and transaction per row."""
+    for movie_id, embedding in pairs:
+        embedding_str = '[' + ','.join(map(str, embedding)) + ']'
+        with get_cursor() as cursor:
+            cursor.execute("UPDATE rag_movies SET plot_embedding = %s::vector WHERE id = %s",
+                           (embedding_str, movie_id))
+
+
+def bulk(pairs: list, batch_size: int):
+    """New behaviour: one COPY + UPDATE ... FROM per batch."""
+    for i in range(0, len(pairs), batch_size):
+        bulk_update('rag_movies', 'id', ['plot_embedding'], pairs[i:i + batch_size])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark embedding write paths')
+    parser.add_argument('--rows', type=int, default=2000, help='Movies to update (default: 2000)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk_update (default: 500)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("EMBEDDING WRITE BENCHMARK")
+    print("=" * 60)
+
+    saved = execute_query(
+        "SELECT id, plot_embedding::text as embedding FROM rag_movies ORDER BY id LIMIT %s", (args.rows,)
+    )
+    if not saved:
+        print("✗ No movies found")
+        return
+    ids = [row['id'] for row in saved]
+    print(f"{len(ids):,} movies, {config.EMBEDDING_DIMENSIONS} dimensions")
+
+    pairs = [(movie_id, [random.uniform(-1, 1) for _ in range(config.EMBEDDING_DIMENSIONS)]) for movie_id in ids]
+
+    try:
+        start = time.time()
+        row_by_row(pairs)
+        baseline = time.time() - start
+        print(f"\n  row-by-row:  {baseline:7.2f}s  ({len(pairs) / baseline:8,.0f} rows/sec)")
+
+        start = time.time()
+        bulk(pairs, args.batch_size)
+        fast = time.time() - start
+        print(f"  bulk_update: {fast:7.2f}s  ({len(pairs) / fast:8,.0f} rows/sec)  "
+              f"{baseline / fast:.1f}x faster")
+    finally:
+        bulk_update('rag_movies', 'id', ['plot_embedding'], [(row['id'], row['embedding']) for row in saved])
+        print("\n✓ Original embeddings restored")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark list-query projections (summary / card / full) on the largest genres.
+Reports rows, JSON payload size and query latency per projection.
+
+Run against a large catalog, e.g. after generate_massive_dataset.py:
+    python scripts/benchmark_projections.py --genres 3 --limit 100
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import execute_query
+from services.sql_search_service import get_movies_by_genre, PROJECTIONS
+
+
+def measure(genre: str, fields: str, limit, runs: int) -> dict:
+    """Time a genre listing for one projection and measure its JSON payload."""
+    timings = []
+    rows = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = get_movies_by_genre(genre, limit=limit, fields=fields)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    payload = json.dumps(rows, default=str)
+    timings.sort()
+    return {
+        'rows': len(rows),
+        'bytes': len(payload.encode()),
+        'median_ms': timings[len(timings) // 2],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark list-query projections')
+    parser.add_argument('--genres', type=int, default=3, help='Number of largest genres to test (default: 3)')
+    parser.add_argument('--limit', type=int, default=None,
+                        help='Page size (default: unlimited, i.e. the whole genre)')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per measurement (default: 5)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("PROJECTION BENCHMARK")
+    print("=" * 70)
+
+    genres = execute_query(
+        "SELECT genre, COUNT(*) as count FROM rag_movies GROUP BY genre ORDER BY count DESC LIMIT %s",
+        (args.genres,)
+    )
+
+    for g in genres:
+        print(f"\n{g['genre']} ({g['count']:,} movies, limit={args.limit or 'none'})")
+        print(f"  {'fields':<10} {'rows':>8} {'payload':>12} {'median':>10}")
+        results = {}
+        for fields in PROJECTIONS:
+            result = results[fields] = measure(g['genre'], fields, args.limit, args.runs)
+            print(f"  {fields:<10} {result['rows']:>8,} {result['bytes'] / 1024:>10.1f}KB {result['median_ms']:>8.1f}ms")
+        if results['full']['bytes']:
+            print(f"  summary payload is {results['summary']['bytes'] / results['full']['bytes'] * 100:.0f}% of full")
+
+    print("\n" + "=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark response encoding: FastAPI's validate-and-encode path vs FastJSONResponse.
+Uses synthetic rows shaped like sql_search_service results (Decimal ratings, dates),
+so no database is needed.
+
+    python scripts/benchmark_serialization.py --rows 5000
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+from datetime import date
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from routes.movies_routes import Movie, Review
+from utils.serialization import dumps, ORJSON_AVAILABLE
+
+
+def make_movies(n: int) -> list:
+    """Rows as returned by the 'full' projection."""
+    return [{
+        'id': i,
+        'title': f"Synthetic Movie {i}",
+        'year': random.randint(1942, 2024),
+        'director': "Denis Villeneuve",
+        'genre': "Sci-Fi",
+        'plot': "A lone scientist discovers a signal from deep space that rewrites everything humanity "
+                "believed about time, memory and the cost of knowing too much. " * 2,
+        'rating': Decimal(f"{random.uniform(5, 10):.1f}"),
+        'runtime_minutes': random.randint(85, 180),
+        'actors': ["Amy Adams", "Oscar Isaac", "Zendaya", "Mads Mikkelsen"],
+    } for i in range(n)]
+
+
+def make_reviews(n: int) -> list:
+    """Rows as returned by get_reviews_for_movie."""
+    return [{
+        'id': i,
+        'reviewer_name': f"Reviewer{i}",
+        'review_text': "A visual masterpiece with a script that earns every emotional beat. " * 3,
+        'rating': Decimal(f"{random.uniform(5, 10):.1f}"),
+        'review_date': date(2023, 1, 1 + i % 28),
+        'movie_title': "Synthetic Movie",
+    } for i in range(n)]
+
+
+def fastapi_path(adapter: TypeAdapter, rows: list) -> bytes:
+    """What FastAPI does for a response_model route: validate, jsonable_encoder, json.dumps."""
+    validated = adapter.validate_python(rows)
+    encoded = jsonable_encoder(validated)
+    return json.dumps(encoded, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def timed(fn, runs: int) -> float:
+    """Median wall time of fn() in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response serialization')
+    parser.add_argument('--rows', type=int, default=5000, help='Rows per response (default: 5000)')
+    parser.add_argument('--runs', type=int, default=20, help='Runs per measurement (default: 20)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SERIALIZATION BENCHMARK")
+    print("=" * 60)
+    print(f"orjson available: {ORJSON_AVAILABLE}")
+
+    cases = [
+        ("movies", make_movies(args.rows), TypeAdapter(List[Movie])),
+        ("reviews", make_reviews(args.rows), TypeAdapter(List[Review])),
+    ]
+
+    for name, rows, adapter in cases:
+        baseline = timed(lambda: fastapi_path(adapter, rows), args.runs)
+        fast = timed(lambda: dumps(rows), args.runs)
+        print(f"\n{name} ({args.rows:,} rows)")
+        print(f"  validate + stdlib json: {baseline:8.2f}ms")
+        print(f"  FastJSONResponse:       {fast:8.2f}ms  ({baseline / fast:.1f}x faster)")
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
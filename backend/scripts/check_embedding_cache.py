@@ -0,0 +1,84 @@
+"""
+Verify that single and batch query embeddings share their Redis cache entries.
+generate_embedding (cached_compute) and generate_embeddings_cached (one provider call
+for all misses) use the same embedding:{md5} keys, so each must read what the other
+wrote. Embeds fresh texts through both paths in both orders and fails on any mismatch.
+
+Needs Redis and an embeddings endpoint; the stub server is enough:
+    python scripts/stub_embedding_server.py --port 9100 &
+    OPENAI_BASE_URL=http://localhost:9100/v1 python scripts/check_embedding_cache.py
+"""
+
+import sys
+import os
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from services import redis_cache
+from services.embedding_service import generate_embedding, generate_embeddings_cached, get_embedding_cache_key
+
+
+def is_vector(value) -> bool:
+    return isinstance(value, list) and len(value) == config.EMBEDDING_DIMENSIONS \
+        and all(isinstance(x, float) for x in value)
+
+
+def check(description: str, first, second) -> bool:
+    """Embed through first, then through second, and compare the results."""
+    text = f"embedding cache check {uuid.uuid4().hex}"
+    try:
+        before = first(text)
+        after = second(text)
+    except Exception as e:
+        print(f"  ✗ {description}: {type(e).__name__}: {e}")
+        return False
+    finally:
+        redis_cache.redis_client.delete(get_embedding_cache_key(text))
+
+    if not is_vector(before) or not is_vector(after):
+        print(f"  ✗ {description}: expected {config.EMBEDDING_DIMENSIONS}-float vectors, "
+              f"got {type(before).__name__} and {type(after).__name__}")
+        return False
+    if before != after:
+        print(f"  ✗ {description}: second path returned a different vector")
+        return False
+    print(f"  ✓ {description}")
+    return True
+
+
+def main():
+    print("=" * 60)
+    print("EMBEDDING CACHE CHECK")
+    print("=" * 60)
+
+    if not redis_cache.REDIS_AVAILABLE:
+        print("✗ Redis unavailable - nothing to check")
+        sys.exit(1)
+
+    def single(text):
+        return generate_embedding(text)
+
+    def batch(text):
+        return generate_embeddings_cached([text])[0]
+
+    results = [
+        check("single, then batch", single, batch),
+        check("batch, then single", batch, single),
+        check("batch, then batch", batch, batch),
+        check("single, then single", single, single),
+    ]
+
+    print()
+    print("=" * 60)
+    if not all(results):
+        print(f"{results.count(False)} check(s) failed")
+        print("=" * 60)
+        sys.exit(1)
+    print("Single and batch embeddings share their cache entries")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Verify that the director/actor/title lookups are served by the trigram indexes.
+Runs EXPLAIN on each lookup and fails if the planner falls back to a seq scan.
+
+Index use only shows up on realistically sized tables, so load 100k+ rows first:
+    python scripts/generate_massive_dataset.py --target 100000
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import get_cursor
+
+MIN_ROWS = 100000
+
+# (description, SQL, params, expected index) - mirrors sql_search_service lookups
+LOOKUPS = [
+    # rag_people itself holds only distinct names; the credits join is what scales with the catalog
+    ("actor credits",
+     "SELECT movie_id FROM rag_movie_people WHERE role = 'actor' AND person_id = ANY(%s)",
+     ([1, 2, 3],), 'idx_rag_movie_people_role_person'),
+    ("director credits",
+     "SELECT movie_id FROM rag_movie_people WHERE role = 'director' AND person_id = ANY(%s)",
+     ([1, 2, 3],), 'idx_rag_movie_people_role_person'),
+    ("title substring",
+     "SELECT id FROM rag_movies WHERE LOWER(title) LIKE LOWER(%s)",
+     ('%godfather%',), 'idx_rag_movies_title_trgm'),
+    ("title fuzzy",
+     "SELECT id FROM rag_movies WHERE LOWER(title) %% LOWER(%s)",
+     ('the godfater',), 'idx_rag_movies_title_trgm'),
+]
+
+
+def collect_index_names(plan: dict) -> set:
+    """Collect every index referenced anywhere in an EXPLAIN JSON plan tree."""
+    names = set()
+    if 'Index Name' in plan:
+        names.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        names |= collect_index_names(child)
+    return names
+
+
+def main():
+    print("=" * 60)
+    print("LOOKUP INDEX CHECK")
+    print("=" * 60)
+
+    failures = 0
+
+    with get_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) as count FROM rag_movies")
+        total = cursor.fetchone()['count']
+        print(f"\nRows in rag_movies: {total:,}")
+        if total < MIN_ROWS:
+            print(f"⚠ Fewer than {MIN_ROWS:,} rows - the planner may prefer seq scans on a table this small")
+
+        cursor.execute("ANALYZE rag_movies")
+        cursor.execute("ANALYZE rag_people")
+        cursor.execute("ANALYZE rag_movie_people")
+
+        for description, sql, params, expected_index in LOOKUPS:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()['QUERY PLAN'][0]['Plan']
+            used = collect_index_names(plan)
+
+            if expected_index in used:
+                print(f"  ✓ {description}: {expected_index}")
+            else:
+                failures += 1
+                print(f"  ✗ {description}: expected {expected_index}, plan used {sorted(used) or plan['Node Type']}")
+
+    print()
+    print("=" * 60)
+    if failures:
+        print(f"{failures} lookup(s) not using their trigram index")
+        print("=" * 60)
+        sys.exit(1)
+    print("All lookups use their trigram indexes")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
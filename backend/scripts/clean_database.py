@@ -9,6 +9,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.database import get_cursor
+from services.sql_search_service import publish_data_change
 
 def main():
     print("=" * 70)
@@ -58,6 +59,8 @@ def main():
         cursor.execute("VACUUM ANALYZE rag_reviews")
         print("  ✓ Vacuumed tables")
 
+    publish_data_change()
+
     print("\n" + "=" * 70)
     print("DATABASE CLEANED SUCCESSFULLY")
     print("=" * 70)
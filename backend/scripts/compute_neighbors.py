@@ -0,0 +1,54 @@
+"""
+Script to precompute each movie's most similar movies ("more like this").
+Reads the stored plot embeddings (no API calls), computes exact top-k neighbors with
+blocked matrix products, and streams them into rag_movie_neighbors. By default only
+lists that may have changed since the last run are recomputed.
+
+    python scripts/compute_neighbors.py                 # incremental
+    python scripts/compute_neighbors.py --full --k 20
+"""
+
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from services.neighbor_service import refresh_neighbors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute similar movies from plot embeddings')
+    parser.add_argument('--full', action='store_true', help='Recompute every list (e.g. after changing --k)')
+    parser.add_argument('--k', type=int, default=config.NEIGHBORS_K,
+                        help=f'Neighbors per movie (default: {config.NEIGHBORS_K})')
+    parser.add_argument('--block-size', type=int, default=1024,
+                        help='Movies per matrix block and write transaction (default: 1024)')
+    parser.add_argument('--corpus-block', type=int, default=20000,
+                        help='Corpus movies per matrix block (default: 20000)')
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("MOVIE NEIGHBORS")
+    print("=" * 50)
+
+    def progress(done: int, total: int):
+        print(f"  {done:,}/{total:,} lists")
+
+    summary = refresh_neighbors(args.k, full=args.full, block_size=args.block_size,
+                                corpus_block=args.corpus_block, progress=progress)
+
+    print(f"\n✓ {summary['lists_recomputed']:,} of {summary['movies']:,} lists recomputed "
+          f"(k={summary['k']}) in {summary['seconds']:.1f}s "
+          f"(embeddings loaded in {summary['load_seconds']:.1f}s, {summary['lists_per_sec']:,.1f} lists/s)")
+    if summary['lists_removed']:
+        print(f"✓ {summary['lists_removed']:,} lists of movies without embeddings removed")
+
+    print("\n" + "=" * 50)
+    print("DONE")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,26 @@
 """
 Fetch real movie data from TMDB API and update database.
-Conservative approach: 500 movies, 10 requests/second (TMDB allows ~40/sec).
-Estimated time: ~1.5-2 minutes for 500 movies.
+Details are fetched concurrently under a shared rate limit (TMDB allows ~40/sec),
+raw responses are cached on disk so re-runs are free, and movies are upserted in
+batches by external_id, so running the import again updates rows in place.
+
+    python scripts/fetch_real_movies_tmdb.py                      # the popular list below
+    python scripts/fetch_real_movies_tmdb.py --pages 1-25         # most-voted discover pages
+    TMDB_BASE_URL=http://127.0.0.1:9200/3 python scripts/fetch_real_movies_tmdb.py --pages 1-50  # fixture server
 """
 
 import sys
 import os
 import time
-import requests
-from typing import Optional, Dict, List
+import argparse
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.database import get_cursor
+from services.ingestion_service import upsert_movies
+from services.sql_search_service import publish_data_change
+from services.tmdb_service import TMDBClient, parse_movie, page_range, DEFAULT_CACHE_DIR
 from config import config
 
-# TMDB API Configuration
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-# TMDB allows ~40 req/sec, we use 10 req/sec to be respectful
-REQUESTS_PER_SECOND = 10  # Conservative rate (TMDB allows ~40/sec)
-DELAY_BETWEEN_REQUESTS = 1.0 / REQUESTS_PER_SECOND
-
 # Popular movie IDs to start with (these are guaranteed to exist and have good data)
 POPULAR_MOVIE_IDS = [
     238,    # The Godfather
@@ -56,118 +56,20 @@ POPULAR_MOVIE_IDS = [
     12445,  # Harry Potter and the Deathly Hallows: Part 2
 ]
 
-def fetch_movie_details(movie_id: int) -> Optional[Dict]:
-    """
-    Fetch detailed movie information from TMDB.
-
-    Args:
-        movie_id: TMDB movie ID
-
-    Returns:
-        Dict with movie data or None if failed
-    """
-    url = f"{TMDB_BASE_URL}/movie/{movie_id}"
-    params = {
-        'api_key': config.TMDB_API_KEY,
-        'append_to_response': 'credits'  # Include cast/crew in same request
-    }
-
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        # Extract cast (limit to top 6 actors)
-        cast = data.get('credits', {}).get('cast', [])
-        actors = [actor['name'] for actor in cast[:6]]
-
-        # Extract genres
-        genres = [g['name'] for g in data.get('genres', [])]
-        genre = genres[0] if genres else 'Drama'
-
-        # Extract director
-        crew = data.get('credits', {}).get('crew', [])
-        directors = [person['name'] for person in crew if person['job'] == 'Director']
-        director = directors[0] if directors else 'Unknown'
-
-        return {
-            'title': data.get('title', 'Unknown'),
-            'year': int(data.get('release_date', '2000-01-01')[:4]) if data.get('release_date') else 2000,
-            'director': director,
-            'genre': genre,
-            'plot': data.get('overview', 'No plot available.'),
-            'rating': round(data.get('vote_average', 7.0), 1),
-            'runtime_minutes': data.get('runtime', 120),
-            'actors': actors
-        }
-
-    except requests.exceptions.RequestException as e:
-        print(f"  ✗ Error fetching movie {movie_id}: {e}")
-        return None
-    except (KeyError, ValueError, IndexError) as e:
-        print(f"  ✗ Error parsing movie {movie_id}: {e}")
-        return None
-
-def discover_popular_movies(page: int = 1) -> List[int]:
-    """
-    Discover popular movies using TMDB's discover endpoint.
-
-    Args:
-        page: Page number (1-500)
-
-    Returns:
-        List of movie IDs
-    """
-    url = f"{TMDB_BASE_URL}/discover/movie"
-    params = {
-        'api_key': config.TMDB_API_KEY,
-        'sort_by': 'vote_count.desc',  # Most voted movies (quality indicator)
-        'vote_count.gte': 1000,  # At least 1000 votes
-        'page': page
-    }
-
-    try:
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        return [movie['id'] for movie in data.get('results', [])]
-
-    except requests.exceptions.RequestException as e:
-        print(f"  ✗ Error discovering movies (page {page}): {e}")
-        return []
-
-def insert_movie(cursor, movie: Dict) -> bool:
-    """
-    Insert or update a movie in the database.
-
-    Args:
-        cursor: Database cursor
-        movie: Movie data dict
-
-    Returns:
-        True if successful
-    """
-    try:
-        cursor.execute("""
-            INSERT INTO rag_movies (title, year, director, genre, plot, rating, runtime_minutes, actors)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            movie['title'],
-            movie['year'],
-            movie['director'],
-            movie['genre'],
-            movie['plot'],
-            movie['rating'],
-            movie['runtime_minutes'],
-            movie['actors']
-        ))
-        return True
-    except Exception as e:
-        print(f"  ✗ Error inserting movie '{movie['title']}': {e}")
-        return False
-
 def main():
+    parser = argparse.ArgumentParser(description='Import movies from TMDB')
+    parser.add_argument('--pages', help="Discover pages to import, e.g. '1-25' (default: popular list)")
+    parser.add_argument('--limit', type=int, help='Import at most this many movies')
+    parser.add_argument('--concurrency', type=int, default=config.TMDB_CONCURRENCY,
+                        help='Parallel requests')
+    parser.add_argument('--rps', type=float, default=config.TMDB_REQUESTS_PER_SECOND,
+                        help='Requests per second shared by all threads')
+    parser.add_argument('--batch-size', type=int, default=200, help='Movies per upsert batch (default: 200)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Raw response cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the response cache')
+    parser.add_argument('--refresh', action='store_true', help='Refetch cached responses')
+    args = parser.parse_args()
+
     print("=" * 70)
     print("FETCH REAL MOVIES FROM TMDB")
     print("=" * 70)
@@ -179,72 +81,76 @@ def main():
         print("  2. Add to .env: TMDB_API_KEY=your_key_here")
         return
 
-    print(f"\n✓ TMDB API Key: {config.TMDB_API_KEY[:10]}...")
-    print(f"✓ Rate limit: {REQUESTS_PER_SECOND} requests/second (TMDB allows ~40/sec)")
-    print(f"✓ Target: 10 movies (TEST MODE)")
-    print(f"✓ Estimated time: ~10 seconds")
+    client = TMDBClient(requests_per_second=args.rps, concurrency=args.concurrency,
+                        cache_dir=None if args.no_cache else args.cache_dir, refresh=args.refresh)
+    print(f"\n✓ TMDB API: {client.base_url}")
+    print(f"✓ Rate limit: {args.rps:g} requests/second, {client.concurrency} concurrent")
+    print(f"✓ Response cache: {'disabled' if args.no_cache else args.cache_dir}")
 
     # Gather movie IDs
     print("\n" + "-" * 70)
     print("GATHERING MOVIE IDS")
     print("-" * 70)
 
-    movie_ids = []
+    if args.pages:
+        movie_ids = client.discover_pages(page_range(args.pages))
+        print(f"✓ {len(movie_ids)} movie IDs from discover pages {args.pages}")
+    else:
+        movie_ids = list(POPULAR_MOVIE_IDS)
+        print(f"✓ {len(movie_ids)} popular movie IDs")
+    if args.limit:
+        movie_ids = movie_ids[:args.limit]
 
-    # Add just 10 popular movie IDs for testing
-    movie_ids.extend(POPULAR_MOVIE_IDS[:10])
-    print(f"✓ Added {len(movie_ids)} popular movie IDs (test mode)")
-
-    # Limit to 10 for testing
-    movie_ids = movie_ids[:10]
-
-    print(f"\n✓ Total movie IDs gathered: {len(movie_ids)}")
-
-    # Fetch and insert movies
+    # Fetch and upsert movies
     print("\n" + "-" * 70)
     print("FETCHING MOVIE DATA")
     print("-" * 70)
 
-    successful = 0
+    fetched = 0
     failed = 0
-    skipped = 0
+    changed = 0
+    batch = []
     start_time = time.time()
 
-    with get_cursor() as cursor:
-        for i, movie_id in enumerate(movie_ids, 1):
-            # Fetch details
-            movie = fetch_movie_details(movie_id)
-
-            if movie:
-                # Insert to database
-                if insert_movie(cursor, movie):
-                    successful += 1
-                    print(f"  [{i}/{len(movie_ids)}] ✓ {movie['title']} ({movie['year']}) - {len(movie['actors'])} actors")
-                else:
-                    failed += 1
-            else:
-                failed += 1
-
-            # Rate limiting
-            time.sleep(DELAY_BETWEEN_REQUESTS)
-
-            # Progress update every 50 movies
-            if i % 50 == 0:
-                elapsed = time.time() - start_time
-                rate = i / elapsed
-                remaining = (len(movie_ids) - i) / rate if rate > 0 else 0
-                print(f"\n  Progress: {i}/{len(movie_ids)} ({i/len(movie_ids)*100:.1f}%) - {rate:.1f} movies/sec - ~{remaining:.0f}s remaining\n")
+    def flush():
+        nonlocal batch, changed
+        if batch:
+            changed += len(upsert_movies(batch))
+            batch = []
+
+    for i, (movie_id, data) in enumerate(client.fetch_movies(movie_ids), 1):
+        movie = parse_movie(data) if data else None
+        if movie:
+            fetched += 1
+            batch.append(movie)
+        else:
+            failed += 1
+        if len(batch) >= args.batch_size:
+            flush()
+
+        # Progress update every 100 movies
+        if i % 100 == 0:
+            elapsed = time.time() - start_time
+            rate = i / elapsed
+            remaining = (len(movie_ids) - i) / rate if rate > 0 else 0
+            print(f"  Progress: {i}/{len(movie_ids)} ({i/len(movie_ids)*100:.1f}%) - {rate:.1f} movies/sec - ~{remaining:.0f}s remaining")
+    flush()
+    client.close()
 
     total_time = time.time() - start_time
 
+    if changed:
+        publish_data_change()
+
+    stats = client.stats()
     print("\n" + "=" * 70)
     print("COMPLETE")
     print("=" * 70)
-    print(f"✓ Successful: {successful}")
+    print(f"✓ Fetched: {fetched} ({stats['requests']} API requests, {stats['cache_hits']} from cache)")
+    print(f"✓ Inserted or changed: {changed} (unchanged: {fetched - changed})")
     print(f"✗ Failed: {failed}")
-    print(f"⊘ Skipped: {skipped}")
     print(f"⏱ Total time: {total_time:.1f}s ({total_time/60:.1f} minutes)")
-    print(f"⚡ Average rate: {successful/total_time:.2f} movies/sec")
+    print(f"⚡ Average rate: {fetched/total_time:.2f} movies/sec")
 
 if __name__ == "__main__":
     main()
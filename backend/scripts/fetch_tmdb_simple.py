@@ -1,23 +1,23 @@
 """
-Simple TMDB fetcher that outputs SQL INSERT statements.
+Simple TMDB fetcher that outputs SQL upsert statements.
 Run this locally, then pipe the output to psql on the VM.
+Uses the shared TMDB client (concurrent, rate-limited, cached); the API key comes
+from TMDB_API_KEY in the environment.
+
+    python scripts/fetch_tmdb_simple.py --pages 26-500 > movies.sql
 """
 
-import time
-import requests
 import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-TMDB_API_KEY = "1ada2b99896a96c972ac8cfef1e28e3a"
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-REQUESTS_PER_SECOND = 10
-DELAY = 1.0 / REQUESTS_PER_SECOND
+from config import config
+from services.tmdb_service import TMDBClient, parse_movie, page_range, DEFAULT_CACHE_DIR
+
+COLUMNS = ('external_id', 'title', 'year', 'director', 'genre', 'plot', 'rating', 'runtime_minutes', 'actors')
 
-# Popular movie IDs
-MOVIE_IDS = [
-    238, 278, 240, 424, 19404, 389, 129, 155, 497, 13,
-    680, 122, 120, 121, 637, 496243, 769, 550, 27205, 372058,
-    372754, 299536, 299534, 603, 671, 672, 673, 674, 675, 767, 12445
-]
 
 def escape_sql(s):
     """Escape single quotes for SQL."""
@@ -25,86 +25,59 @@ def escape_sql(s):
         return ''
     return str(s).replace("'", "''")
 
-def fetch_movie(movie_id):
-    """Fetch movie from TMDB."""
-    url = f"{TMDB_BASE_URL}/movie/{movie_id}"
-    params = {'api_key': TMDB_API_KEY, 'append_to_response': 'credits'}
-
-    try:
-        r = requests.get(url, params=params, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-
-        # Extract data
-        title = escape_sql(data.get('title', ''))
-        year = int(data.get('release_date', '2000')[:4]) if data.get('release_date') else 2000
-
-        # Director
-        crew = data.get('credits', {}).get('crew', [])
-        directors = [p['name'] for p in crew if p['job'] == 'Director']
-        director = escape_sql(directors[0] if directors else 'Unknown')
-
-        # Genre
-        genres = data.get('genres', [])
-        genre = escape_sql(genres[0]['name'] if genres else 'Drama')
-
-        # Plot
-        plot = escape_sql(data.get('overview', 'No plot available.'))
-
-        # Rating & runtime
-        rating = round(data.get('vote_average', 7.0), 1)
-        runtime = data.get('runtime', 120)
-
-        # Actors (top 6)
-        cast = data.get('credits', {}).get('cast', [])
-        # Escape quotes for array literals: double quotes need to be doubled inside array
-        actors = [a['name'].replace('"', '""') for a in cast[:6]]
-        # Single quotes in actors are fine inside double-quoted array elements
-        actors_array = '{' + ','.join(f'"{a}"' for a in actors) + '}'
-
-        # Generate SQL
-        sql = f"INSERT INTO rag_movies (title, year, director, genre, plot, rating, runtime_minutes, actors) VALUES ('{title}', {year}, '{director}', '{genre}', '{plot}', {rating}, {runtime}, '{actors_array}');"
-
-        return sql
-
-    except Exception as e:
-        print(f"-- Error fetching {movie_id}: {e}", file=sys.stderr)
-        return None
-
-print("-- TMDB Movie Data", file=sys.stderr)
-print("-- Fetching 9,500 more movies (total will be 10,000)...", file=sys.stderr)
-print("BEGIN;")
-
-# Fetch from discover API
-# We already have 510 movies, so fetch 9,500 more to reach 10,000 total
-# Start from page 26 (we already fetched pages 1-25)
-for page in range(26, 501):  # Pages 26-500 = 475 pages × 20 = 9,500 movies
-    url = f"{TMDB_BASE_URL}/discover/movie"
-    params = {
-        'api_key': TMDB_API_KEY,
-        'sort_by': 'vote_count.desc',
-        'vote_count.gte': 1000,
-        'page': page
-    }
-
-    try:
-        r = requests.get(url, params=params, timeout=10)
-        r.raise_for_status()
-        results = r.json().get('results', [])
-
-        for movie in results:
-            movie_id = movie['id']
-            sql = fetch_movie(movie_id)
-            if sql:
-                print(sql)
-            time.sleep(DELAY)
-
-        print(f"-- Page {page} complete ({len(results)} movies)", file=sys.stderr)
-
-    except Exception as e:
-        print(f"-- Error on page {page}: {e}", file=sys.stderr)
-
-    time.sleep(DELAY)
-
-print("COMMIT;")
-print("-- Done!", file=sys.stderr)
+
+def movie_sql(movie: dict) -> str:
+    """
+    INSERT ... ON CONFLICT statement for one parsed movie. Like ingestion_service.upsert_movies
+    it leaves unchanged rows untouched, and records inserted or changed ids in changed_movies.
+    """
+    # Array elements are double-quoted; escape backslashes and double quotes inside them
+    actors = [a.replace('\\', '\\\\').replace('"', '\\"') for a in movie['actors']]
+    actors_array = '{' + ','.join(f'"{a}"' for a in actors) + '}'
+    values = (
+        f"'{escape_sql(movie['external_id'])}', '{escape_sql(movie['title'])}', {movie['year']}, "
+        f"'{escape_sql(movie['director'])}', '{escape_sql(movie['genre'])}', '{escape_sql(movie['plot'])}', "
+        f"{movie['rating']}, {movie['runtime_minutes']}, '{escape_sql(actors_array)}'"
+    )
+    updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in COLUMNS[1:])
+    changed = ' OR '.join(f"m.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in COLUMNS[1:])
+    return (f"WITH upserted AS (INSERT INTO rag_movies AS m ({', '.join(COLUMNS)}) VALUES ({values}) "
+            f"ON CONFLICT (external_id) DO UPDATE SET {updates} WHERE {changed} RETURNING m.id) "
+            f"INSERT INTO changed_movies SELECT id FROM upserted;")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print SQL upserts for TMDB movies')
+    parser.add_argument('--pages', default='26-500', help="Discover pages, e.g. '26-500' (default)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Raw response cache directory')
+    args = parser.parse_args()
+
+    if not config.TMDB_API_KEY:
+        print("-- ERROR: TMDB_API_KEY not set", file=sys.stderr)
+        sys.exit(1)
+
+    client = TMDBClient(cache_dir=args.cache_dir)
+    print(f"-- TMDB Movie Data (discover pages {args.pages})", file=sys.stderr)
+    movie_ids = client.discover_pages(page_range(args.pages))
+    print(f"-- Fetching {len(movie_ids)} movies...", file=sys.stderr)
+    print("BEGIN;")
+    print("CREATE TEMP TABLE changed_movies (id INTEGER) ON COMMIT DROP;")
+
+    written = 0
+    for _, data in client.fetch_movies(movie_ids):
+        movie = parse_movie(data) if data else None
+        if movie:
+            print(movie_sql(movie))
+            written += 1
+            if written % 500 == 0:
+                print(f"-- {written} movies written", file=sys.stderr)
+
+    # Relink new and changed movies in the normalized people tables (casts and directors may have changed)
+    print("SELECT rag_sync_movie_people(ARRAY(SELECT id FROM changed_movies));")
+    print("COMMIT;")
+    client.close()
+    print(f"-- Done! {written} movies ({client.stats()})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
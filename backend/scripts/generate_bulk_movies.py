@@ -1,15 +1,22 @@
 """
 Generate 1000+ movies for the RAG database.
 Uses a combination of real movie data patterns and procedural generation.
+Movies are generated in a process pool and loaded with COPY.
+
+    python scripts/generate_bulk_movies.py --target 5000
 """
 
 import sys
 import os
 import random
+import argparse
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.database import execute_query, get_cursor
+from utils.database import execute_query, copy_row
+from utils.bulk_load import parallel_copy
+from services.people_service import sync_unlinked_movies
+from services.sql_search_service import publish_data_change
 
 # Movie data templates for generation
 DIRECTORS = [
@@ -389,28 +396,35 @@ def generate_movie() -> dict:
         "runtime_minutes": runtime
     }
 
-def insert_movies(movies: list):
-    """Insert movies into database."""
-    sql = """
-        INSERT INTO rag_movies (title, year, director, genre, plot, rating, runtime_minutes)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT DO NOTHING
-    """
-
-    with get_cursor() as cursor:
-        for movie in movies:
-            cursor.execute(sql, (
-                movie["title"],
-                movie["year"],
-                movie["director"],
-                movie["genre"],
-                movie["plot"],
-                movie["rating"],
-                movie["runtime_minutes"]
-            ))
+MOVIE_COLUMNS = ('title', 'year', 'director', 'genre', 'plot', 'rating', 'runtime_minutes')
+
+
+def movie_copy_chunk(count: int, seed: int) -> str:
+    """Generate `count` movies as COPY text (runs in a worker process)."""
+    lines = []
+    for _ in range(count):
+        movie = generate_movie()
+        lines.append(copy_row([movie[column] for column in MOVIE_COLUMNS]))
+    return ''.join(lines)
+
+
+def insert_movies(count: int, chunk_size: int = 10000, workers: int = None) -> int:
+    """Generate `count` movies and COPY them into the database."""
+    inserted = parallel_copy('rag_movies', MOVIE_COLUMNS, movie_copy_chunk, count,
+                             chunk_size=chunk_size, workers=workers)
+
+    # Link new movies to the normalized people tables
+    sync_unlinked_movies()
+    return inserted
 
 def main():
-    """Generate and insert 1000 movies."""
+    """Generate and insert movies up to the target count."""
+    parser = argparse.ArgumentParser(description='Generate procedural movies')
+    parser.add_argument('--target', type=int, default=1000, help='Target number of total movies (default: 1000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Generator processes (default: CPU count)')
+    args = parser.parse_args()
+
     print("=" * 50)
     print("BULK MOVIE GENERATION")
     print("=" * 50)
@@ -420,24 +434,16 @@ def main():
     current_count = result[0]['count'] if result else 0
     print(f"\nCurrent movie count: {current_count}")
 
-    target = 1000
-    to_generate = max(0, target - current_count)
+    to_generate = max(0, args.target - current_count)
 
     if to_generate == 0:
         print(f"Already have {current_count} movies. No generation needed.")
         return
 
-    print(f"Generating {to_generate} new movies...")
-
-    movies = []
-    for i in range(to_generate):
-        movie = generate_movie()
-        movies.append(movie)
-        if (i + 1) % 100 == 0:
-            print(f"  Generated {i + 1}/{to_generate} movies...")
+    print(f"Generating and inserting {to_generate} new movies...")
+    insert_movies(to_generate, workers=args.workers)
 
-    print(f"\nInserting {len(movies)} movies into database...")
-    insert_movies(movies)
+    publish_data_change()
 
     # Verify
     result = execute_query("SELECT COUNT(*) as count FROM rag_movies")
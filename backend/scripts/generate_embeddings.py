@@ -1,127 +1,74 @@
 """
 Script to generate embeddings for all movies and reviews.
 Run this after inserting mock data to enable vector search.
+
+Pending rows are streamed through a pipeline (reader -> N rate-limited embedding
+workers -> bulk writer) and progress is checkpointed, so an interrupted run resumes.
+Rows are pending when unembedded or when their text or the embedding model changed;
+identical texts are embedded once and copied to every row that shares them.
+
+    python scripts/generate_embeddings.py --workers 8 --rpm 3000 --tpm 1000000
+    OPENAI_BASE_URL=http://localhost:9100/v1 python scripts/generate_embeddings.py  # local stub
+
+Distributed mode: start the same command with --worker on any number of machines.
+Each worker leases disjoint batches; leases of crashed workers expire and are reclaimed.
+
+    python scripts/generate_embeddings.py --worker            # name: <hostname>:<pid>
+    python scripts/generate_embeddings.py --worker node-2 --lease-seconds 300
 """
 
 import sys
-import time
 import os
+import socket
+import argparse
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import config
-from utils.database import get_cursor, execute_query
-from services.embedding_service import generate_embeddings_batch
-
-
-def get_movies_without_embeddings():
-    """Fetch movies that don't have embeddings yet."""
-    sql = """
-        SELECT id, title, plot
-        FROM rag_movies
-        WHERE plot_embedding IS NULL
-        ORDER BY id
-    """
-    return execute_query(sql)
-
-
-def get_reviews_without_embeddings():
-    """Fetch reviews that don't have embeddings yet."""
-    sql = """
-        SELECT id, review_text
-        FROM rag_reviews
-        WHERE review_embedding IS NULL
-        ORDER BY id
-    """
-    return execute_query(sql)
-
-
-def update_movie_embedding(movie_id: int, embedding: list):
-    """Update a movie's embedding."""
-    embedding_str = '[' + ','.join(map(str, embedding)) + ']'
-    sql = "UPDATE rag_movies SET plot_embedding = %s::vector WHERE id = %s"
-
-    with get_cursor() as cursor:
-        cursor.execute(sql, (embedding_str, movie_id))
-
-
-def update_review_embedding(review_id: int, embedding: list):
-    """Update a review's embedding."""
-    embedding_str = '[' + ','.join(map(str, embedding)) + ']'
-    sql = "UPDATE rag_reviews SET review_embedding = %s::vector WHERE id = %s"
-
-    with get_cursor() as cursor:
-        cursor.execute(sql, (embedding_str, review_id))
-
+from services.embedding_backfill import EmbeddingBackfill
+from services.index_maintenance import maintain_vector_indexes
+from services.sql_search_service import publish_data_change
 
-def process_movies_batch(movies: list, batch_size: int = 10):
-    """Process movies in batches to avoid rate limits."""
-    total = len(movies)
-    processed = 0
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.embedding_checkpoint.json')
 
-    for i in range(0, total, batch_size):
-        batch = movies[i:i + batch_size]
 
-        # Prepare texts for embedding
-        texts = [f"Movie: {m['title']}. Plot: {m['plot']}" for m in batch]
-
-        try:
-            # Generate embeddings for batch
-            embeddings = generate_embeddings_batch(texts)
-
-            # Update each movie
-            for j, movie in enumerate(batch):
-                update_movie_embedding(movie['id'], embeddings[j])
-                processed += 1
-                print(f"  [{processed}/{total}] Embedded: {movie['title']}")
-
-            # Rate limit protection
-            if i + batch_size < total:
-                time.sleep(0.5)
-
-        except Exception as e:
-            print(f"Error processing batch starting at {i}: {e}")
-            # Try one by one on error
-            for movie in batch:
-                try:
-                    text = f"Movie: {movie['title']}. Plot: {movie['plot']}"
-                    embedding = generate_embeddings_batch([text])[0]
-                    update_movie_embedding(movie['id'], embedding)
-                    processed += 1
-                    print(f"  [{processed}/{total}] Embedded (retry): {movie['title']}")
-                    time.sleep(0.2)
-                except Exception as e2:
-                    print(f"  Failed to embed {movie['title']}: {e2}")
-
-
-def process_reviews_batch(reviews: list, batch_size: int = 10):
-    """Process reviews in batches."""
-    total = len(reviews)
-    processed = 0
-
-    for i in range(0, total, batch_size):
-        batch = reviews[i:i + batch_size]
-
-        texts = [r['review_text'] for r in batch]
-
-        try:
-            embeddings = generate_embeddings_batch(texts)
-
-            for j, review in enumerate(batch):
-                update_review_embedding(review['id'], embeddings[j])
-                processed += 1
-                print(f"  [{processed}/{total}] Embedded review ID: {review['id']}")
-
-            if i + batch_size < total:
-                time.sleep(0.5)
-
-        except Exception as e:
-            print(f"Error processing reviews batch: {e}")
+def print_summary(summary: dict):
+    """Print the result of one backfill."""
+    filled = summary['embedded'] + summary['reused']
+    print(f"  ✓ {filled:,}/{summary['pending']:,} {summary['kind']} embedded "
+          f"in {summary['seconds']:.1f}s ({summary['rows_per_sec']:,.1f} rows/s)")
+    print(f"    API calls: {summary['api_calls']:,}  retries: {summary['retries']}  "
+          f"~tokens: {summary['tokens']:,}")
+    if filled:
+        print(f"    Distinct texts sent: {summary['texts_sent']:,}  "
+              f"copied from identical texts: {summary['reused']:,}  "
+              f"~API calls saved: {summary['api_calls_saved']:,}")
+    if summary['failed']:
+        print(f"  ✗ {summary['failed']:,} rows failed; rerun to retry them")
 
 
 def main():
     """Main function to generate all embeddings."""
+    parser = argparse.ArgumentParser(description='Generate embeddings for movies and reviews')
+    parser.add_argument('--kind', choices=['all', 'movies', 'reviews'], default='all', help='What to embed')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent embedding requests (default: 4)')
+    parser.add_argument('--batch-texts', type=int, default=256, help='Max texts per API call (default: 256)')
+    parser.add_argument('--batch-tokens', type=int, default=60000,
+                        help='Max estimated tokens per API call (default: 60000)')
+    parser.add_argument('--rpm', type=int, default=config.EMBEDDING_RPM, help='Requests per minute limit')
+    parser.add_argument('--tpm', type=int, default=config.EMBEDDING_TPM, help='Tokens per minute limit')
+    parser.add_argument('--write-batch', type=int, default=1000, help='Rows per bulk write (default: 1000)')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='Checkpoint file')
+    parser.add_argument('--reset-checkpoint', action='store_true', help='Ignore and clear the checkpoint')
+    parser.add_argument('--worker', nargs='?', const='', default=None, metavar='NAME',
+                        help='Distributed mode: lease work with this worker name (default: hostname:pid)')
+    parser.add_argument('--lease-seconds', type=int, default=600,
+                        help='Lease duration in distributed mode (default: 600)')
+    parser.add_argument('--skip-index-maintenance', action='store_true',
+                        help='Do not rebuild/pre-warm vector indexes afterwards')
+    args = parser.parse_args()
+
     print("=" * 50)
     print("EMBEDDING GENERATION SCRIPT")
     print("=" * 50)
@@ -130,25 +77,43 @@ def main():
         print("ERROR: OPENAI_API_KEY not found in environment")
         return
 
-    # Process movies
-    print("\n[1/2] Processing Movies...")
-    movies = get_movies_without_embeddings()
-
-    if movies:
-        print(f"Found {len(movies)} movies without embeddings")
-        process_movies_batch(movies)
-    else:
-        print("All movies already have embeddings")
-
-    # Process reviews
-    print("\n[2/2] Processing Reviews...")
-    reviews = get_reviews_without_embeddings()
-
-    if reviews:
-        print(f"Found {len(reviews)} reviews without embeddings")
-        process_reviews_batch(reviews)
-    else:
-        print("All reviews already have embeddings")
+    worker_id = None
+    if args.worker is not None:
+        worker_id = args.worker or f"{socket.gethostname()}:{os.getpid()}"
+        print(f"Worker mode: {worker_id} (lease {args.lease_seconds}s)")
+    elif args.reset_checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    kinds = ['movies', 'reviews'] if args.kind == 'all' else [args.kind]
+    for step, kind in enumerate(kinds, 1):
+        print(f"\n[{step}/{len(kinds)}] Processing {kind.capitalize()}...")
+        backfill = EmbeddingBackfill(
+            kind,
+            workers=args.workers,
+            batch_texts=args.batch_texts,
+            batch_tokens=args.batch_tokens,
+            rpm=args.rpm,
+            tpm=args.tpm,
+            write_batch=args.write_batch,
+            checkpoint_path=args.checkpoint,
+            worker_id=worker_id,
+            lease_seconds=args.lease_seconds
+        )
+        print_summary(backfill.run())
+
+    # Every pending row was attempted; later runs start from the beginning again
+    if worker_id is None and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    # IVFFlat centroids are trained at build time; retrain them if the data outgrew them
+    # (left to a single run in distributed mode)
+    if worker_id is None and not args.skip_index_maintenance:
+        print("\nVector indexes...")
+        for report in maintain_vector_indexes(kinds):
+            action = f"rebuilt with lists={report['rebuild']['lists']}" if 'rebuild' in report else "fit the data"
+            print(f"  ✓ {report['index']}: {action}")
+
+    publish_data_change()
 
     print("\n" + "=" * 50)
     print("EMBEDDING GENERATION COMPLETE")
@@ -1,6 +1,9 @@
 """
 Generate a massive movie dataset (50,000+ movies) for RAG testing.
-Optimized for batch processing and parallel embedding generation.
+Movies are generated in a process pool and streamed into rag_movies with COPY,
+one chunk (and commit) at a time, so 1M+ rows load in minutes with bounded memory.
+
+    python scripts/generate_massive_dataset.py --target 1000000 --drop-indexes --no-triggers
 """
 
 import sys
@@ -8,12 +11,13 @@ import os
 import random
 import time
 import argparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.database import execute_query, get_cursor
-from config import config
+from utils.database import execute_query, copy_row, text_array
+from utils.bulk_load import parallel_copy
+from services.people_service import sync_unlinked_movies
+from services.sql_search_service import publish_data_change, rebuild_catalog_counters
 
 # Expanded data for more variety
 DIRECTORS = [
@@ -311,42 +315,53 @@ def generate_movie() -> dict:
         "actors": actors
     }
 
-def batch_insert_movies(movies: list, batch_size: int = 500):
-    """Insert movies in large batches for efficiency."""
-    sql = """
-        INSERT INTO rag_movies (title, year, director, genre, plot, rating, runtime_minutes, actors)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT DO NOTHING
-    """
-
-    total = len(movies)
-    inserted = 0
-
-    with get_cursor() as cursor:
-        for i in range(0, total, batch_size):
-            batch = movies[i:i + batch_size]
-            for movie in batch:
-                cursor.execute(sql, (
-                    movie["title"],
-                    movie["year"],
-                    movie["director"],
-                    movie["genre"],
-                    movie["plot"],
-                    movie["rating"],
-                    movie["runtime_minutes"],
-                    movie.get("actors", [])
-                ))
-            inserted += len(batch)
-            print(f"  Inserted {inserted}/{total} movies...")
+MOVIE_COLUMNS = ('title', 'year', 'director', 'genre', 'plot', 'rating', 'runtime_minutes', 'actors')
+
 
+def movie_copy_chunk(count: int, seed: int) -> str:
+    """Generate `count` movies as COPY text (runs in a worker process)."""
+    lines = []
+    for _ in range(count):
+        movie = generate_movie()
+        lines.append(copy_row((
+            movie["title"],
+            movie["year"],
+            movie["director"],
+            movie["genre"],
+            movie["plot"],
+            movie["rating"],
+            movie["runtime_minutes"],
+            text_array(movie.get("actors", []))
+        )))
+    return ''.join(lines)
+
+
+def load_movies(count: int, chunk_size: int = 10000, workers: int = None,
+                drop_indexes: bool = False, disable_triggers: bool = False) -> int:
+    """Generate and COPY `count` movies, then link people and rebuild derived data."""
+    inserted = parallel_copy('rag_movies', MOVIE_COLUMNS, movie_copy_chunk, count,
+                             chunk_size=chunk_size, workers=workers,
+                             drop_secondary_indexes=drop_indexes, disable_triggers=disable_triggers)
+
+    # Link new movies to the normalized people tables
+    sync_unlinked_movies()
+    if disable_triggers:
+        # The catalog counter triggers did not see the load
+        rebuild_catalog_counters()
     return inserted
 
 def main():
     parser = argparse.ArgumentParser(description='Generate massive movie dataset')
     parser.add_argument('--target', type=int, default=50000,
                         help='Target number of total movies (default: 50000)')
-    parser.add_argument('--batch-size', type=int, default=500,
-                        help='Batch size for database inserts (default: 500)')
+    parser.add_argument('--batch-size', type=int, default=10000,
+                        help='Rows per COPY chunk and commit (default: 10000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Generator processes (default: CPU count)')
+    parser.add_argument('--drop-indexes', action='store_true',
+                        help='Drop secondary and vector indexes during the load and rebuild them after')
+    parser.add_argument('--no-triggers', action='store_true',
+                        help='Disable the catalog counter triggers during the load and rebuild counters after')
     args = parser.parse_args()
 
     print("=" * 60)
@@ -365,32 +380,15 @@ def main():
         print(f"Already have {current_count:,} movies. No generation needed.")
         return
 
-    print(f"Generating {to_generate:,} new movies...")
+    print(f"Generating and loading {to_generate:,} new movies ({args.workers} workers)...")
     print()
 
-    # Generate movies
     start_time = time.time()
-    movies = []
-
-    for i in range(to_generate):
-        movie = generate_movie()
-        movies.append(movie)
-
-        if (i + 1) % 5000 == 0:
-            elapsed = time.time() - start_time
-            rate = (i + 1) / elapsed
-            remaining = (to_generate - i - 1) / rate
-            print(f"  Generated {i + 1:,}/{to_generate:,} movies ({rate:.0f}/sec, ~{remaining:.0f}s remaining)")
-
-    generation_time = time.time() - start_time
-    print(f"\nGeneration complete in {generation_time:.1f}s ({len(movies)/generation_time:.0f} movies/sec)")
+    inserted = load_movies(to_generate, args.batch_size, args.workers, args.drop_indexes, args.no_triggers)
+    load_time = time.time() - start_time
+    print(f"\nLoad complete in {load_time:.1f}s ({inserted/load_time:.0f} movies/sec)")
 
-    # Insert into database
-    print(f"\nInserting {len(movies):,} movies into database...")
-    insert_start = time.time()
-    inserted = batch_insert_movies(movies, args.batch_size)
-    insert_time = time.time() - insert_start
-    print(f"Insert complete in {insert_time:.1f}s ({inserted/insert_time:.0f} movies/sec)")
+    publish_data_change()
 
     # Verify final count
     result = execute_query("SELECT COUNT(*) as count FROM rag_movies")
@@ -401,7 +399,7 @@ def main():
     print("GENERATION COMPLETE")
     print("=" * 60)
     print(f"Previous count: {current_count:,}")
-    print(f"Movies generated: {len(movies):,}")
+    print(f"Movies generated: {inserted:,}")
     print(f"Final count: {final_count:,}")
     print()
     print("IMPORTANT: Run generate_embeddings.py to create vector embeddings")
@@ -0,0 +1,77 @@
+"""
+Script to check and rebuild the vector (IVFFlat) indexes.
+Measures row counts and embedding coverage, rebuilds indexes whose lists no longer
+fit the data (CONCURRENTLY, searches keep working), drops redundant vector indexes,
+then runs ANALYZE and pre-warms the indexes. Run it after bulk ingestion;
+generate_embeddings.py runs it automatically.
+
+    python scripts/maintain_indexes.py --check        # report only
+    python scripts/maintain_indexes.py                # rebuild what needs it
+    python scripts/maintain_indexes.py --force --kind movies --maintenance-work-mem 2GB
+"""
+
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from services.index_maintenance import VECTOR_INDEXES, inspect_vector_index, maintain_vector_indexes
+
+
+def print_report(report: dict):
+    """Print the state of one vector index (and what maintenance did to it)."""
+    print(f"  {report['index']}: {report['embedded']:,}/{report['rows']:,} rows embedded "
+          f"({report['coverage']:.0%}), lists {report['lists']} (target {report['target_lists']}), "
+          f"{report['size_bytes'] / 1024 / 1024:,.1f} MB")
+    for name in report.get('dropped', report['redundant']):
+        verb = "Dropped" if 'dropped' in report else "Redundant"
+        print(f"    ⚠ {verb} duplicate vector index {name}")
+    if 'rebuild' in report:
+        rebuild = report['rebuild']
+        print(f"    ✓ Rebuilt with lists={rebuild['lists']} in {rebuild['seconds']:.1f}s "
+              f"({rebuild['size_before'] / 1024 / 1024:,.1f} MB -> {rebuild['size_after'] / 1024 / 1024:,.1f} MB)")
+    elif report['rebuild_reason']:
+        print(f"    ⚠ Needs rebuild: {report['rebuild_reason']}")
+    else:
+        print("    ✓ Fits the data")
+    if report.get('analyzed'):
+        warmed = report['prewarmed_blocks']
+        prewarm = f"pre-warmed {warmed:,} blocks" if warmed is not None else "not pre-warmed"
+        print(f"    ✓ Analyzed; {prewarm}")
+    print(f"    Suggested ivfflat.probes: {report['recommended_probes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and rebuild vector indexes')
+    parser.add_argument('--kind', choices=['all', *VECTOR_INDEXES], default='all', help='Which index')
+    parser.add_argument('--check', action='store_true', help='Only report; change nothing')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the index fits the data')
+    parser.add_argument('--no-prewarm', action='store_true', help='Skip loading indexes into shared buffers')
+    parser.add_argument('--maintenance-work-mem', default=config.INDEX_MAINTENANCE_WORK_MEM,
+                        help=f'Index build memory (default: {config.INDEX_MAINTENANCE_WORK_MEM})')
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("VECTOR INDEX MAINTENANCE")
+    print("=" * 50)
+
+    kinds = list(VECTOR_INDEXES) if args.kind == 'all' else [args.kind]
+    if args.check:
+        reports = [inspect_vector_index(kind) for kind in kinds]
+    else:
+        reports = maintain_vector_indexes(kinds, force=args.force, prewarm=not args.no_prewarm,
+                                          maintenance_work_mem=args.maintenance_work_mem,
+                                          before_step=lambda step: print(f"\n→ {step}"))
+    print()
+    for report in reports:
+        print_report(report)
+
+    print("\n" + "=" * 50)
+    print("DONE")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
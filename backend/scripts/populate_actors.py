@@ -1,15 +1,26 @@
 """
 Populate actors for existing movies that don't have them.
+
+Casts are assigned a chunk at a time: the chunk's assignments are COPYed into a
+staging table and applied with one UPDATE, then the chunk's people links are
+synced and committed. Finished chunks no longer match the "no actors" filter, so
+an interrupted run simply resumes with the remaining movies.
+
+    python scripts/populate_actors.py --chunk-size 5000
+    python scripts/populate_actors.py --row-by-row   # previous per-row UPDATEs, for comparison
 """
 
 import sys
 import os
 import random
 import time
+import argparse
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.database import execute_query, get_cursor
+from utils.database import execute_query, get_cursor, bulk_update, text_array
+from services.people_service import sync_movie_people
+from services.sql_search_service import publish_data_change
 
 # Same actors list as in generate_massive_dataset.py
 ACTORS = [
@@ -59,38 +70,53 @@ def generate_actors() -> list:
     num_actors = random.randint(2, 6)
     return random.sample(ACTORS, min(num_actors, len(ACTORS)))
 
-def main():
-    print("=" * 60)
-    print("POPULATE ACTORS FOR EXISTING MOVIES")
-    print("=" * 60)
+MISSING_ACTORS = "(actors IS NULL OR actors = '{}')"
 
-    # Check how many movies need actors
-    result = execute_query("SELECT COUNT(*) as count FROM rag_movies WHERE actors IS NULL OR actors = '{}'")
-    movies_without_actors = result[0]['count'] if result else 0
 
-    total_result = execute_query("SELECT COUNT(*) as count FROM rag_movies")
-    total_movies = total_result[0]['count'] if total_result else 0
+def populate_set_based(chunk_size: int, total: int) -> int:
+    """Assign casts with one COPY + UPDATE (and one commit) per chunk of movies."""
+    updated = 0
+    last_id = 0
+    start_time = time.time()
 
-    print(f"\nTotal movies: {total_movies:,}")
-    print(f"Movies without actors: {movies_without_actors:,}")
+    while True:
+        with get_cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM rag_movies WHERE {MISSING_ACTORS} AND id > %s ORDER BY id LIMIT %s",
+                (last_id, chunk_size)
+            )
+            chunk_ids = [row['id'] for row in cursor.fetchall()]
+            if not chunk_ids:
+                break
 
-    if movies_without_actors == 0:
-        print("\nAll movies already have actors assigned!")
-        return
+            bulk_update('rag_movies', 'id', ['actors'],
+                        [(movie_id, text_array(generate_actors())) for movie_id in chunk_ids], cursor)
 
-    print(f"\nPopulating actors for {movies_without_actors:,} movies...")
+            # Keep the normalized people tables in sync with the new casts
+            sync_movie_people(chunk_ids, cursor)
 
-    batch_size = 1000
+        last_id = chunk_ids[-1]
+        updated += len(chunk_ids)
+        elapsed = time.time() - start_time
+        rate = updated / elapsed if elapsed > 0 else 0
+        remaining = (total - updated) / rate if rate > 0 else 0
+        print(f"  Updated {updated:,}/{total:,} movies ({rate:.0f}/sec, ~{max(0, remaining):.0f}s remaining)")
+
+    return updated
+
+
+def populate_row_by_row(chunk_size: int, total: int) -> int:
+    """Previous behaviour: one UPDATE per movie, all in a single transaction."""
     updated = 0
     start_time = time.time()
 
     with get_cursor() as cursor:
         # Get IDs of movies without actors
-        cursor.execute("SELECT id FROM rag_movies WHERE actors IS NULL OR actors = '{}' ORDER BY id")
+        cursor.execute(f"SELECT id FROM rag_movies WHERE {MISSING_ACTORS} ORDER BY id")
         movie_ids = [row['id'] for row in cursor.fetchall()]
 
-        for i in range(0, len(movie_ids), batch_size):
-            batch_ids = movie_ids[i:i + batch_size]
+        for i in range(0, len(movie_ids), chunk_size):
+            batch_ids = movie_ids[i:i + chunk_size]
 
             for movie_id in batch_ids:
                 actors = generate_actors()
@@ -99,14 +125,55 @@ def main():
                     (actors, movie_id)
                 )
 
+            # Keep the normalized people tables in sync with the new casts
+            sync_movie_people(batch_ids, cursor)
+
             updated += len(batch_ids)
             elapsed = time.time() - start_time
             rate = updated / elapsed if elapsed > 0 else 0
             remaining = (len(movie_ids) - updated) / rate if rate > 0 else 0
-            print(f"  Updated {updated:,}/{movies_without_actors:,} movies ({rate:.0f}/sec, ~{remaining:.0f}s remaining)")
+            print(f"  Updated {updated:,}/{total:,} movies ({rate:.0f}/sec, ~{remaining:.0f}s remaining)")
+
+    return updated
+
 
+def main():
+    parser = argparse.ArgumentParser(description='Populate actors for movies without a cast')
+    parser.add_argument('--chunk-size', type=int, default=5000,
+                        help='Movies per UPDATE and commit (default: 5000)')
+    parser.add_argument('--row-by-row', action='store_true',
+                        help='Use the previous one-UPDATE-per-movie path (for comparison)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("POPULATE ACTORS FOR EXISTING MOVIES")
+    print("=" * 60)
+
+    # Check how many movies need actors
+    result = execute_query(f"SELECT COUNT(*) as count FROM rag_movies WHERE {MISSING_ACTORS}")
+    movies_without_actors = result[0]['count'] if result else 0
+
+    total_result = execute_query("SELECT COUNT(*) as count FROM rag_movies")
+    total_movies = total_result[0]['count'] if total_result else 0
+
+    print(f"\nTotal movies: {total_movies:,}")
+    print(f"Movies without actors: {movies_without_actors:,}")
+
+    if movies_without_actors == 0:
+        print("\nAll movies already have actors assigned!")
+        return
+
+    print(f"\nPopulating actors for {movies_without_actors:,} movies...")
+
+    start_time = time.time()
+    if args.row_by_row:
+        updated = populate_row_by_row(args.chunk_size, movies_without_actors)
+    else:
+        updated = populate_set_based(args.chunk_size, movies_without_actors)
     total_time = time.time() - start_time
 
+    publish_data_change()
+
     print()
     print("=" * 60)
     print("COMPLETE")
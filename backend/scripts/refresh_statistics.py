@@ -0,0 +1,40 @@
+"""
+Refresh the precomputed dashboard statistics (rag_detailed_stats).
+The ingestion scripts do this automatically; run it after manual data changes.
+With --rebuild-counters the trigger-maintained catalog counters are recomputed too.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.sql_search_service import refresh_statistics, rebuild_catalog_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh precomputed statistics')
+    parser.add_argument('--blocking', action='store_true',
+                        help='Plain REFRESH (locks readers out; use for the first population)')
+    parser.add_argument('--rebuild-counters', action='store_true',
+                        help='Also recompute rag_catalog_counters from the base tables')
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("REFRESH STATISTICS")
+    print("=" * 50)
+
+    if args.rebuild_counters:
+        start = time.time()
+        rebuild_catalog_counters()
+        print(f"\n✓ Catalog counters rebuilt in {time.time() - start:.2f}s")
+
+    start = time.time()
+    refresh_statistics(concurrently=not args.blocking)
+    print(f"\n✓ rag_detailed_stats refreshed in {time.time() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
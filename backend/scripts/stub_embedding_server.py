@@ -0,0 +1,128 @@
+"""
+Local stub of the OpenAI embeddings endpoint for benchmarks and offline runs.
+Returns deterministic unit vectors derived from each text's hash, after a fixed
+per-request latency (plus a small per-text cost) to mimic the real API.
+
+    python scripts/stub_embedding_server.py --port 9100 --latency-ms 80
+    OPENAI_BASE_URL=http://localhost:9100/v1 python scripts/generate_embeddings.py
+"""
+
+import sys
+import os
+import json
+import time
+import math
+import array
+import base64
+import struct
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+
+
+def stub_vector(text: str, dimensions: int) -> list:
+    """Deterministic unit vector for text (same text, same vector)."""
+    values = []
+    counter = 0
+    while len(values) < dimensions:
+        digest = hashlib.sha256(f"{counter}:{text}".encode()).digest()
+        values.extend(v / 2**31 for v in struct.unpack('<8i', digest))
+        counter += 1
+    values = values[:dimensions]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+class StubStats:
+    """Request counters shared by all handler threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+
+    def record(self, texts: int):
+        with self.lock:
+            self.requests += 1
+            self.texts += texts
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded server with a listen backlog large enough for benchmark concurrency."""
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def make_handler(latency_ms: float, per_text_ms: float, dimensions: int, stats: StubStats):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/embeddings'):
+                self.send_error(404)
+                return
+
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            texts = body['input'] if isinstance(body['input'], list) else [body['input']]
+            stats.record(len(texts))
+            time.sleep((latency_ms + per_text_ms * len(texts)) / 1000)
+
+            data = []
+            for i, text in enumerate(texts):
+                vector = stub_vector(text, body.get('dimensions') or dimensions)
+                if body.get('encoding_format') == 'base64':
+                    embedding = base64.b64encode(array.array('f', vector).tobytes()).decode()
+                else:
+                    embedding = vector
+                data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+            tokens = sum(len(t.split()) for t in texts)
+            payload = json.dumps({
+                "object": "list",
+                "data": data,
+                "model": body.get('model', config.EMBEDDING_MODEL),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass  # Keep benchmark output readable
+
+    return Handler
+
+
+def start_server(port: int = 9100, latency_ms: float = 80, per_text_ms: float = 0.2,
+                 dimensions: int = config.EMBEDDING_DIMENSIONS) -> tuple:
+    """Start the stub on a background thread; returns (server, stats)."""
+    stats = StubStats()
+    server = StubServer(('127.0.0.1', port), make_handler(latency_ms, per_text_ms, dimensions, stats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub OpenAI embeddings server')
+    parser.add_argument('--port', type=int, default=9100, help='Port (default: 9100)')
+    parser.add_argument('--latency-ms', type=float, default=80, help='Fixed latency per request (default: 80)')
+    parser.add_argument('--per-text-ms', type=float, default=0.2, help='Extra latency per text (default: 0.2)')
+    args = parser.parse_args()
+
+    server, stats = start_server(args.port, args.latency_ms, args.per_text_ms)
+    print(f"✓ Stub embedding server on http://127.0.0.1:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"  requests: {stats.requests:,}  texts: {stats.texts:,}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
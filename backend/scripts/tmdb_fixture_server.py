@@ -0,0 +1,115 @@
+"""
+Local fixture server for the TMDB endpoints used by ingestion.
+Serves deterministic /movie/{id} (with credits) and /discover/movie responses after
+a fixed latency, so the ingestion pipeline can be run and timed offline.
+
+    python scripts/tmdb_fixture_server.py --port 9200 --latency-ms 50
+    TMDB_BASE_URL=http://127.0.0.1:9200/3 TMDB_API_KEY=fixture python scripts/fetch_real_movies_tmdb.py
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.stub_embedding_server import StubServer, StubStats
+
+GENRES = ["Drama", "Crime", "Sci-Fi", "Comedy", "Thriller", "Animation", "Romance", "Horror"]
+PEOPLE = ["Ava Stone", "Ben Ortiz", "Cleo Park", "Dan Weiss", "Eli Novak", "Fay Moreau",
+          "Gus Tanaka", "Hana Berg", "Ivo Rossi", "Jun Okafor", "Kai Lindqvist", "Lea Dubois"]
+PAGE_SIZE = 20
+
+
+def fixture_movie(movie_id: int) -> dict:
+    """Deterministic TMDB-shaped movie details for an id."""
+    rng = random.Random(movie_id)
+    cast = rng.sample(PEOPLE, 6)
+    return {
+        "id": movie_id,
+        "title": f"Fixture Movie {movie_id}",
+        "release_date": f"{rng.randint(1950, 2024)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+        "genres": [{"id": 1, "name": rng.choice(GENRES)}],
+        "overview": f"Plot of fixture movie {movie_id}: {cast[0]} meets {cast[1]}.",
+        "vote_average": round(rng.uniform(5, 9), 3),
+        "runtime": rng.randint(80, 180),
+        "credits": {
+            "cast": [{"name": name, "order": i} for i, name in enumerate(cast)],
+            "crew": [{"name": rng.choice(PEOPLE), "job": "Director"}],
+        },
+    }
+
+
+def make_handler(latency_ms: float, total_movies: int, stats: StubStats):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = [p for p in url.path.split('/') if p]
+            if parts[:1] == ['3']:
+                parts = parts[1:]  # API version prefix
+            stats.record(1)
+            time.sleep(latency_ms / 1000)
+
+            if parts[:1] == ['movie'] and len(parts) == 2 and parts[1].isdigit():
+                movie_id = int(parts[1])
+                if not 1 <= movie_id <= total_movies:
+                    self._send(404, {"status_code": 34, "status_message": "Not found"})
+                    return
+                self._send(200, fixture_movie(movie_id))
+            elif parts == ['discover', 'movie']:
+                page = int(query.get('page', ['1'])[0])
+                start = (page - 1) * PAGE_SIZE + 1
+                ids = range(start, min(start + PAGE_SIZE, total_movies + 1))
+                self._send(200, {"page": page, "results": [{"id": i} for i in ids],
+                                 "total_pages": (total_movies + PAGE_SIZE - 1) // PAGE_SIZE})
+            else:
+                self._send(404, {"status_message": "Unknown path"})
+
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass  # Keep benchmark output readable
+
+    return Handler
+
+
+def start_server(port: int = 9200, latency_ms: float = 50, total_movies: int = 10000) -> tuple:
+    """Start the fixture server on a background thread; returns (server, stats)."""
+    stats = StubStats()
+    server = StubServer(('127.0.0.1', port), make_handler(latency_ms, total_movies, stats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TMDB fixture server')
+    parser.add_argument('--port', type=int, default=9200, help='Port (default: 9200)')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Latency per request (default: 50)')
+    parser.add_argument('--movies', type=int, default=10000, help='Movie ids served, 1..N (default: 10000)')
+    args = parser.parse_args()
+
+    server, stats = start_server(args.port, args.latency_ms, args.movies)
+    print(f"✓ TMDB fixture server on http://127.0.0.1:{args.port}/3 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"  requests: {stats.requests:,}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
 """Service modules for the RAG application."""
 
-from .embedding_service import generate_embedding, generate_embeddings_batch, create_search_embedding
-from .vector_search_service import search_movies_by_similarity, search_reviews_by_similarity, hybrid_search
+from .embedding_service import (
+    generate_embedding,
+    generate_embeddings_batch,
+    generate_embeddings_cached,
+    create_search_embedding,
+    create_search_embeddings
+)
+from .vector_search_service import (
+    search_movies_by_similarity,
+    search_movies_by_similarity_batch,
+    search_reviews_by_similarity,
+    search_reviews_for_movies,
+    hybrid_search
+)
 from .sql_search_service import (
     get_movies_by_year,
     get_movies_by_director,
@@ -9,8 +21,12 @@ from .sql_search_service import (
     get_top_rated_movies,
     get_movies_by_rating_range,
     get_movie_with_reviews,
+    get_movies_with_reviews,
+    get_movies_by_ids,
     search_movies_keyword,
+    search_movies_by_title,
     get_statistics,
-    get_reviews_for_movie
+    get_reviews_for_movie,
+    get_similar_movies
 )
 from .chat_service import process_chat_message
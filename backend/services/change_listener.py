@@ -0,0 +1,226 @@
+"""
+Change listener for cross-process cache invalidation.
+Each API process LISTENs on the 'rag_changes' channel fed by the catalog triggers
+(migration 016) and turns notifications into cache invalidations.
+
+Bursts are coalesced: notifications are merged until the channel has been quiet for
+the debounce window (or the oldest pending change reaches the max delay), so a bulk
+load costs a few invalidation rounds instead of one per statement.
+
+Every process receives every notification. Handlers for in-process caches run in each
+of them, but the shared Redis invalidation for a notification runs once, in whichever
+process claims its sequence number first (migration 020).
+"""
+
+import json
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+import sys
+sys.path.append('..')
+from config import config
+from utils.database import get_connection
+from services.redis_cache import (
+    invalidate_movie_details,
+    invalidate_stats,
+    bump_search_version,
+    bump_data_version,
+    claim_once
+)
+
+CHANNEL = "rag_changes"
+
+
+class ChangeBatch:
+    """
+    Changes merged from one or more notifications.
+
+    movie_ids is None when some notification carried too many ids to list,
+    meaning every movie may have changed. tables are the tables whose content
+    changed; embedding_tables those where updates only touched embedding columns.
+    """
+
+    def __init__(self):
+        self.movie_ids: Optional[Set[int]] = set()
+        self.tables: Set[str] = set()
+        self.embedding_tables: Set[str] = set()
+        self.payloads: List[Dict[str, Any]] = []
+        self.notifications = 0
+        self.rows = 0
+        self.first_at: Optional[float] = None
+
+    @classmethod
+    def of(cls, payloads: List[Dict[str, Any]]) -> "ChangeBatch":
+        batch = cls()
+        for payload in payloads:
+            batch.add(payload)
+        return batch
+
+    def add(self, payload: Dict[str, Any]):
+        if self.first_at is None:
+            self.first_at = time.monotonic()
+        self.notifications += 1
+        self.rows += payload.get('count') or 0
+        self.payloads.append(payload)
+        if payload.get('content') is False:
+            self.embedding_tables.add(payload.get('table'))
+            return
+        self.tables.add(payload.get('table'))
+        movie_ids = payload.get('movie_ids')
+        if movie_ids is None or self.movie_ids is None:
+            self.movie_ids = None
+        else:
+            self.movie_ids.update(movie_ids)
+
+
+def invalidate_for_changes(batch: ChangeBatch):
+    """
+    Drop the Redis entries a batch of changes could have affected. Redis is shared, so
+    only the notifications this process claims first are acted on (those without a
+    sequence number, e.g. after a disconnect, always are).
+    """
+    numbered = [p for p in batch.payloads if p.get('seq') is not None]
+    claimed = claim_once([f"change:done:{p['seq']}" for p in numbered], ttl=600)
+    mine = ChangeBatch.of([p for p in batch.payloads if p.get('seq') is None]
+                          + [p for p, won in zip(numbered, claimed) if won])
+    if not mine.notifications:
+        return
+
+    if mine.tables:
+        invalidate_movie_details(None if mine.movie_ids is None else sorted(mine.movie_ids))
+        invalidate_stats()
+        bump_data_version()
+    if 'rag_movies' in mine.tables | mine.embedding_tables:
+        bump_search_version()  # Only movie rows (and their plot embeddings) feed cached searches
+
+
+class ChangeListener:
+    """
+    Background LISTEN loop with coalescing.
+
+    Args:
+        debounce_ms: Quiet period that ends a burst
+        max_delay_ms: Longest a change waits while a burst continues
+        handlers: Called with each coalesced ChangeBatch (default: Redis invalidation);
+                  in-process caches add theirs with subscribe()
+    """
+
+    def __init__(self, debounce_ms: Optional[float] = None, max_delay_ms: Optional[float] = None,
+                 handlers: Optional[List[Callable[[ChangeBatch], None]]] = None):
+        self.debounce = (debounce_ms if debounce_ms is not None else config.CHANGE_DEBOUNCE_MS) / 1000
+        self.max_delay = (max_delay_ms if max_delay_ms is not None else config.CHANGE_MAX_DELAY_MS) / 1000
+        self.handlers = list(handlers) if handlers is not None else [invalidate_for_changes]
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_at = 0.0
+        self._listening = False
+        self.notifications = 0
+        self.flushes = 0
+
+    def subscribe(self, handler: Callable[[ChangeBatch], None]):
+        """Run a handler for every coalesced batch (e.g. to clear an in-process cache)."""
+        self.handlers.append(handler)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        """Listen until stopped, reconnecting with backoff if the connection drops."""
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                backoff = 1.0
+            except Exception as e:
+                print(f"⚠ Change listener disconnected: {e} (retrying in {backoff:.0f}s)", file=sys.stderr)
+                if self._listening:
+                    # Changes may be missed while disconnected; assume anything changed
+                    self._listening = False
+                    self._flush(self._missed_batch())
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _listen(self):
+        conn = get_connection()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            self._listening = True
+            batch = ChangeBatch()
+            while not self._stop.is_set():
+                timeout = self._timeout(batch)
+                if select.select([conn], [], [], timeout) != ([], [], []):
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self.notifications += 1
+                        try:
+                            batch.add(json.loads(notify.payload))
+                        except ValueError:
+                            batch.add({})  # Unreadable payload: treat as "anything changed"
+                    self._last_at = time.monotonic()
+                if batch.notifications and self._due(batch):
+                    self._flush(batch)
+                    batch = ChangeBatch()
+            if batch.notifications:
+                self._flush(batch)
+        finally:
+            conn.close()
+
+    def _timeout(self, batch: ChangeBatch) -> float:
+        """How long to wait for the next notification before re-checking the batch."""
+        if not batch.notifications:
+            return 1.0
+        now = time.monotonic()
+        return max(0.0, min(self._last_at + self.debounce, batch.first_at + self.max_delay) - now)
+
+    def _due(self, batch: ChangeBatch) -> bool:
+        now = time.monotonic()
+        return now >= self._last_at + self.debounce or now >= batch.first_at + self.max_delay
+
+    @staticmethod
+    def _missed_batch() -> ChangeBatch:
+        batch = ChangeBatch()
+        batch.add({'table': 'rag_movies', 'movie_ids': None})
+        return batch
+
+    def _flush(self, batch: ChangeBatch):
+        self.flushes += 1
+        for handler in self.handlers:
+            try:
+                handler(batch)
+            except Exception as e:
+                print(f"⚠ Change handler failed: {e}", file=sys.stderr)
+
+
+_listener: Optional[ChangeListener] = None
+
+
+def get_change_listener() -> Optional[ChangeListener]:
+    return _listener
+
+
+def start_change_listener() -> Optional[ChangeListener]:
+    """Start this process's listener (no-op when disabled or already running)."""
+    global _listener
+    if not config.CHANGE_LISTENER_ENABLED or _listener is not None:
+        return _listener
+    _listener = ChangeListener()
+    _listener.start()
+    return _listener
+
+
+def stop_change_listener():
+    """Stop this process's listener, flushing any pending changes."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -17,11 +17,16 @@ from services.sql_search_service import (
     get_movies_by_actor,
     get_top_rated_movies,
     get_statistics,
-    search_movies_keyword
+    search_movies_keyword,
+    search_movies_by_title,
+    get_movies_by_ids
 )
 
 # Initialize OpenAI client
-client = OpenAI(api_key=config.OPENAI_API_KEY)
+client = OpenAI(api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_BASE_URL or None)
+
+# Maximum structured (SQL) matches passed to the LLM
+SQL_RESULT_LIMIT = 10
 
 
 def analyze_query_intent(query: str, conversation_history: List[Dict[str, str]] = None) -> tuple[Dict[str, Any], Dict[str, int]]:
@@ -116,45 +121,48 @@ def gather_context(query: str, intent_analysis: Dict[str, Any]) -> Dict[str, Any
     intent = intent_analysis.get("intent", "hybrid")
     filters = intent_analysis.get("filters", {})
 
-    # Always do vector search for semantic and hybrid intents
-    if intent in ["semantic_search", "hybrid"]:
-        context["vector_results"] = hybrid_search(query, vector_limit=5)
-
     # Do structured queries based on filters
+    # Lookups return lightweight summary rows; only the final candidates are hydrated below
     if intent in ["structured_query", "hybrid"]:
         if "title" in filters:
-            # Search by title
-            title_results = search_movies_keyword(filters["title"])
+            # Search by title (tolerates misspelled titles)
+            title_results = search_movies_by_title(filters["title"], limit=SQL_RESULT_LIMIT, fields='summary')
             context["sql_results"].extend(title_results)
         if "director" in filters:
-            context["sql_results"].extend(get_movies_by_director(filters["director"]))
+            context["sql_results"].extend(get_movies_by_director(filters["director"], limit=SQL_RESULT_LIMIT, fields='summary'))
         if "year" in filters:
-            context["sql_results"].extend(get_movies_by_year(filters["year"]))
+            context["sql_results"].extend(get_movies_by_year(filters["year"], limit=SQL_RESULT_LIMIT, fields='summary'))
         if "genre" in filters:
-            context["sql_results"].extend(get_movies_by_genre(filters["genre"]))
+            context["sql_results"].extend(get_movies_by_genre(filters["genre"], limit=SQL_RESULT_LIMIT, fields='summary'))
         if "actor" in filters:
-            context["sql_results"].extend(get_movies_by_actor(filters["actor"]))
+            context["sql_results"].extend(get_movies_by_actor(filters["actor"], limit=SQL_RESULT_LIMIT, fields='summary'))
         if "min_rating" in filters:
-            context["sql_results"].extend(get_top_rated_movies(10))
+            context["sql_results"].extend(get_top_rated_movies(SQL_RESULT_LIMIT, fields='summary'))
 
         # Keyword search as fallback
         keywords = intent_analysis.get("keywords", [])
         for keyword in keywords[:3]:  # Limit to first 3 keywords
-            keyword_results = search_movies_keyword(keyword)
+            keyword_results = search_movies_keyword(keyword, limit=SQL_RESULT_LIMIT, fields='summary')
             context["sql_results"].extend(keyword_results)
 
     # Get statistics if needed
     if intent_analysis.get("needs_statistics"):
         context["statistics"] = get_statistics()
 
-    # Deduplicate SQL results by movie ID
+    # Deduplicate SQL results by movie ID, then fetch full rows for the survivors only
     seen_ids = set()
-    unique_results = []
+    unique_ids = []
     for movie in context["sql_results"]:
         if movie["id"] not in seen_ids:
             seen_ids.add(movie["id"])
-            unique_results.append(movie)
-    context["sql_results"] = unique_results[:10]  # Limit to 10
+            unique_ids.append(movie["id"])
+    context["sql_results"] = get_movies_by_ids(unique_ids[:SQL_RESULT_LIMIT])
+
+    # Always do vector search for semantic and hybrid intents; reviews are drawn from
+    # the movies retrieved here and by the SQL lookups (config.REVIEW_RETRIEVAL_MODE)
+    if intent in ["semantic_search", "hybrid"]:
+        sql_ids = [movie["id"] for movie in context["sql_results"]]
+        context["vector_results"] = hybrid_search(query, vector_limit=5, movie_ids=sql_ids)
 
     # Check if cache was hit during this request
     if REDIS_AVAILABLE:
@@ -0,0 +1,536 @@
+"""
+Pipelined embedding backfill.
+A reader pages pending rows by id, N workers embed token-aware batches under a
+shared requests/tokens-per-minute limiter, and a writer applies results in bulk.
+Progress is checkpointed so an interrupted run resumes where it stopped.
+
+Each row stores the hash of the text it was embedded from and the embedding profile,
+so it is pending when it has no embedding, its text changed, or the model changed.
+The hash of the current text is a generated column (migration 013), so spotting
+changed text compares two columns rather than hashing every row's text.
+Every distinct text is embedded once: rows whose text already has an embedding get
+a copy of it, and rows sharing a text within a run share one API input.
+
+With a worker_id the reader instead leases batches (FOR UPDATE SKIP LOCKED plus a
+row in rag_embedding_leases), so several processes or machines can share one backfill.
+"""
+
+import json
+import math
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+import sys
+sys.path.append('..')
+from config import config
+from utils.database import execute_query, bulk_update, get_cursor
+from utils.rate_limit import RateLimiter
+
+# What to embed for each kind of row (text_sql builds the embedded text in SQL;
+# content_hash_column is generated from the same text, capped at MAX_INPUT_CHARS)
+SOURCES = {
+    'movies': {
+        'table': 'rag_movies',
+        'column': 'plot_embedding',
+        'hash_column': 'plot_embedding_hash',
+        'profile_column': 'plot_embedding_profile',
+        'content_hash_column': 'plot_content_hash',
+        'text_sql': "'Movie: ' || title || '. Plot: ' || plot",
+    },
+    'reviews': {
+        'table': 'rag_reviews',
+        'column': 'review_embedding',
+        'hash_column': 'review_embedding_hash',
+        'profile_column': 'review_embedding_profile',
+        'content_hash_column': 'review_content_hash',
+        'text_sql': "review_text",
+    },
+}
+
+# text-embedding-3-small accepts 8191 tokens per input; ~4 characters per token
+MAX_INPUT_CHARS = 30000
+
+# Text hashes remembered per run to skip texts already sent (bounds reader memory)
+MAX_TRACKED_HASHES = 200000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """Read a checkpoint file (empty if missing or unreadable)."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class EmbeddingBackfill:
+    """
+    Backfill embeddings for one kind of row ('movies' or 'reviews').
+
+    Args:
+        kind: Key of SOURCES
+        workers: Concurrent embedding requests
+        batch_texts: Max texts per API call
+        batch_tokens: Max estimated tokens per API call
+        rpm: Requests-per-minute limit shared by all workers
+        tpm: Tokens-per-minute limit shared by all workers
+        write_batch: Rows per bulk write
+        page_size: Rows per reader query
+        max_retries: Attempts per batch before it is counted as failed
+        checkpoint_path: JSON file recording the resume point (None disables)
+        embed_fn: Embeds a list of texts (defaults to generate_embeddings_batch)
+        progress_interval: Seconds between progress lines (0 disables)
+        worker_id: Lease work instead of scanning (distributed mode; checkpoint is unused)
+        lease_seconds: How long a leased batch stays reserved for this worker
+        profile: Embedding profile stored with each row (default: config.EMBEDDING_PROFILE)
+        only_ids: Restrict the run to these rows (e.g. rows just ingested)
+        gate: Called before each batch is embedded; may block (pause) or raise (abort the run)
+    """
+
+    def __init__(self, kind: str, workers: int = 4, batch_texts: int = 256, batch_tokens: int = 60000,
+                 rpm: Optional[float] = None, tpm: Optional[float] = None, write_batch: int = 1000,
+                 page_size: int = 2000, max_retries: int = 6, checkpoint_path: Optional[str] = None,
+                 embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 progress_interval: float = 5.0, worker_id: Optional[str] = None,
+                 lease_seconds: int = 600, profile: Optional[str] = None,
+                 only_ids: Optional[List[int]] = None, gate: Optional[Callable[[], None]] = None):
+        if embed_fn is None:
+            from services.embedding_service import generate_embeddings_batch
+            embed_fn = generate_embeddings_batch
+
+        self.kind = kind
+        self.source = SOURCES[kind]
+        self.workers = workers
+        self.batch_texts = batch_texts
+        self.batch_tokens = batch_tokens
+        self.write_batch = write_batch
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.checkpoint_path = checkpoint_path
+        self.embed_fn = embed_fn
+        self.progress_interval = progress_interval
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.profile = profile or config.EMBEDDING_PROFILE
+        self.gate = gate
+        self.limiter = RateLimiter(rpm or config.EMBEDDING_RPM, tpm or config.EMBEDDING_TPM)
+
+        # The exact text sent to the API, its hash, and the condition for a row needing (re-)embedding
+        self._text_sql = f"left({self.source['text_sql']}, {MAX_INPUT_CHARS})"
+        self._content_hash = self.source['content_hash_column']
+        self._pending_sql = (
+            f"({self.source['column']} IS NULL"
+            f" OR {self.source['profile_column']} IS DISTINCT FROM %(profile)s"
+            f" OR {self.source['hash_column']} IS DISTINCT FROM {self._content_hash})"
+        )
+        if only_ids is not None:
+            self._pending_sql += " AND id = ANY(%(only_ids)s)"
+        self._params = {'profile': self.profile, 'only_ids': list(only_ids or [])}
+
+        self._work: "queue.Queue" = queue.Queue(maxsize=workers * 2)
+        self._results: "queue.Queue" = queue.Queue(maxsize=workers * 2)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        self._sent_hashes: set = set()
+        self._deferred: List[int] = []  # Rows whose text was already sent this run
+
+        self.total = 0
+        self.embedded = 0
+        self.reused = 0
+        self.failed = 0
+        self.api_calls = 0
+        self.batches = 0
+        self.texts = 0
+        self.retries = 0
+        self.tokens = 0
+
+    # -- Reader --------------------------------------------------------------
+
+    def _pending_count(self, after_id: int) -> int:
+        sql = f"SELECT COUNT(*) as n FROM {self.source['table']} WHERE {self._pending_sql} AND id > %(after)s"
+        return execute_query(sql, {**self._params, 'after': after_id})[0]['n']
+
+    def _pages(self, after_id: int):
+        """Yield pending rows (id, text, text_hash) in id order, one keyset page at a time."""
+        sql = f"""
+            SELECT id, {self._text_sql} as text, {self._content_hash} as text_hash
+            FROM {self.source['table']}
+            WHERE {self._pending_sql} AND id > %(after)s
+            ORDER BY id
+            LIMIT %(limit)s
+        """
+        params = {**self._params, 'limit': self.page_size}
+        while not self._stop.is_set():
+            rows = execute_query(sql, {**params, 'after': after_id})
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1]['id']
+
+    def _leased_pages(self):
+        """
+        Yield batches of pending rows leased to this worker until none are left.
+        Rows locked by another worker's lease transaction are skipped, rows under a
+        live lease are excluded, and expired leases are taken over.
+        """
+        sql = f"""
+            WITH candidates AS (
+                SELECT t.id
+                FROM {self.source['table']} t
+                WHERE {self._pending_sql}
+                  AND NOT EXISTS (
+                      SELECT 1 FROM rag_embedding_leases l
+                      WHERE l.kind = %(kind)s AND l.row_id = t.id AND l.leased_until > NOW()
+                  )
+                ORDER BY t.id
+                LIMIT %(limit)s
+                FOR UPDATE OF t SKIP LOCKED
+            ),
+            leased AS (
+                INSERT INTO rag_embedding_leases AS l (kind, row_id, worker_id, leased_until)
+                SELECT %(kind)s, id, %(worker)s, NOW() + make_interval(secs => %(seconds)s)
+                FROM candidates
+                ON CONFLICT (kind, row_id) DO UPDATE
+                    SET worker_id = EXCLUDED.worker_id, leased_until = EXCLUDED.leased_until
+                    WHERE l.leased_until <= NOW()
+                RETURNING l.row_id
+            )
+            SELECT t.id, {self._text_sql} as text, t.{self._content_hash} as text_hash
+            FROM {self.source['table']} t
+            JOIN leased ON leased.row_id = t.id
+            ORDER BY t.id
+        """
+        # Lease about one round of batches at a time so work spreads evenly across nodes
+        limit = min(self.page_size, self.batch_texts * self.workers)
+        params = {'kind': self.kind, 'limit': limit, 'worker': self.worker_id,
+                  'seconds': self.lease_seconds, **self._params}
+        while not self._stop.is_set():
+            with get_cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            yield rows
+
+    def _release_leases(self, ids: List[int]):
+        """Drop this worker's leases on rows that have been written."""
+        with get_cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM rag_embedding_leases WHERE kind = %s AND worker_id = %s AND row_id = ANY(%s)",
+                (self.kind, self.worker_id, ids)
+            )
+
+    def _reuse_embeddings(self, ids: Optional[List[int]] = None) -> List[int]:
+        """
+        Copy existing embeddings to pending rows whose text was already embedded
+        under the current profile (by any row, run or worker).
+
+        Args:
+            ids: Only consider these rows (default: every pending row)
+
+        Returns:
+            Ids of the rows filled
+        """
+        if ids is not None and not ids:
+            return []
+        table, column = self.source['table'], self.source['column']
+        hash_column, profile_column = self.source['hash_column'], self.source['profile_column']
+        sql = f"""
+            WITH pending AS (
+                SELECT id, {self._content_hash} as text_hash
+                FROM {table}
+                WHERE {self._pending_sql} {'AND id = ANY(%(ids)s)' if ids is not None else ''}
+            ),
+            sources AS (
+                SELECT DISTINCT ON (s.{hash_column}) s.{hash_column} as text_hash, s.{column} as embedding
+                FROM {table} s
+                WHERE s.{hash_column} IN (SELECT text_hash FROM pending)
+                  AND s.{profile_column} = %(profile)s
+                  AND s.{column} IS NOT NULL
+                ORDER BY s.{hash_column}, s.id
+            )
+            UPDATE {table} t
+            SET {column} = sources.embedding, {hash_column} = sources.text_hash, {profile_column} = %(profile)s
+            FROM pending
+            JOIN sources ON sources.text_hash = pending.text_hash
+            WHERE t.id = pending.id
+            RETURNING t.id
+        """
+        with get_cursor() as cursor:
+            cursor.execute(sql, {**self._params, 'ids': ids})
+            filled = [row['id'] for row in cursor.fetchall()]
+        if filled:
+            if self.worker_id:
+                self._release_leases(filled)
+            with self._lock:
+                self.reused += len(filled)
+        return filled
+
+    def _read(self, after_id: int):
+        """Group pending rows into token-aware batches of distinct texts and queue them for the workers."""
+        seq = 0
+        groups: Dict[str, List[int]] = {}  # text hash -> row ids, in text order
+        texts, tokens, last_id = [], 0, after_id
+
+        def flush():
+            nonlocal seq, groups, texts, tokens
+            if groups:
+                if len(self._sent_hashes) + len(groups) > MAX_TRACKED_HASHES:
+                    self._sent_hashes.clear()
+                self._sent_hashes.update(groups)
+                self._put(self._work, (seq, list(groups.items()), texts, tokens, last_id))
+                seq += 1
+                groups, texts, tokens = {}, [], 0
+
+        try:
+            pages = self._leased_pages() if self.worker_id else self._pages(after_id)
+            for rows in pages:
+                reused = set(self._reuse_embeddings([row['id'] for row in rows]))
+                for row in rows:
+                    if row['id'] in reused:
+                        continue
+                    text_hash = row['text_hash']
+                    if text_hash in groups:
+                        groups[text_hash].append(row['id'])
+                    elif text_hash in self._sent_hashes:
+                        self._deferred.append(row['id'])  # Copied once the first copy is written
+                        continue
+                    else:
+                        cost = estimate_tokens(row['text'])
+                        if groups and (len(groups) >= self.batch_texts or tokens + cost > self.batch_tokens):
+                            flush()
+                        groups[text_hash] = [row['id']]
+                        texts.append(row['text'])
+                        tokens += cost
+                    last_id = row['id']
+            flush()
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.workers):
+                self._work.put(None)
+
+    # -- Workers -------------------------------------------------------------
+
+    def _embed_with_backoff(self, texts: List[str], tokens: int) -> List[List[float]]:
+        for attempt in range(self.max_retries):
+            self.limiter.acquire(tokens)
+            with self._lock:
+                self.api_calls += 1
+            try:
+                return self.embed_fn(texts)
+            except Exception as e:
+                if attempt == self.max_retries - 1 or self._stop.is_set():
+                    raise
+                delay = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.5)
+                with self._lock:
+                    self.retries += 1
+                print(f"  ⚠ {self.kind} batch failed ({type(e).__name__}: {e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _work_loop(self):
+        while True:
+            item = self._work.get()
+            if item is None:
+                self._results.put(None)
+                return
+            seq, groups, texts, tokens, last_id = item
+            if self._stop.is_set():
+                continue
+            if self.gate is not None:
+                try:
+                    self.gate()
+                except Exception as e:
+                    self._fail(e)
+                    continue
+            try:
+                embeddings = self._embed_with_backoff(texts, tokens)
+                with self._lock:
+                    self.tokens += tokens
+                    self.batches += 1
+                    self.texts += len(texts)
+                # Fan each embedding out to every row sharing its text
+                rows = [(row_id, embedding, text_hash, self.profile)
+                        for (text_hash, ids), embedding in zip(groups, embeddings) for row_id in ids]
+                self._put(self._results, (seq, last_id, rows))
+            except Exception as e:
+                count = sum(len(ids) for _, ids in groups)
+                print(f"  ✗ {self.kind} batch of {count} rows (up to id {last_id}) failed: {e}")
+                with self._lock:
+                    self.failed += count
+                self._put(self._results, (seq, last_id, None))
+
+    # -- Writer --------------------------------------------------------------
+
+    def _write_loop(self, watermark: int):
+        """Apply results in bulk; advance the checkpoint over contiguously completed batches."""
+        finished_workers = 0
+        buffered: List[tuple] = []
+        buffered_batches: List[tuple] = []
+        completed: Dict[int, tuple] = {}  # seq -> (ok, last id)
+        next_seq = 0
+        columns = [self.source['column'], self.source['hash_column'], self.source['profile_column']]
+
+        def flush():
+            nonlocal buffered, buffered_batches, next_seq, watermark
+            if buffered:
+                bulk_update(self.source['table'], 'id', columns, buffered)
+                if self.worker_id:
+                    self._release_leases([row[0] for row in buffered])
+                with self._lock:
+                    self.embedded += len(buffered)
+            for seq, ok, last_id in buffered_batches:
+                completed[seq] = (ok, last_id)
+            buffered, buffered_batches = [], []
+
+            # A failed batch holds the watermark back so a rerun retries it
+            while next_seq in completed and completed[next_seq][0]:
+                watermark = completed.pop(next_seq)[1]
+                next_seq += 1
+            self._save_checkpoint(watermark)
+
+        try:
+            while finished_workers < self.workers:
+                try:
+                    item = self._results.get(timeout=1.0)
+                except queue.Empty:
+                    flush()
+                    continue
+                if item is None:
+                    finished_workers += 1
+                    continue
+                seq, last_id, rows = item
+                buffered_batches.append((seq, rows is not None, last_id))
+                if rows:
+                    buffered.extend(rows)
+                if len(buffered) >= self.write_batch:
+                    flush()
+            flush()
+        except Exception as e:
+            self._fail(e)
+            # Keep draining so workers never block on a full results queue
+            while finished_workers < self.workers:
+                if self._results.get() is None:
+                    finished_workers += 1
+
+    # -- Plumbing ------------------------------------------------------------
+
+    def _put(self, q: "queue.Queue", item):
+        """Queue an item, giving up if the run is being stopped."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _fail(self, error: BaseException):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _save_checkpoint(self, last_id: int):
+        if not self.checkpoint_path or self.worker_id:
+            return
+        data = load_checkpoint(self.checkpoint_path)
+        data[self.kind] = {"last_id": last_id, "updated_at": time.strftime('%Y-%m-%dT%H:%M:%S')}
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _report_progress(self, started: float, done: threading.Event):
+        while not done.wait(self.progress_interval):
+            elapsed = time.time() - started
+            filled = self.embedded + self.reused
+            rate = filled / elapsed if elapsed else 0
+            remaining = self.total - filled - self.failed
+            eta = f"{remaining / rate:,.0f}s" if rate else "?"
+            percent = (filled / self.total * 100) if self.total else 100
+            print(f"  {self.kind}: {filled:,}/{self.total:,} ({percent:.1f}%)  "
+                  f"{rate:,.1f} rows/s  ETA {eta}  calls {self.api_calls:,}  "
+                  f"reused {self.reused:,}  retries {self.retries}")
+
+    def _calls_saved(self) -> int:
+        """Estimated API calls avoided by deduplication (same batch limits, one input per row)."""
+        if not self.texts:
+            return 0
+        rows = self.embedded + self.reused
+        tokens = self.tokens * rows / self.texts
+        without = max(math.ceil(rows / self.batch_texts), math.ceil(tokens / self.batch_tokens))
+        return max(0, without - self.batches)
+
+    def run(self) -> Dict[str, Any]:
+        """Run the backfill to completion; returns a summary (raises if the reader or writer failed)."""
+        resume_from, behind = 0, 0
+        if self.checkpoint_path and not self.worker_id:
+            resume_from = load_checkpoint(self.checkpoint_path).get(self.kind, {}).get('last_id', 0)
+            if resume_from:
+                print(f"  Resuming {self.kind} after id {resume_from} (checkpoint)")
+                # Duplicates skipped before the interruption sit behind the checkpoint
+                behind = len(self._reuse_embeddings())
+
+        if self.worker_id:
+            # Forget leases whose holders died (including leases on since-deleted rows)
+            with get_cursor() as cursor:
+                cursor.execute("DELETE FROM rag_embedding_leases WHERE kind = %s AND leased_until <= NOW()",
+                               (self.kind,))
+
+        self.total = self._pending_count(resume_from) + behind
+        started = time.time()
+        threads = [threading.Thread(target=self._read, args=(resume_from,), name=f"{self.kind}-reader")]
+        threads += [threading.Thread(target=self._work_loop, name=f"{self.kind}-worker-{i}")
+                    for i in range(self.workers)]
+        threads.append(threading.Thread(target=self._write_loop, args=(resume_from,), name=f"{self.kind}-writer"))
+
+        done = threading.Event()
+        if self.progress_interval:
+            threading.Thread(target=self._report_progress, args=(started, done), daemon=True).start()
+
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print(f"\n  Interrupted; stopping {self.kind} backfill (checkpoint kept)")
+            self._stop.set()
+            raise
+        finally:
+            done.set()
+
+        if self._error is not None:
+            raise self._error
+
+        # Rows whose text was embedded earlier in this run copy it now
+        if self._deferred:
+            filled = self._reuse_embeddings(self._deferred)
+            missing = set(self._deferred) - set(filled)
+            self.failed += len(missing)  # Their text's batch failed; still pending
+
+        elapsed = time.time() - started
+        filled = self.embedded + self.reused
+        return {
+            'kind': self.kind,
+            'pending': self.total,
+            'embedded': self.embedded,
+            'reused': self.reused,
+            'failed': self.failed,
+            'texts_sent': self.texts,
+            'api_calls': self.api_calls,
+            'api_calls_saved': self._calls_saved(),
+            'retries': self.retries,
+            'tokens': self.tokens,
+            'seconds': round(elapsed, 2),
+            'rows_per_sec': round(filled / elapsed, 1) if elapsed else 0.0,
+        }
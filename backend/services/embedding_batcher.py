@@ -0,0 +1,168 @@
+"""
+Micro-batching dispatcher for single-text embedding requests.
+Concurrent callers' texts are collected for a short window (or until the batch is
+full) and sent as one embeddings request; each caller gets its own vector back.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional
+import sys
+sys.path.append('..')
+from config import config
+
+
+class EmbeddingBatcher:
+    """
+    Collects embedding requests on a background thread and dispatches them in batches.
+
+    Args:
+        embed_batch: Embeds a list of texts, returning vectors in the same order
+        window_ms: How long to wait for more texts after the first one arrives
+        max_batch: Dispatch immediately once this many texts are queued
+        max_in_flight: Batches that may be awaiting the provider at once
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]],
+                 window_ms: float = 5.0, max_batch: int = 64, max_in_flight: int = 4):
+        self.embed_batch = embed_batch
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embedding-batch")
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._batches = 0
+        self._texts = 0
+        self._max_batch_seen = 0
+        self._delays_ms: List[float] = []
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for embedding; the future resolves to its vector."""
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def embed(self, text: str, timeout: Optional[float] = 30) -> List[float]:
+        """Embed a single text through the batcher (blocks until its batch completes)."""
+        return self.submit(text).result(timeout)
+
+    def close(self):
+        """Stop the dispatcher thread after the queued requests are served."""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._pool.shutdown(wait=True)
+
+    def metrics(self) -> dict:
+        """Batch size and queueing delay statistics since start."""
+        with self._metrics_lock:
+            delays = sorted(self._delays_ms)
+            batches, texts = self._batches, self._texts
+            max_seen = self._max_batch_seen
+
+        def percentile(p: float) -> float:
+            return round(delays[min(len(delays) - 1, int(len(delays) * p))], 2) if delays else 0.0
+
+        return {
+            "batches": batches,
+            "texts": texts,
+            "avg_batch_size": round(texts / batches, 2) if batches else 0.0,
+            "max_batch_size": max_seen,
+            "queue_delay_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "max": round(delays[-1], 2) if delays else 0.0,
+            },
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+        }
+
+    def _collect(self) -> Optional[list]:
+        """Block for the first request, then gather more until the window closes or the batch fills."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # Serve this batch, then stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Keep collecting the next batch while this one awaits the provider
+            self._slots.acquire()
+            self._pool.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: list):
+        try:
+            self._embed(batch)
+        finally:
+            self._slots.release()
+
+    def _embed(self, batch: list):
+        dispatched_at = time.perf_counter()
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            vectors = dict(zip(texts, self.embed_batch(texts)))
+            for text, future, _ in batch:
+                future.set_result(vectors[text])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+        with self._metrics_lock:
+            self._batches += 1
+            self._texts += len(batch)
+            self._max_batch_seen = max(self._max_batch_seen, len(batch))
+            self._delays_ms.extend((dispatched_at - queued_at) * 1000 for _, _, queued_at in batch)
+            # Keep a bounded window of recent delays
+            if len(self._delays_ms) > 10000:
+                del self._delays_ms[:-10000]
+
+
+_batcher: Optional[EmbeddingBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> Optional[EmbeddingBatcher]:
+    """Shared batcher over generate_embeddings_batch (None when batching is disabled)."""
+    global _batcher
+    if not config.EMBEDDING_BATCH_ENABLED:
+        return None
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                from services.embedding_service import generate_embeddings_batch
+                _batcher = EmbeddingBatcher(
+                    generate_embeddings_batch,
+                    window_ms=config.EMBEDDING_BATCH_WINDOW_MS,
+                    max_batch=config.EMBEDDING_BATCH_MAX_SIZE,
+                    max_in_flight=config.EMBEDDING_BATCH_MAX_IN_FLIGHT
+                )
+    return _batcher
+
+
+def get_batcher_metrics() -> dict:
+    """Metrics of the shared batcher, or its disabled status."""
+    if _batcher is None:
+        return {"enabled": config.EMBEDDING_BATCH_ENABLED, "started": False}
+    return {"enabled": True, "started": True, **_batcher.metrics()}
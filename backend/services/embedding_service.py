@@ -6,14 +6,16 @@ Uses OpenAI's text-embedding-3-small model with Redis caching.
 from openai import OpenAI
 from typing import List
 import hashlib
+import time
 import sys
 sys.path.append('..')
 from config import config
-from services.redis_cache import cache_get, cache_set
+from services.redis_cache import cached_compute, cached_get_many, cache_store_many
+from services.embedding_batcher import get_batcher
 
 
 # Initialize OpenAI client
-client = OpenAI(api_key=config.OPENAI_API_KEY)
+client = OpenAI(api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_BASE_URL or None)
 
 
 def get_embedding_cache_key(text: str) -> str:
@@ -32,23 +34,20 @@ def generate_embedding(text: str) -> List[float]:
     Returns:
         List of floats representing the embedding vector
     """
-    # Check cache first
-    cache_key = get_embedding_cache_key(text)
-    cached = cache_get(cache_key)
-    if cached is not None:
-        return cached
+    def compute() -> List[float]:
+        # Concurrent callers are coalesced into one batched API call
+        batcher = get_batcher()
+        if batcher is not None:
+            return batcher.embed(text)
 
-    # Generate embedding via OpenAI
-    response = client.embeddings.create(
-        model=config.EMBEDDING_MODEL,
-        input=text
-    )
-    embedding = response.data[0].embedding
-
-    # Cache for 24 hours (embeddings don't change)
-    cache_set(cache_key, embedding, ttl=86400)
+        response = client.embeddings.create(
+            model=config.EMBEDDING_MODEL,
+            input=text
+        )
+        return response.data[0].embedding
 
-    return embedding
+    # Cache for 24 hours (embeddings don't change); concurrent misses share one API call
+    return cached_compute(get_embedding_cache_key(text), compute, ttl=86400)
 
 
 def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
@@ -70,6 +69,32 @@ def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
     return [item.embedding for item in sorted_data]
 
 
+def generate_embeddings_cached(texts: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings for multiple texts, embedding all cache misses in one API call.
+
+    Args:
+        texts: List of texts to embed (duplicates are embedded once)
+
+    Returns:
+        List of embedding vectors, in the order of texts
+    """
+    unique = list(dict.fromkeys(texts))
+    keys = [get_embedding_cache_key(t) for t in unique]
+    # Same keys and envelope shape as generate_embedding, so either path can serve the other
+    embeddings = dict(zip(unique, cached_get_many(keys)))
+
+    misses = [t for t in unique if embeddings[t] is None]
+    if misses:
+        start = time.time()
+        fresh = generate_embeddings_batch(misses)
+        embeddings.update(zip(misses, fresh))
+        cache_store_many({get_embedding_cache_key(t): e for t, e in zip(misses, fresh)}, ttl=86400,
+                         delta=(time.time() - start) / len(misses))
+
+    return [embeddings[t] for t in texts]
+
+
 def create_search_embedding(query: str) -> List[float]:
     """
     Create an embedding optimized for search queries.
@@ -84,3 +109,8 @@ def create_search_embedding(query: str) -> List[float]:
     # Add search context to improve matching
     search_text = f"Search query: {query}"
     return generate_embedding(search_text)
+
+
+def create_search_embeddings(queries: List[str]) -> List[List[float]]:
+    """Batch version of create_search_embedding (one API call for all cache misses)."""
+    return generate_embeddings_cached([f"Search query: {q}" for q in queries])
@@ -0,0 +1,290 @@
+"""
+Vector index maintenance.
+IVFFlat centroids are trained on the rows present when the index is built, so an
+index created on an empty table (migration 001) or sized for another catalog
+(migration 005) searches poorly. This module measures each embedded table and
+rebuilds its index with lists sized to the data:
+
+    lists = rows / 1000 up to 1M rows, sqrt(rows) above (pgvector's guidance)
+
+Rebuilds never block searches or writes: the new index is built CONCURRENTLY under a
+temporary name and swapped in with a short lock. Each build records its lists and row
+count in the index comment, which later checks compare against.
+"""
+
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+import sys
+sys.path.append('..')
+from psycopg2 import errors, sql
+from config import config
+from utils.database import get_connection, get_cursor
+
+# Canonical ANN index per embedded column; other ANN indexes on the column are redundant
+VECTOR_INDEXES = {
+    'movies': {'table': 'rag_movies', 'column': 'plot_embedding', 'index': 'idx_rag_movies_plot_embedding'},
+    'reviews': {'table': 'rag_reviews', 'column': 'review_embedding', 'index': 'idx_rag_reviews_review_embedding'},
+}
+
+MAX_LISTS_RATIO = 2.0  # Rebuild when lists is off target by more than this factor
+
+
+def target_lists(rows: int) -> int:
+    """IVFFlat lists for a number of embedded rows."""
+    if rows > 1_000_000:
+        return int(math.sqrt(rows))
+    return max(1, rows // 1000)
+
+
+def _connect():
+    """Autocommit connection (CONCURRENTLY cannot run inside a transaction block)."""
+    conn = get_connection()
+    conn.autocommit = True
+    return conn
+
+
+def _ann_indexes(cursor, table: str, column: str) -> List[Dict[str, Any]]:
+    """ANN indexes on a column: name, access method, options, validity, size and build record."""
+    cursor.execute("""
+        SELECT i.relname as name, am.amname as method, i.reloptions as options, x.indisvalid as valid,
+               pg_relation_size(i.oid) as size_bytes, obj_description(i.oid, 'pg_class') as comment
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_am am ON am.oid = i.relam
+        JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey)
+        WHERE x.indrelid = %s::regclass AND a.attname = %s AND am.amname IN ('ivfflat', 'hnsw')
+        ORDER BY i.relname
+    """, (table, column))
+    return [dict(zip(('name', 'method', 'options', 'valid', 'size_bytes', 'comment'), row))
+            for row in cursor.fetchall()]
+
+
+def _build_record(comment: Optional[str]) -> Dict[str, Any]:
+    try:
+        record = json.loads(comment or '')
+        return record if isinstance(record, dict) else {}
+    except ValueError:
+        return {}
+
+
+def _lists(options: Optional[List[str]]) -> Optional[int]:
+    for option in options or []:
+        key, _, value = option.partition('=')
+        if key == 'lists':
+            return int(value)
+    return None
+
+
+def inspect_vector_index(kind: str, cursor=None) -> Dict[str, Any]:
+    """
+    Measure one embedded table and decide whether its index needs a rebuild.
+
+    Returns:
+        Row counts, embedding coverage, current and target lists, index size,
+        redundant indexes and a rebuild reason (None when the index is fine)
+    """
+    if cursor is None:
+        conn = _connect()
+        try:
+            with conn.cursor() as own_cursor:
+                return inspect_vector_index(kind, own_cursor)
+        finally:
+            conn.close()
+
+    spec = VECTOR_INDEXES[kind]
+    cursor.execute(sql.SQL("SELECT COUNT(*), COUNT({column}) FROM {table}").format(
+        column=sql.Identifier(spec['column']), table=sql.Identifier(spec['table'])))
+    rows, embedded = cursor.fetchone()
+    indexes = _ann_indexes(cursor, spec['table'], spec['column'])
+    current = next((ix for ix in indexes if ix['name'] == spec['index']), None)
+    lists = _lists(current['options']) if current else None
+    record = _build_record(current['comment']) if current else {}
+    target = target_lists(embedded)
+
+    reason = None
+    if current is None:
+        reason = "index missing"
+    elif not current['valid']:
+        reason = "index invalid"
+    elif current['method'] != 'ivfflat' or lists is None:
+        reason = f"index is {current['method']}, expected ivfflat"
+    elif 'rows' not in record:
+        reason = "no build record (centroids may predate the data)"
+    elif max(lists, target) / min(lists, target) > MAX_LISTS_RATIO:
+        reason = f"lists {lists} is far from target {target}"
+    elif max(embedded, 1) / max(record['rows'], 1) > config.INDEX_REBUILD_GROWTH \
+            or max(record['rows'], 1) / max(embedded, 1) > config.INDEX_REBUILD_GROWTH:
+        reason = f"embedded rows changed from {record['rows']:,} to {embedded:,} since the build"
+    if reason and not embedded:
+        reason = None  # Nothing to train on yet; keep whatever exists
+
+    return {
+        'kind': kind,
+        'table': spec['table'],
+        'index': spec['index'],
+        'rows': rows,
+        'embedded': embedded,
+        'coverage': round(embedded / rows, 4) if rows else 0.0,
+        'lists': lists,
+        'target_lists': target,
+        'recommended_probes': max(1, round(math.sqrt(target))),
+        'size_bytes': current['size_bytes'] if current else 0,
+        'built': record,
+        'redundant': [ix['name'] for ix in indexes if ix['name'] != spec['index']],
+        'rebuild_reason': reason,
+    }
+
+
+def inspect_vector_indexes() -> List[Dict[str, Any]]:
+    return [inspect_vector_index(kind) for kind in VECTOR_INDEXES]
+
+
+def rebuild_vector_index(kind: str, lists: Optional[int] = None,
+                         maintenance_work_mem: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Rebuild a vector index CONCURRENTLY with lists sized to the embedded rows,
+    then swap it in under the canonical name.
+
+    Args:
+        kind: Key of VECTOR_INDEXES
+        lists: Override the computed lists
+        maintenance_work_mem: Build memory (default: config.INDEX_MAINTENANCE_WORK_MEM)
+
+    Returns:
+        Index name, lists, rows, seconds and sizes before and after
+    """
+    spec = VECTOR_INDEXES[kind]
+    new_name = f"{spec['index']}_new"
+    started = time.time()
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            before = inspect_vector_index(kind, cursor)
+            lists = lists or before['target_lists']
+
+            cursor.execute("SELECT set_config('maintenance_work_mem', %s, false)",
+                           (maintenance_work_mem or config.INDEX_MAINTENANCE_WORK_MEM,))
+            # A failed earlier build leaves an invalid index behind
+            cursor.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(new_name)))
+            cursor.execute(sql.SQL(
+                "CREATE INDEX CONCURRENTLY {new} ON {table} USING ivfflat ({column} vector_cosine_ops) "
+                "WITH (lists = {lists})"
+            ).format(new=sql.Identifier(new_name), table=sql.Identifier(spec['table']),
+                     column=sql.Identifier(spec['column']), lists=sql.Literal(lists)))
+
+            # Swap under a short lock; give up rather than queue behind long transactions
+            record = {'lists': lists, 'rows': before['embedded'], 'built_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            cursor.execute("BEGIN")
+            try:
+                cursor.execute("SET LOCAL lock_timeout = '10s'")
+                cursor.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(spec['index'])))
+                cursor.execute(sql.SQL("ALTER INDEX {} RENAME TO {}").format(
+                    sql.Identifier(new_name), sql.Identifier(spec['index'])))
+                cursor.execute(sql.SQL("COMMENT ON INDEX {} IS {}").format(
+                    sql.Identifier(spec['index']), sql.Literal(json.dumps(record))))
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+            cursor.execute("SELECT pg_relation_size(%s::regclass)", (spec['index'],))
+            size_after = cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        'index': spec['index'],
+        'lists': lists,
+        'rows': before['embedded'],
+        'seconds': round(time.time() - started, 2),
+        'size_before': before['size_bytes'],
+        'size_after': size_after,
+    }
+
+
+def _canonical_valid(kind: str) -> bool:
+    """Whether the canonical index exists and is valid (usable by searches)."""
+    spec = VECTOR_INDEXES[kind]
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            return any(ix['name'] == spec['index'] and ix['valid']
+                       for ix in _ann_indexes(cursor, spec['table'], spec['column']))
+    finally:
+        conn.close()
+
+
+def drop_redundant_indexes(kind: str) -> List[str]:
+    """Drop extra ANN indexes on the column (e.g. the one from migration 001 next to 005's)."""
+    spec = VECTOR_INDEXES[kind]
+    conn = _connect()
+    try:
+        with conn.cursor() as cursor:
+            redundant = [ix['name'] for ix in _ann_indexes(cursor, spec['table'], spec['column'])
+                         if ix['name'] != spec['index']]
+            for name in redundant:
+                cursor.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(name)))
+    finally:
+        conn.close()
+    return redundant
+
+
+def analyze_and_prewarm(kind: str, prewarm: bool = True) -> Dict[str, Any]:
+    """
+    ANALYZE the table, then load its vector index into shared buffers.
+    Pre-warming is skipped when the pg_prewarm extension is not installed.
+    """
+    spec = VECTOR_INDEXES[kind]
+    result: Dict[str, Any] = {'analyzed': False, 'prewarmed_blocks': None}
+    with get_cursor(dict_cursor=False) as cursor:
+        cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(spec['table'])))
+        result['analyzed'] = True
+    if prewarm:
+        try:
+            with get_cursor(dict_cursor=False) as cursor:
+                cursor.execute("SELECT pg_prewarm(%s::regclass)", (spec['index'],))
+                result['prewarmed_blocks'] = cursor.fetchone()[0]
+        except (errors.UndefinedFunction, errors.UndefinedTable):
+            pass  # Extension or index missing
+    return result
+
+
+def maintain_vector_indexes(kinds: Optional[List[str]] = None, force: bool = False, prewarm: bool = True,
+                            maintenance_work_mem: Optional[str] = None,
+                            before_step: Optional[Callable[[str], None]] = None) -> List[Dict[str, Any]]:
+    """
+    Check every vector index and rebuild the ones that no longer fit the data; then,
+    once the canonical index is valid, drop redundant ones, ANALYZE, and pre-warm.
+
+    Args:
+        kinds: Subset of VECTOR_INDEXES (default: all)
+        force: Rebuild even when the current index looks fine
+        prewarm: Load indexes into shared buffers afterwards
+        maintenance_work_mem: Build memory (default: config.INDEX_MAINTENANCE_WORK_MEM)
+        before_step: Called with a step description before each step (jobs use it to pause or stop)
+
+    Returns:
+        One report per kind
+    """
+    def step(description: str):
+        if before_step:
+            before_step(description)
+
+    reports = []
+    for kind in kinds or list(VECTOR_INDEXES):
+        step(f"inspect {kind}")
+        report = inspect_vector_index(kind)
+        reason = report['rebuild_reason'] or ("forced" if force and report['embedded'] else None)
+        if reason:
+            step(f"rebuild {report['index']} ({reason})")
+            report['rebuild'] = rebuild_vector_index(kind, maintenance_work_mem=maintenance_work_mem)
+        # A redundant index may be the only working one until the canonical index is valid
+        if report['redundant'] and _canonical_valid(kind):
+            step(f"drop redundant {kind} indexes")
+            report['dropped'] = drop_redundant_indexes(kind)
+        step(f"analyze and prewarm {kind}")
+        report.update(analyze_and_prewarm(kind, prewarm))
+        reports.append(report)
+    return reports
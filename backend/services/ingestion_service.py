@@ -0,0 +1,214 @@
+"""
+Ingestion service.
+Batched, idempotent upserts of catalog rows keyed by their source identifier,
+followed by targeted cache invalidation for the rows that actually changed.
+
+Changed rows need no explicit queue for embedding: new rows have no embedding and
+edited rows no longer match their stored text hash, so any backfill picks them up;
+embed_ingested queues one restricted to them so they are searchable sooner.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+sys.path.append('..')
+from psycopg2.extras import execute_values
+from utils.database import get_cursor
+from services.people_service import sync_movie_people
+from services.change_listener import get_change_listener
+from services.redis_cache import (
+    invalidate_movie_details,
+    invalidate_stats,
+    bump_search_version,
+    bump_data_version
+)
+
+MOVIE_FIELDS = ('title', 'year', 'director', 'genre', 'plot', 'rating', 'runtime_minutes', 'actors')
+REVIEW_FIELDS = ('movie_id', 'reviewer_name', 'review_text', 'rating', 'review_date')
+
+
+def upsert_movies(movies: List[Dict[str, Any]], cursor=None, page_size: int = 500) -> List[int]:
+    """
+    Insert or update movies by external_id in batches.
+    Rows whose values are unchanged are left untouched (no new row version, no trigger work).
+
+    Args:
+        movies: Dicts with external_id and MOVIE_FIELDS (the last one wins per external_id)
+        cursor: Existing cursor to run in the caller's transaction (opens one if None)
+        page_size: Rows per INSERT statement
+
+    Returns:
+        Ids of movies that were inserted or changed
+    """
+    if cursor is None:
+        with get_cursor() as own_cursor:
+            return upsert_movies(movies, own_cursor, page_size)
+
+    # One statement cannot update the same row twice
+    latest = {movie['external_id']: movie for movie in movies}
+    if not latest:
+        return []
+
+    columns = ', '.join(MOVIE_FIELDS)
+    changed = ' OR '.join(f"m.{field} IS DISTINCT FROM EXCLUDED.{field}" for field in MOVIE_FIELDS)
+    sql = f"""
+        INSERT INTO rag_movies AS m (external_id, {columns})
+        VALUES %s
+        ON CONFLICT (external_id) DO UPDATE
+            SET {', '.join(f"{field} = EXCLUDED.{field}" for field in MOVIE_FIELDS)}
+            WHERE {changed}
+        RETURNING m.id
+    """
+    template = "(%s, %s, %s, %s, %s, %s, %s, %s, %s::text[])"
+    rows = [(external_id, *(movie.get(field) for field in MOVIE_FIELDS[:-1]), movie.get('actors') or [])
+            for external_id, movie in latest.items()]
+
+    result = execute_values(cursor, sql, rows, template=template, page_size=page_size, fetch=True)
+    ids = [row['id'] if isinstance(row, dict) else row[0] for row in result]
+
+    # Casts and directors may have changed
+    sync_movie_people(ids, cursor)
+    return ids
+
+
+def resolve_movie_ids(reviews: List[Dict[str, Any]], cursor) -> Dict[Any, int]:
+    """
+    Map the movie references in reviews (movie_id or movie_external_id) to existing movie ids.
+
+    Returns:
+        {movie_id: movie_id, movie_external_id: movie_id} for every reference that exists
+    """
+    ids = list({r['movie_id'] for r in reviews if r.get('movie_id') is not None})
+    external_ids = list({r['movie_external_id'] for r in reviews if r.get('movie_external_id')})
+    cursor.execute(
+        "SELECT id, external_id FROM rag_movies WHERE id = ANY(%s) OR external_id = ANY(%s)",
+        (ids, external_ids)
+    )
+    resolved: Dict[Any, int] = {}
+    for row in cursor.fetchall():
+        resolved[row['id']] = row['id']
+        if row['external_id']:
+            resolved[row['external_id']] = row['id']
+    return resolved
+
+
+def upsert_reviews(reviews: List[Dict[str, Any]], cursor=None,
+                   page_size: int = 500) -> Tuple[List[int], List[int], List[str]]:
+    """
+    Insert or update reviews by external_id in batches.
+    Each review names its movie by movie_id or movie_external_id; unchanged rows are left untouched.
+
+    Args:
+        reviews: Dicts with external_id, a movie reference, reviewer_name, review_text,
+                 rating and optional review_date (the last one wins per external_id)
+        cursor: Existing dict cursor to run in the caller's transaction (opens one if None)
+        page_size: Rows per INSERT statement
+
+    Returns:
+        (ids of reviews inserted or changed, ids of movies whose reviews changed,
+         external_ids rejected because their movie does not exist)
+    """
+    if cursor is None:
+        with get_cursor() as own_cursor:
+            return upsert_reviews(reviews, own_cursor, page_size)
+
+    latest = {review['external_id']: review for review in reviews}
+    if not latest:
+        return [], [], []
+
+    resolved = resolve_movie_ids(list(latest.values()), cursor)
+    rows, rejected = [], []
+    for external_id, review in latest.items():
+        ref = review.get('movie_id') if review.get('movie_id') is not None else review.get('movie_external_id')
+        movie_id = resolved.get(ref)
+        if movie_id is None:
+            rejected.append(external_id)
+            continue
+        rows.append((external_id, movie_id, review.get('reviewer_name'), review.get('review_text'),
+                     review.get('rating'), review.get('review_date')))
+    if not rows:
+        return [], [], rejected
+
+    # A review moved to another movie also changes the movie it left
+    cursor.execute("SELECT external_id, movie_id FROM rag_reviews WHERE external_id = ANY(%s)",
+                   ([row[0] for row in rows],))
+    previous = {row['external_id']: row['movie_id'] for row in cursor.fetchall()}
+
+    columns = ', '.join(REVIEW_FIELDS)
+    changed = ' OR '.join(f"r.{field} IS DISTINCT FROM EXCLUDED.{field}" for field in REVIEW_FIELDS)
+    sql = f"""
+        INSERT INTO rag_reviews AS r (external_id, {columns})
+        VALUES %s
+        ON CONFLICT (external_id) DO UPDATE
+            SET {', '.join(f"{field} = EXCLUDED.{field}" for field in REVIEW_FIELDS)}
+            WHERE {changed}
+        RETURNING r.id, r.external_id, r.movie_id
+    """
+    template = "(%s, %s, %s, %s, %s, COALESCE(%s::date, CURRENT_DATE))"
+    result = execute_values(cursor, sql, rows, template=template, page_size=page_size, fetch=True)
+
+    review_ids, movie_ids = [], set()
+    for row in result:
+        review_ids.append(row['id'])
+        movie_ids.add(row['movie_id'])
+        if row['external_id'] in previous:
+            movie_ids.add(previous[row['external_id']])
+    return review_ids, sorted(movie_ids), rejected
+
+
+def invalidate_changes(movie_ids: List[int], search_changed: bool = True):
+    """
+    Drop exactly the cache entries a write could have affected.
+    Movie details are deleted by key, cached searches are retired by bumping the search
+    version, and the data version moves so ETag-conditional clients refetch.
+
+    Skipped while this process runs the change listener: the commit's notifications
+    make it (or another worker) do the same invalidation once, a debounce window later.
+
+    Args:
+        movie_ids: Movies whose rows or reviews changed
+        search_changed: Whether search results could differ (movie rows, not just reviews)
+    """
+    if not movie_ids or get_change_listener() is not None:
+        return
+    invalidate_movie_details(movie_ids)
+    invalidate_stats()
+    if search_changed:
+        bump_search_version()
+    bump_data_version()
+
+
+def ingest_movies(movies: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Upsert movies in one transaction, then invalidate caches for those that changed."""
+    with get_cursor() as cursor:
+        ids = upsert_movies(movies, cursor)
+    invalidate_changes(ids)
+    return {"received": len(movies), "changed": len(ids), "movie_ids": ids}
+
+
+def ingest_reviews(reviews: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Upsert reviews in one transaction, then invalidate caches for their movies."""
+    with get_cursor() as cursor:
+        review_ids, movie_ids, rejected = upsert_reviews(reviews, cursor)
+    invalidate_changes(movie_ids, search_changed=False)
+    return {"received": len(reviews), "changed": len(review_ids), "review_ids": review_ids,
+            "movie_ids": movie_ids, "rejected": rejected}
+
+
+def embed_ingested(kind: str, ids: List[int], workers: int = 2) -> Optional[Dict[str, Any]]:
+    """
+    Queue an embedding_backfill job for just-ingested rows ('movies' or 'reviews'), so
+    they are embedded within the jobs' share of the API quota, not at the full rate.
+    Failures are reported, not raised: the rows stay pending for generate_embeddings.py.
+
+    Returns:
+        The queued job, or None
+    """
+    if not ids:
+        return None
+    from services.job_runner import enqueue_job
+
+    try:
+        return enqueue_job('embedding_backfill', {'kind': kind, 'only_ids': ids, 'workers': workers})
+    except Exception as e:
+        print(f"⚠ Queueing embedding of {len(ids)} ingested {kind} failed (left pending): {e}")
+        return None
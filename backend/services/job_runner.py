@@ -0,0 +1,497 @@
+"""
+Background job runner for heavy maintenance tasks.
+Embedding backfills, stats rebuilds and index maintenance run inside the API process
+(or any process that starts a runner) without starving live traffic:
+
+- DB connection share: each job type declares the connections it holds, and a job is
+  only claimed while the total across all runners fits config.JOB_DB_CONNECTIONS.
+- API rate share: backfills get config.JOB_API_RATE_SHARE of the embedding quota. Only
+  one backfill runs at a time across all runners, so the share holds in total.
+- Latency back-off: jobs pause between units of work while the p99 of recent API
+  requests (utils.latency; LLM-bound chat routes excluded) is above config.JOB_PAUSE_P99_MS.
+
+Jobs live in rag_jobs (migration 017), so any worker can enqueue one or report on it.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import sys
+sys.path.append('..')
+from psycopg2.extras import Json
+from config import config
+from utils.database import execute_query, get_connection, get_cursor
+from utils.latency import LatencyTracker, request_latency
+
+RESUME_RATIO = 0.8  # Resume once p99 drops below this fraction of the pause threshold
+STALE_SECONDS = 120  # Running jobs without a heartbeat this long lost their runner
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+class JobInterrupted(Exception):
+    """Raised inside a job when its runner is shutting down (the job is requeued)."""
+
+
+class JobContext:
+    """
+    Handle a running job uses to report progress and to yield to live traffic.
+
+    Args:
+        job_id: Row id in rag_jobs
+        runner: Runner executing the job
+    """
+
+    def __init__(self, job_id: int, runner: "JobRunner"):
+        self.job_id = job_id
+        self.runner = runner
+        self.started = time.time()
+        self.done = 0
+        self.total: Optional[int] = None
+        self.message: Optional[str] = None
+        self.paused = False
+        self.cancel_requested = False
+        self._progress_fn: Optional[Callable[[], Tuple[int, Optional[int]]]] = None
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None):
+        """Record progress (published with the next heartbeat)."""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+
+    def track(self, progress_fn: Callable[[], Tuple[int, Optional[int]]]):
+        """Poll (done, total) from progress_fn at every heartbeat instead of calling progress()."""
+        self._progress_fn = progress_fn
+
+    def snapshot(self) -> Tuple[int, Optional[int]]:
+        if self._progress_fn is not None:
+            self.done, self.total = self._progress_fn()
+        return self.done, self.total
+
+    def rate(self) -> Optional[float]:
+        """Units of work per second since the job started."""
+        elapsed = time.time() - self.started
+        return self.done / elapsed if elapsed > 0 and self.done else None
+
+    def gate(self):
+        """
+        Call between units of work: blocks while API latency is high, raises
+        JobCancelled or JobInterrupted when the job should stop.
+        """
+        while True:
+            if self.cancel_requested:
+                raise JobCancelled("Cancelled")
+            if self.runner.stopping:
+                raise JobInterrupted("Runner stopped")
+            if not self.runner.should_pause():
+                self.paused = False
+                return
+            self.paused = True
+            time.sleep(0.5)
+
+
+# -- Job types -----------------------------------------------------------------
+
+def _validate_backfill(params: Dict[str, Any]):
+    from services.embedding_backfill import SOURCES
+    if params.get('kind') not in SOURCES:
+        raise ValueError(f"kind must be one of {sorted(SOURCES)}")
+    if not 1 <= int(params.get('workers', 2)) <= 16:
+        raise ValueError("workers must be between 1 and 16")
+    only_ids = params.get('only_ids')
+    if only_ids is not None and not (isinstance(only_ids, list) and all(isinstance(i, int) for i in only_ids)):
+        raise ValueError("only_ids must be a list of row ids")
+
+
+def run_embedding_backfill(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Embed pending rows of one kind (or just only_ids) within the jobs' share of the
+    API quota. The type is exclusive, so no other backfill shares that quota.
+    """
+    from services.embedding_backfill import EmbeddingBackfill
+    from services.redis_cache import bump_search_version
+
+    share = config.JOB_API_RATE_SHARE
+    backfill = EmbeddingBackfill(params['kind'], workers=int(params.get('workers', 2)),
+                                 rpm=config.EMBEDDING_RPM * share, tpm=config.EMBEDDING_TPM * share,
+                                 progress_interval=0, only_ids=params.get('only_ids'), gate=ctx.gate)
+    ctx.track(lambda: (backfill.embedded + backfill.reused + backfill.failed, backfill.total))
+    summary = backfill.run()
+    if params['kind'] == 'movies' and summary.get('embedded', 0) + summary.get('reused', 0):
+        # New plot embeddings change semantic search results
+        bump_search_version()
+    return summary
+
+
+def _validate_stats(params: Dict[str, Any]):
+    if not isinstance(params.get('rebuild_counters', False), bool):
+        raise ValueError("rebuild_counters must be a boolean")
+
+
+def run_stats_refresh(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Refresh the stats view (and optionally recount the catalog counters from scratch)."""
+    from services.sql_search_service import rebuild_catalog_counters, refresh_statistics
+
+    steps = [("refresh stats view", refresh_statistics)]
+    if params.get('rebuild_counters'):
+        steps.insert(0, ("rebuild catalog counters", rebuild_catalog_counters))
+    for i, (name, step) in enumerate(steps):
+        ctx.gate()
+        ctx.progress(i, len(steps), name)
+        step()
+    ctx.progress(len(steps), len(steps), "done")
+    return {"steps": [name for name, _ in steps]}
+
+
+def _rag_indexes() -> List[str]:
+    rows = execute_query("SELECT indexname FROM pg_indexes WHERE tablename LIKE 'rag\\_%%' ORDER BY indexname")
+    return [row['indexname'] for row in rows or []]
+
+
+def _validate_index(params: Dict[str, Any]):
+    if params.get('index') not in _rag_indexes():
+        raise ValueError("index must name an existing index on a rag_ table")
+
+
+def run_index_rebuild(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild one index without blocking writes (REINDEX CONCURRENTLY)."""
+    ctx.gate()
+    ctx.progress(0, 1, f"reindexing {params['index']}")
+    started = time.time()
+    conn = get_connection()
+    conn.autocommit = True  # REINDEX CONCURRENTLY cannot run inside a transaction
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX CONCURRENTLY "{params["index"]}"')
+    finally:
+        conn.close()
+    ctx.progress(1, 1, "done")
+    return {"index": params['index'], "seconds": round(time.time() - started, 2)}
+
+
+def _validate_index_maintenance(params: Dict[str, Any]):
+    from services.index_maintenance import VECTOR_INDEXES
+    if not set(params.get('kinds') or []) <= set(VECTOR_INDEXES):
+        raise ValueError(f"kinds must be a subset of {sorted(VECTOR_INDEXES)}")
+    if not isinstance(params.get('force', False), bool):
+        raise ValueError("force must be a boolean")
+
+
+def run_index_maintenance(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild vector indexes that no longer fit the data, then ANALYZE and pre-warm."""
+    from services.index_maintenance import VECTOR_INDEXES, maintain_vector_indexes
+
+    kinds = params.get('kinds') or list(VECTOR_INDEXES)
+    steps = 0
+
+    def before_step(description: str):
+        nonlocal steps
+        ctx.gate()
+        ctx.progress(steps, message=description)
+        steps += 1
+
+    reports = maintain_vector_indexes(kinds, force=params.get('force', False), before_step=before_step)
+    ctx.progress(steps, steps, "done")
+    return {"indexes": reports}
+
+
+def _validate_neighbors(params: Dict[str, Any]):
+    if not isinstance(params.get('full', False), bool):
+        raise ValueError("full must be a boolean")
+    if not 1 <= int(params.get('k', config.NEIGHBORS_K)) <= 100:
+        raise ValueError("k must be between 1 and 100")
+
+
+def run_neighbors_refresh(ctx: JobContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Recompute similar-movie lists (incrementally unless full)."""
+    from services.neighbor_service import refresh_neighbors
+
+    ctx.progress(0, message="loading embeddings")
+    return refresh_neighbors(int(params.get('k', config.NEIGHBORS_K)), full=params.get('full', False),
+                             progress=lambda done, total: ctx.progress(done, total, "computing"),
+                             before_block=ctx.gate)
+
+
+# Handler, parameter check and connections held, per job type; at most one job of an
+# exclusive type runs at a time across all runners
+JOB_TYPES: Dict[str, Dict[str, Any]] = {
+    'embedding_backfill': {'run': run_embedding_backfill, 'validate': _validate_backfill, 'db_connections': 2,
+                           'exclusive': True},
+    'stats_refresh': {'run': run_stats_refresh, 'validate': _validate_stats, 'db_connections': 1},
+    'index_rebuild': {'run': run_index_rebuild, 'validate': _validate_index, 'db_connections': 1},
+    'index_maintenance': {'run': run_index_maintenance, 'validate': _validate_index_maintenance,
+                          'db_connections': 1},
+    'neighbors_refresh': {'run': run_neighbors_refresh, 'validate': _validate_neighbors, 'db_connections': 1},
+}
+
+EXCLUSIVE_TYPES = [name for name, spec in JOB_TYPES.items() if spec.get('exclusive')]
+
+
+# -- Queue -----------------------------------------------------------------------
+
+def _job_view(row: Dict[str, Any]) -> Dict[str, Any]:
+    """API shape of a rag_jobs row, with the ETA derived from rate and remaining work."""
+    job = dict(row)
+    remaining = (job['total'] - job['done']) if job['total'] is not None else None
+    job['eta_seconds'] = (round(remaining / job['rate'], 1)
+                          if remaining is not None and job['rate'] and job['status'] in ('running', 'paused')
+                          else None)
+    return job
+
+
+def enqueue_job(job_type: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Queue a job. Raises ValueError for unknown types or invalid parameters.
+
+    Returns:
+        The queued job
+    """
+    if job_type not in JOB_TYPES:
+        raise ValueError(f"Unknown job type '{job_type}' (one of {sorted(JOB_TYPES)})")
+    params = params or {}
+    JOB_TYPES[job_type]['validate'](params)
+    with get_cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO rag_jobs (job_type, params, db_connections) VALUES (%s, %s, %s) RETURNING *",
+            (job_type, Json(params), JOB_TYPES[job_type]['db_connections'])
+        )
+        return _job_view(cursor.fetchone())
+
+
+def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+    rows = execute_query("SELECT * FROM rag_jobs WHERE id = %s", (job_id,))
+    return _job_view(rows[0]) if rows else None
+
+
+def list_jobs(limit: int = 50, active_only: bool = False) -> List[Dict[str, Any]]:
+    """Most recent jobs first."""
+    where = "WHERE status IN ('queued', 'running', 'paused')" if active_only else ""
+    rows = execute_query(f"SELECT * FROM rag_jobs {where} ORDER BY id DESC LIMIT %s", (limit,))
+    return [_job_view(row) for row in rows or []]
+
+
+def cancel_job(job_id: int) -> Optional[Dict[str, Any]]:
+    """Cancel a queued job at once, or ask its runner to stop a running one."""
+    with get_cursor() as cursor:
+        cursor.execute("""
+            UPDATE rag_jobs
+            SET cancel_requested = TRUE,
+                status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                finished_at = CASE WHEN status = 'queued' THEN NOW() ELSE finished_at END
+            WHERE id = %s
+            RETURNING *
+        """, (job_id,))
+        row = cursor.fetchone()
+    return _job_view(row) if row else None
+
+
+# -- Runner ----------------------------------------------------------------------
+
+class JobRunner:
+    """
+    Claims queued jobs and runs each on its own thread.
+
+    Args:
+        runner_id: Identifies this runner in rag_jobs (default: host-pid-random)
+        db_connections: Global connection budget shared by all runners' jobs
+        pause_p99_ms: Pause jobs while API p99 latency is above this (0 disables)
+        poll_seconds: How often to look for queued jobs
+        latency: Source of API latency samples
+    """
+
+    def __init__(self, runner_id: Optional[str] = None, db_connections: Optional[int] = None,
+                 pause_p99_ms: Optional[float] = None, poll_seconds: Optional[float] = None,
+                 latency: LatencyTracker = request_latency):
+        self.runner_id = runner_id or f"{os.uname().nodename}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.db_connections = db_connections or config.JOB_DB_CONNECTIONS
+        self.pause_p99_ms = pause_p99_ms if pause_p99_ms is not None else config.JOB_PAUSE_P99_MS
+        self.poll_seconds = poll_seconds or config.JOB_POLL_SECONDS
+        self.latency = latency
+        self.stopping = False
+        self._paused = False
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._active: Dict[int, JobContext] = {}
+        self._threads: List[threading.Thread] = []
+
+    def should_pause(self) -> bool:
+        """Whether jobs should wait for live traffic (with hysteresis, so they don't flap)."""
+        if not self.pause_p99_ms:
+            return False
+        p99 = self.latency.p99()
+        if p99 is None:
+            self._paused = False
+        elif self._paused:
+            self._paused = p99 > self.pause_p99_ms * RESUME_RATIO
+        else:
+            self._paused = p99 > self.pause_p99_ms
+        return self._paused
+
+    def status(self) -> Dict[str, Any]:
+        p99 = self.latency.p99()
+        return {
+            "runner_id": self.runner_id,
+            "active_jobs": sorted(self._active),
+            "db_connections": self.db_connections,
+            "api_rate_share": config.JOB_API_RATE_SHARE,
+            "p99_ms": round(p99, 1) if p99 is not None else None,
+            "pause_p99_ms": self.pause_p99_ms,
+            "paused": self._paused,
+        }
+
+    def start(self):
+        for target, name in ((self._claim_loop, "job-claimer"), (self._heartbeat_loop, "job-heartbeat")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop claiming; running jobs stop at their next gate and are requeued."""
+        self.stopping = True
+        self._stop.set()
+        deadline = time.time() + timeout
+        for thread in list(self._threads):
+            thread.join(max(0.0, deadline - time.time()))
+
+    def _claim_loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"⚠ Job runner could not claim jobs: {e}", file=sys.stderr)
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_seconds)
+                continue
+            thread = threading.Thread(target=self._execute, args=(job,), name=f"job-{job['id']}", daemon=True)
+            thread.start()
+            self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Fail jobs whose runner died, then take the oldest queued job that fits the budget
+        (skipping exclusive types that already have a job running).
+        """
+        with get_cursor() as cursor:
+            # Serialize claims so the connection budget holds across runners
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('rag_jobs'))")
+            cursor.execute("""
+                UPDATE rag_jobs
+                SET status = 'failed', error = 'Runner stopped responding', finished_at = NOW()
+                WHERE status IN ('running', 'paused')
+                  AND heartbeat_at < NOW() - make_interval(secs => %s)
+            """, (STALE_SECONDS,))
+            cursor.execute("""
+                WITH used AS (
+                    SELECT COALESCE(SUM(db_connections), 0) AS n
+                    FROM rag_jobs WHERE status IN ('running', 'paused')
+                ),
+                next_job AS (
+                    SELECT j.id
+                    FROM rag_jobs j, used
+                    WHERE j.status = 'queued' AND NOT j.cancel_requested
+                      AND j.db_connections <= %s - used.n
+                      AND NOT (j.job_type = ANY(%s) AND EXISTS (
+                          SELECT 1 FROM rag_jobs r
+                          WHERE r.job_type = j.job_type AND r.status IN ('running', 'paused')))
+                    ORDER BY j.id
+                    LIMIT 1
+                    FOR UPDATE OF j SKIP LOCKED
+                )
+                UPDATE rag_jobs j
+                SET status = 'running', runner_id = %s, started_at = COALESCE(started_at, NOW()),
+                    heartbeat_at = NOW(), error = NULL
+                FROM next_job
+                WHERE j.id = next_job.id
+                RETURNING j.*
+            """, (self.db_connections, EXCLUSIVE_TYPES, self.runner_id))
+            return cursor.fetchone()
+
+    def _execute(self, job: Dict[str, Any]):
+        ctx = JobContext(job['id'], self)
+        with self._lock:
+            self._active[job['id']] = ctx
+        status, result, error = 'succeeded', None, None
+        try:
+            result = JOB_TYPES[job['job_type']]['run'](ctx, job['params'])
+        except JobCancelled:
+            status = 'cancelled'
+        except JobInterrupted:
+            status = 'queued'  # Every job type is safe to run again from the start
+        except Exception as e:
+            status, error = 'failed', f"{type(e).__name__}: {e}"
+            print(f"✗ Job {job['id']} ({job['job_type']}) failed: {error}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._active.pop(job['id'], None)
+        self._finish(ctx, status, result, error)
+
+    def _finish(self, ctx: JobContext, status: str, result: Optional[Dict[str, Any]], error: Optional[str]):
+        done, total = ctx.snapshot()
+        with get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE rag_jobs
+                SET status = %s, result = %s, error = %s, done = %s, total = %s, rate = %s, message = %s,
+                    finished_at = CASE WHEN %s = 'queued' THEN NULL ELSE NOW() END,
+                    runner_id = CASE WHEN %s = 'queued' THEN NULL ELSE runner_id END
+                WHERE id = %s
+            """, (status, Json(result) if result is not None else None, error, done, total, ctx.rate(),
+                  ctx.message, status, status, ctx.job_id))
+
+    def _heartbeat_loop(self):
+        """Publish progress of running jobs and pick up cancellation requests."""
+        while not (self._stop.is_set() and not self._active):
+            with self._lock:
+                active = list(self._active.values())
+            for ctx in active:
+                try:
+                    self._heartbeat(ctx)
+                except Exception as e:
+                    print(f"⚠ Job {ctx.job_id} heartbeat failed: {e}", file=sys.stderr)
+            time.sleep(1.0)
+
+    def _heartbeat(self, ctx: JobContext):
+        done, total = ctx.snapshot()
+        rate = ctx.rate()
+        with get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE rag_jobs
+                SET done = %s, total = %s, rate = %s, message = %s, heartbeat_at = NOW(),
+                    status = CASE WHEN status IN ('running', 'paused') THEN %s ELSE status END
+                WHERE id = %s
+                RETURNING cancel_requested
+            """, (done, total, rate, ctx.message, 'paused' if ctx.paused else 'running', ctx.job_id))
+            row = cursor.fetchone()
+        if row and row['cancel_requested']:
+            ctx.cancel_requested = True
+
+
+_runner: Optional[JobRunner] = None
+
+
+def get_job_runner() -> Optional[JobRunner]:
+    return _runner
+
+
+def start_job_runner() -> Optional[JobRunner]:
+    """Start this process's runner (no-op when disabled or already running)."""
+    global _runner
+    if not config.JOB_RUNNER_ENABLED or _runner is not None:
+        return _runner
+    _runner = JobRunner()
+    _runner.start()
+    return _runner
+
+
+def stop_job_runner():
+    """Stop this process's runner; interrupted jobs go back to the queue."""
+    global _runner
+    if _runner is not None:
+        _runner.stop()
+        _runner = None
@@ -0,0 +1,238 @@
+"""
+Precomputed "more like this" neighbors.
+Top-k most similar movies for every embedded movie, computed from the stored plot
+embeddings with blocked NumPy matrix products (no embedding API calls) and streamed
+into rag_movie_neighbors one query block per transaction (migration 019).
+
+Incremental refreshes recompute only the lists that can have changed: movies that
+are new or re-embedded, lists containing a changed or removed movie, lists cut short
+by deletions, and lists a new or changed movie now outranks their k-th neighbor.
+"""
+
+import io
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import sys
+sys.path.append('..')
+from config import config
+from utils.database import execute_query, get_connection, get_cursor, copy_row
+
+Progress = Callable[[int, int], None]
+
+
+def load_embeddings(page_size: int = 2000) -> Tuple[np.ndarray, np.ndarray, List[Optional[str]]]:
+    """
+    Read every plot embedding, in id order, through a server-side cursor.
+
+    Returns:
+        (ids, unit-normalized float32 matrix, embedding hashes)
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM rag_movies WHERE plot_embedding IS NOT NULL")
+            count = cursor.fetchone()[0]
+        ids = np.zeros(count, dtype=np.int64)
+        matrix = np.zeros((count, config.EMBEDDING_DIMENSIONS), dtype=np.float32)
+        hashes: List[Optional[str]] = []
+        with conn.cursor(name="neighbor_embeddings") as cursor:
+            cursor.itersize = page_size
+            cursor.execute("""
+                SELECT id, plot_embedding::text, plot_embedding_hash
+                FROM rag_movies WHERE plot_embedding IS NOT NULL ORDER BY id
+            """)
+            i = 0
+            for movie_id, embedding, text_hash in cursor:
+                if i == count:
+                    break  # Rows embedded since the count are picked up next time
+                ids[i] = movie_id
+                matrix[i] = np.fromstring(embedding[1:-1], dtype=np.float32, sep=',')
+                hashes.append(text_hash)
+                i += 1
+        conn.commit()
+    finally:
+        conn.close()
+
+    ids, matrix = ids[:i], matrix[:i]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+    return ids, matrix, hashes
+
+
+def top_k(queries: np.ndarray, query_rows: np.ndarray, corpus: np.ndarray, k: int,
+          corpus_block: int = 20000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k cosine neighbors of each query among the corpus rows, excluding itself.
+    The corpus is scanned in blocks so memory stays at len(queries) x corpus_block.
+
+    Args:
+        queries: Normalized query vectors (a slice of corpus)
+        query_rows: Row of each query within corpus (masked out as its own neighbor)
+        corpus: Normalized corpus vectors
+        k: Neighbors per query
+
+    Returns:
+        (corpus rows, similarities), each len(queries) x k, best first; rows are -1
+        (similarity -inf) where the corpus has fewer than k other movies
+    """
+    count = len(queries)
+    best_rows = np.full((count, k), -1, dtype=np.int64)
+    best_sims = np.full((count, k), -np.inf, dtype=np.float32)
+    positions = np.arange(count)
+
+    for start in range(0, len(corpus), corpus_block):
+        sims = queries @ corpus[start:start + corpus_block].T
+        own = query_rows - start
+        inside = (own >= 0) & (own < sims.shape[1])
+        sims[positions[inside], own[inside]] = -np.inf
+
+        cand_sims = np.concatenate([best_sims, sims], axis=1)
+        cand_rows = np.concatenate(
+            [best_rows, np.broadcast_to(np.arange(start, start + sims.shape[1]), sims.shape)], axis=1)
+        keep = np.argpartition(-cand_sims, k - 1, axis=1)[:, :k]
+        best_sims = np.take_along_axis(cand_sims, keep, axis=1)
+        best_rows = np.take_along_axis(cand_rows, keep, axis=1)
+
+    order = np.argsort(-best_sims, axis=1, kind='stable')
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_sims, order, axis=1)
+
+
+def _rows_to_refresh(ids: np.ndarray, matrix: np.ndarray, hashes: List[Optional[str]], k: int,
+                     block_size: int) -> Tuple[np.ndarray, List[int]]:
+    """
+    Rows (indexes into ids) whose neighbor lists must be recomputed, and ids of movies
+    that have a stored list but no embedding any more.
+    """
+    state = {row['movie_id']: row['embedding_hash']
+             for row in execute_query("SELECT movie_id, embedding_hash FROM rag_movie_neighbor_state") or []}
+    present = set(ids.tolist())
+    removed = [movie_id for movie_id in state if movie_id not in present]
+
+    stale = np.array([int(movie_id) not in state or state[int(movie_id)] != text_hash
+                      for movie_id, text_hash in zip(ids, hashes)], dtype=bool)
+    refresh = stale.copy()
+
+    # Lists that contain a re-embedded or removed movie
+    changed = [int(movie_id) for movie_id, is_stale in zip(ids, stale) if is_stale and int(movie_id) in state]
+    if changed or removed:
+        containing = execute_query(
+            "SELECT DISTINCT movie_id FROM rag_movie_neighbors WHERE neighbor_id = ANY(%s)",
+            (changed + removed,)
+        ) or []
+        refresh |= np.isin(ids, [row['movie_id'] for row in containing])
+
+    # Lists shorter than they should be (a neighbor was deleted), and each list's k-th similarity
+    expected = min(k, len(ids) - 1)
+    lists = execute_query("""
+        SELECT movie_id, COUNT(*) as n, MIN(similarity) as kth
+        FROM rag_movie_neighbors GROUP BY movie_id
+    """) or []
+    kth = np.full(len(ids), -np.inf if expected > 0 else np.inf, dtype=np.float32)  # No list yet: short
+    row_of = {int(movie_id): row for row, movie_id in enumerate(ids)}
+    for entry in lists:
+        row = row_of.get(entry['movie_id'])
+        if row is not None:
+            kth[row] = entry['kth'] if entry['n'] >= expected else -np.inf
+    refresh |= np.isneginf(kth)
+
+    # New or changed movies that beat the k-th neighbor of an otherwise current list
+    stale_rows = np.flatnonzero(stale)
+    if len(stale_rows):
+        candidates = np.flatnonzero(~refresh)
+        for start in range(0, len(candidates), block_size):
+            block = candidates[start:start + block_size]
+            best = (matrix[block] @ matrix[stale_rows].T).max(axis=1)
+            refresh[block[best > kth[block]]] = True
+
+    return np.flatnonzero(refresh), removed
+
+
+def _write_block(cursor, movie_ids: List[int], rows: List[Tuple[int, int, int, float]],
+                 state: List[Tuple[int, Optional[str]]]):
+    """Replace the lists of movie_ids (one transaction per call keeps each list consistent)."""
+    cursor.execute("DELETE FROM rag_movie_neighbors WHERE movie_id = ANY(%s)", (movie_ids,))
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(copy_row(row))
+    buffer.seek(0)
+    cursor.copy_expert("COPY rag_movie_neighbors (movie_id, rank, neighbor_id, similarity) FROM STDIN", buffer)
+    cursor.execute("""
+        INSERT INTO rag_movie_neighbor_state (movie_id, embedding_hash, computed_at)
+        SELECT unnest(%s::int[]), unnest(%s::text[]), NOW()
+        ON CONFLICT (movie_id) DO UPDATE
+            SET embedding_hash = EXCLUDED.embedding_hash, computed_at = EXCLUDED.computed_at
+    """, ([movie_id for movie_id, _ in state], [text_hash for _, text_hash in state]))
+
+
+def refresh_neighbors(k: Optional[int] = None, full: bool = False, block_size: int = 1024,
+                      corpus_block: int = 20000, progress: Optional[Progress] = None,
+                      before_block: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Compute or update every movie's top-k neighbor list.
+
+    Args:
+        k: Neighbors per movie (default: config.NEIGHBORS_K)
+        full: Recompute every list instead of only the ones that may have changed
+        block_size: Query movies per matrix block and per write transaction
+        corpus_block: Corpus movies per matrix block
+        progress: Called with (lists written, lists to write) after each block
+        before_block: Called before each block (jobs use it to pause or stop)
+
+    Returns:
+        Movies, lists recomputed, removed lists, rows written and timings
+    """
+    k = k or config.NEIGHBORS_K
+    started = time.time()
+    ids, matrix, hashes = load_embeddings()
+    loaded = time.time()
+
+    if full:
+        todo = np.arange(len(ids))
+        stored = execute_query("SELECT movie_id FROM rag_movie_neighbor_state") or []
+        present = set(ids.tolist())
+        removed = [row['movie_id'] for row in stored if row['movie_id'] not in present]
+    else:
+        todo, removed = _rows_to_refresh(ids, matrix, hashes, k, block_size)
+
+    if removed:
+        with get_cursor(dict_cursor=False) as cursor:
+            cursor.execute("DELETE FROM rag_movie_neighbors WHERE movie_id = ANY(%s)", (removed,))
+            cursor.execute("DELETE FROM rag_movie_neighbor_state WHERE movie_id = ANY(%s)", (removed,))
+
+    written = 0
+    for start in range(0, len(todo), block_size):
+        if before_block:
+            before_block()
+        block = todo[start:start + block_size]
+        neighbor_rows, sims = top_k(matrix[block], block, matrix, k, corpus_block)
+
+        movie_ids = [int(ids[row]) for row in block]
+        rows = [(movie_id, rank + 1, int(ids[neighbor]), round(float(similarity), 6))
+                for movie_id, neighbors, similarities in zip(movie_ids, neighbor_rows, sims)
+                for rank, (neighbor, similarity) in enumerate(zip(neighbors, similarities))
+                if neighbor >= 0]
+        with get_cursor(dict_cursor=False) as cursor:
+            _write_block(cursor, movie_ids, rows, [(int(ids[row]), hashes[row]) for row in block])
+        written += len(block)
+        if progress:
+            progress(written, len(todo))
+
+    if written or removed:
+        from services.redis_cache import bump_data_version
+        bump_data_version()  # /similar responses are ETag-tagged with the data version
+
+    elapsed = time.time() - started
+    return {
+        'movies': len(ids),
+        'k': k,
+        'lists_recomputed': written,
+        'lists_removed': len(removed),
+        'full': full,
+        'load_seconds': round(loaded - started, 2),
+        'seconds': round(elapsed, 2),
+        'lists_per_sec': round(written / (elapsed - (loaded - started)), 1) if written else 0.0,
+    }
+
@@ -0,0 +1,45 @@
+"""
+People service for the normalized actor/director tables.
+Keeps rag_people / rag_movie_people in sync with rag_movies after ingestion.
+"""
+
+from typing import List, Optional
+import sys
+sys.path.append('..')
+from utils.database import get_cursor
+
+
+def sync_movie_people(movie_ids: Optional[List[int]] = None, cursor=None) -> None:
+    """
+    Rebuild the people links for the given movies from their director/actors columns.
+
+    Args:
+        movie_ids: Movies to resync (all movies when None)
+        cursor: Existing cursor to run in the caller's transaction (opens one if None)
+    """
+    if movie_ids is not None and not movie_ids:
+        return
+
+    sql = "SELECT rag_sync_movie_people(%s::integer[])"
+    if cursor is not None:
+        cursor.execute(sql, (movie_ids,))
+        return
+
+    with get_cursor() as cur:
+        cur.execute(sql, (movie_ids,))
+
+
+def sync_unlinked_movies(cursor=None) -> None:
+    """Link every movie that has no people rows yet (e.g. after a bulk load)."""
+    sql = """
+        SELECT rag_sync_movie_people(ARRAY(
+            SELECT m.id FROM rag_movies m
+            WHERE NOT EXISTS (SELECT 1 FROM rag_movie_people mp WHERE mp.movie_id = m.id)
+        ))
+    """
+    if cursor is not None:
+        cursor.execute(sql)
+        return
+
+    with get_cursor() as cur:
+        cur.execute(sql)
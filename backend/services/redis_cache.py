@@ -5,11 +5,17 @@ Provides significant speedup for repeated queries.
 
 import redis
 import json
+import math
+import time
+import uuid
+import random
 import hashlib
-from typing import Any, Optional
+import threading
+from typing import Any, Callable, Dict, List, Optional
 import sys
 sys.path.append('..')
 from config import config
+from utils.serialization import dumps
 
 # Initialize Redis client
 try:
@@ -23,9 +29,9 @@ try:
     # Test connection
     redis_client.ping()
     REDIS_AVAILABLE = True
-    print("✓ Redis connection established")
+    print("✓ Redis connection established", file=sys.stderr)
 except Exception as e:
-    print(f"⚠ Redis unavailable: {e}")
+    print(f"⚠ Redis unavailable: {e}", file=sys.stderr)
     redis_client = None
     REDIS_AVAILABLE = False
 
@@ -84,26 +90,335 @@ def cache_set(key: str, value: Any, ttl: int = 300):
         pass  # Fail silently if Redis is down
 
 
-def cache_search_results(query: str, results: Any, ttl: int = 300):
-    """Cache search results."""
-    key = f"search:{get_query_hash(query)}"
-    cache_set(key, results, ttl)
+# Delete the lease only if we still own it (it may have expired and been re-acquired)
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Keys this process is already refreshing in the background
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _as_envelope(cached: Optional[str]) -> Optional[dict]:
+    """Decode a cached_compute envelope; anything else stored under the key counts as a miss."""
+    if not cached:
+        return None
+    envelope = json.loads(cached)
+    if isinstance(envelope, dict) and {"v", "exp", "delta"} <= envelope.keys():
+        return envelope
+    return None
+
+
+def _read_envelope(key: str) -> Optional[dict]:
+    """Read a cached_compute envelope: {"v": value, "exp": soft expiry, "delta": compute seconds}."""
+    try:
+        return _as_envelope(redis_client.get(key))
+    except Exception:
+        return None
+
+
+def _acquire_lease(key: str, lease_ttl: int) -> Optional[str]:
+    """Try to become the single recomputer for key; returns the lease token or None."""
+    token = uuid.uuid4().hex
+    try:
+        if redis_client.set(f"lease:{key}", token, nx=True, px=lease_ttl * 1000):
+            return token
+    except Exception:
+        pass
+    return None
+
+
+def _release_lease(key: str, token: str):
+    try:
+        redis_client.eval(_RELEASE_LEASE_SCRIPT, 1, f"lease:{key}", token)
+    except Exception:
+        pass
+
+
+def _compute_and_store(key: str, compute: Callable[[], Any], ttl: int, stale_ttl: int) -> Any:
+    """Run compute() and store the result with its soft expiry and recompute cost."""
+    start = time.time()
+    value = compute()
+    delta = time.time() - start
+    envelope = {"v": value, "exp": time.time() + ttl, "delta": delta}
+    try:
+        redis_client.setex(key, ttl + stale_ttl, dumps(envelope))
+    except Exception:
+        pass  # Fail silently if Redis is down
+    return value
+
+
+def cached_get_many(keys: List[str]) -> List[Optional[Any]]:
+    """
+    Batch read of keys written by cached_compute or cache_store_many, in one round trip.
+    Returns each envelope's value (None for each miss); entries past their soft expiry
+    are still returned, as cached_compute would while refreshing them.
+    """
+    if not REDIS_AVAILABLE or not keys:
+        return [None] * len(keys)
+
+    try:
+        envelopes = [_as_envelope(v) for v in redis_client.mget(keys)]
+        hits = sum(1 for e in envelopes if e is not None)
+        if hits:
+            redis_client.incrby("cache:stats:hits", hits)
+        if hits < len(keys):
+            redis_client.incrby("cache:stats:misses", len(keys) - hits)
+        return [e["v"] if e is not None else None for e in envelopes]
+    except Exception:
+        return [None] * len(keys)
+
+
+def cache_store_many(items: Dict[str, Any], ttl: int = 300, stale_ttl: Optional[int] = None,
+                     delta: float = 0.0):
+    """
+    Batch counterpart of _compute_and_store: write values computed together (e.g. one
+    provider call) in the envelope shape cached_compute reads, in one pipeline.
+
+    Args:
+        items: Key -> value
+        ttl: Seconds the values are considered fresh
+        stale_ttl: Seconds a stale value may still be served (default: ttl)
+        delta: Recompute cost in seconds attributed to each value
+    """
+    if not REDIS_AVAILABLE or not items:
+        return
+
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+    expires = time.time() + ttl
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.setex(key, ttl + stale_ttl, dumps({"v": value, "exp": expires, "delta": delta}))
+        pipe.execute()
+    except Exception:
+        pass  # Fail silently if Redis is down
+
+
+def _refresh_in_background(key: str, compute: Callable[[], Any], ttl: int, stale_ttl: int, lease_ttl: int):
+    """Recompute key on a daemon thread, unless this process or another holds the lease."""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            token = _acquire_lease(key, lease_ttl)
+            if token is None:
+                return
+            try:
+                _compute_and_store(key, compute, ttl, stale_ttl)
+            finally:
+                _release_lease(key, token)
+        except Exception as e:
+            print(f"⚠ Background refresh of {key} failed: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name=f"cache-refresh:{key}", daemon=True).start()
+
+
+def cached_compute(
+    key: str,
+    compute: Callable[[], Any],
+    ttl: int = 300,
+    stale_ttl: Optional[int] = None,
+    beta: float = 1.0,
+    lease_ttl: int = 30
+) -> Any:
+    """
+    Cache-aside with stale-while-revalidate and stampede protection.
+
+    - Fresh hit: returned as is, except that the entry is refreshed early with a
+      probability that grows as expiry approaches and with its recompute cost
+      (XFetch; beta > 1 refreshes earlier).
+    - Stale hit (past ttl, within stale_ttl): the old value is returned immediately
+      and one background refresh is started.
+    - Miss: one caller across all processes holds a Redis lease, computes and stores.
+      The others check the key once more and otherwise compute without storing; they
+      never sleep-poll, since callers may be running on an event loop.
+
+    Without Redis this just calls compute().
+
+    Args:
+        key: Redis key
+        compute: Produces the value (must be JSON-serializable)
+        ttl: Seconds the value is considered fresh
+        stale_ttl: Seconds a stale value may still be served (default: ttl)
+        beta: Early-expiration aggressiveness
+        lease_ttl: Seconds before an abandoned recompute lease is reclaimed
+    """
+    if not REDIS_AVAILABLE:
+        return compute()
+
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+    envelope = _read_envelope(key)
+
+    if envelope is not None:
+        try:
+            redis_client.incr("cache:stats:hits")
+        except Exception:
+            pass
+        now = time.time()
+        early = now - envelope["delta"] * beta * math.log(1.0 - random.random()) >= envelope["exp"]
+        if early:
+            _refresh_in_background(key, compute, ttl, stale_ttl, lease_ttl)
+        return envelope["v"]
+
+    try:
+        redis_client.incr("cache:stats:misses")
+    except Exception:
+        pass
+
+    token = _acquire_lease(key, lease_ttl)
+    if token is not None:
+        try:
+            return _compute_and_store(key, compute, ttl, stale_ttl)
+        finally:
+            _release_lease(key, token)
+
+    # Someone else is computing: use their result if it just landed, else compute
+    # locally and leave storing to the lease holder
+    envelope = _read_envelope(key)
+    if envelope is not None:
+        return envelope["v"]
+    return compute()
+
+
+def invalidate_stats():
+    """Drop cached statistics (call after the stats view is refreshed)."""
+    if not REDIS_AVAILABLE:
+        return
+
+    try:
+        redis_client.delete("stats:detailed")
+    except Exception:
+        pass
+
+
+def movie_detail_key(movie_id: int) -> str:
+    """Cache key for a movie-with-reviews payload."""
+    return f"movie:detail:{movie_id}"
+
+
+def cache_get_many(keys: List[str]) -> List[Optional[Any]]:
+    """Get several cached values in one round trip (None for each miss)."""
+    if not REDIS_AVAILABLE or not keys:
+        return [None] * len(keys)
+
+    try:
+        values = redis_client.mget(keys)
+        hits = sum(1 for v in values if v)
+        if hits:
+            redis_client.incrby("cache:stats:hits", hits)
+        if hits < len(keys):
+            redis_client.incrby("cache:stats:misses", len(keys) - hits)
+        return [json.loads(v) if v else None for v in values]
+    except Exception:
+        return [None] * len(keys)
 
 
-def get_cached_search(query: str) -> Optional[Any]:
-    """Get cached search results."""
-    key = f"search:{get_query_hash(query)}"
-    return cache_get(key)
+def cache_set_many(items: Dict[str, Any], ttl: int = 300):
+    """Set several cached values with the same TTL in one pipeline."""
+    if not REDIS_AVAILABLE or not items:
+        return
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.setex(key, ttl, dumps(value))
+        pipe.execute()
+    except Exception:
+        pass  # Fail silently if Redis is down
+
+
+def invalidate_movie_details(movie_ids: Optional[List[int]] = None):
+    """Drop cached movie detail payloads (all of them when movie_ids is None)."""
+    if not REDIS_AVAILABLE:
+        return
 
+    try:
+        if movie_ids is None:
+            for key in redis_client.scan_iter("movie:detail:*"):
+                redis_client.delete(key)
+        elif movie_ids:
+            redis_client.delete(*[movie_detail_key(i) for i in movie_ids])
+    except Exception:
+        pass
 
-def cache_stats(stats: dict, ttl: int = 3600):
-    """Cache database statistics (1 hour TTL)."""
-    cache_set("stats:detailed", stats, ttl)
 
+def claim_once(keys: List[str], ttl: int = 3600) -> List[bool]:
+    """
+    Claim keys with SET NX in one pipeline, so work shared by several processes runs once.
+    Returns whether this caller claimed each key; without Redis every claim succeeds
+    (there is no shared state to guard).
+    """
+    if not REDIS_AVAILABLE or not keys:
+        return [True] * len(keys)
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, 1, nx=True, ex=ttl)
+        return [bool(claimed) for claimed in pipe.execute()]
+    except Exception:
+        return [True] * len(keys)
 
-def get_cached_stats() -> Optional[dict]:
-    """Get cached statistics."""
-    return cache_get("stats:detailed")
+
+def get_data_version() -> Optional[str]:
+    """
+    Get the catalog data-version token (bumped whenever movie/review data changes).
+    Returns None when Redis is unavailable, since no shared version can be tracked.
+    """
+    if not REDIS_AVAILABLE:
+        return None
+
+    try:
+        return redis_client.get("data:version") or "0"
+    except Exception:
+        return None
+
+
+def bump_data_version():
+    """Advance the data-version token so ETags derived from it change."""
+    if not REDIS_AVAILABLE:
+        return
+
+    try:
+        redis_client.incr("data:version")
+    except Exception:
+        pass
+
+
+def get_search_version() -> str:
+    """
+    Get the search-version token that prefixes search result cache keys.
+    Bumping it orphans every cached search at once; the old entries simply expire.
+    """
+    if not REDIS_AVAILABLE:
+        return "0"
+
+    try:
+        return redis_client.get("version:search") or "0"
+    except Exception:
+        return "0"
+
+
+def bump_search_version():
+    """Advance the search-version token so cached search results are no longer read."""
+    if not REDIS_AVAILABLE:
+        return
+
+    try:
+        redis_client.incr("version:search")
+    except Exception:
+        pass
 
 
 def get_redis_stats() -> dict:
@@ -163,10 +478,12 @@ def invalidate_cache():
         return
 
     try:
-        # Delete all search and stats keys
-        for key in redis_client.scan_iter("search:*"):
-            redis_client.delete(key)
+        # Delete all search, movie detail and stats keys
+        for pattern in ("search:*", "movie:detail:*"):
+            for key in redis_client.scan_iter(pattern):
+                redis_client.delete(key)
         redis_client.delete("stats:detailed")
+        bump_data_version()
         print("✓ Cache invalidated")
     except Exception as e:
         print(f"⚠ Cache invalidation failed: {e}")
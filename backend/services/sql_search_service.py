@@ -6,362 +6,461 @@ Handles filtering, aggregations, and exact matches.
 from typing import List, Dict, Any, Optional
 import sys
 sys.path.append('..')
-from utils.database import execute_query
+from utils.database import execute_query, get_cursor
+from utils.pagination import LastPage, keyset_clause
 
+# Column projections for movie rows. Every projection keeps the keyset sort keys
+# (rating, year, id) so any listing can be paginated whatever fields it returns.
+PROJECTIONS = {
+    'summary': ('id', 'title', 'year', 'rating'),
+    'card': ('id', 'title', 'year', 'director', 'genre', 'rating', 'runtime_minutes'),
+    'full': ('id', 'title', 'year', 'director', 'genre', 'plot', 'rating', 'runtime_minutes', 'actors'),
+}
 
-def get_movies_by_year(year: int) -> List[Dict[str, Any]]:
-    """Get all movies from a specific year."""
-    sql = """
-        SELECT id, title, year, director, genre, plot, rating, runtime_minutes, actors
-        FROM rag_movies
-        WHERE year = %s
-        ORDER BY rating DESC
-    """
-    results = execute_query(sql, (year,))
-    return [dict(row) for row in results] if results else []
 
+def _columns(fields: str, alias: str = '') -> str:
+    """
+    Build the SELECT list for a projection.
 
-def get_movies_by_director(director: str) -> List[Dict[str, Any]]:
-    """Get all movies by a specific director (case-insensitive partial match)."""
-    sql = """
-        SELECT id, title, year, director, genre, plot, rating, runtime_minutes, actors
-        FROM rag_movies
-        WHERE LOWER(director) LIKE LOWER(%s)
-        ORDER BY year DESC
+    Raises:
+        ValueError: If the projection name is unknown
     """
-    results = execute_query(sql, (f'%{director}%',))
-    return [dict(row) for row in results] if results else []
+    if fields not in PROJECTIONS:
+        raise ValueError(f"Unknown field projection '{fields}' (expected one of: {', '.join(PROJECTIONS)})")
+    prefix = f'{alias}.' if alias else ''
+    return ', '.join(prefix + column for column in PROJECTIONS[fields])
 
 
-def get_movies_by_genre(genre: str) -> List[Dict[str, Any]]:
-    """Get all movies of a specific genre (case-insensitive partial match)."""
-    sql = """
-        SELECT id, title, year, director, genre, plot, rating, runtime_minutes, actors
-        FROM rag_movies
-        WHERE LOWER(genre) LIKE LOWER(%s)
-        ORDER BY rating DESC
-    """
-    results = execute_query(sql, (f'%{genre}%',))
+def _rows(sql: str, params: tuple) -> List[Dict[str, Any]]:
+    """Run a list query and return plain dict rows."""
+    results = execute_query(sql, params)
     return [dict(row) for row in results] if results else []
 
 
-def get_movies_by_actor(actor: str) -> List[Dict[str, Any]]:
-    """Get all movies featuring a specific actor (case-insensitive partial match)."""
-    sql = """
-        SELECT id, title, year, director, genre, plot, rating, runtime_minutes, actors
+def _lookup_with_fuzzy_fallback(exact_sql: str, exact_params: tuple,
+                                fuzzy_sql: str, fuzzy_params: tuple,
+                                after: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Run a trigram-indexed substring lookup, falling back to similarity-ranked
+    fuzzy matching (e.g. misspelled names) when the substring match is empty.
+    Fuzzy matches are ranked by similarity, so they only ever fill the first page
+    (returned as a LastPage, which gets no next-page cursor).
+    """
+    results = _rows(exact_sql, exact_params)
+    if not results and after is None:
+        results = LastPage(_rows(fuzzy_sql, fuzzy_params))
+    return results
+
+
+def get_movies_by_year(year: int, limit: Optional[int] = None,
+                       after: Optional[Dict[str, Any]] = None,
+                       fields: str = 'full') -> List[Dict[str, Any]]:
+    """Get movies from a specific year (keyset-paginated by rating, id)."""
+    columns = _columns(fields)
+    keyset, keyset_params = keyset_clause(after, ('rating', 'id'))
+    sql = f"""
+        SELECT {columns}
         FROM rag_movies
-        WHERE EXISTS (
-            SELECT 1 FROM unnest(actors) AS a
-            WHERE LOWER(a) LIKE LOWER(%s)
-        )
-        ORDER BY rating DESC
+        WHERE year = %s AND {keyset}
+        ORDER BY rating DESC, id DESC
+        LIMIT %s
     """
-    results = execute_query(sql, (f'%{actor}%',))
-    return [dict(row) for row in results] if results else []
+    return _rows(sql, (year, *keyset_params, limit))
 
 
-def get_top_rated_movies(limit: int = 10) -> List[Dict[str, Any]]:
-    """Get the highest rated movies."""
-    sql = """
-        SELECT id, title, year, director, genre, plot, rating, runtime_minutes, actors
+def get_movies_by_director(director: str, limit: Optional[int] = None,
+                           after: Optional[Dict[str, Any]] = None,
+                           fields: str = 'full') -> List[Dict[str, Any]]:
+    """Get movies by a specific director (case-insensitive partial match, fuzzy fallback)."""
+    return _get_movies_by_person(director, 'director', ('m.year', 'm.id'), limit, after, fields)
+
+
+def get_movies_by_genre(genre: str, limit: Optional[int] = None,
+                        after: Optional[Dict[str, Any]] = None,
+                        fields: str = 'full') -> List[Dict[str, Any]]:
+    """Get movies of a specific genre (case-insensitive partial match)."""
+    columns = _columns(fields)
+    keyset, keyset_params = keyset_clause(after, ('rating', 'id'))
+    sql = f"""
+        SELECT {columns}
         FROM rag_movies
-        ORDER BY rating DESC
+        WHERE LOWER(genre) LIKE LOWER(%s) AND {keyset}
+        ORDER BY rating DESC, id DESC
         LIMIT %s
     """
-    results = execute_query(sql, (limit,))
-    return [dict(row) for row in results] if results else []
+    return _rows(sql, (f'%{genre}%', *keyset_params, limit))
+
+
+def get_movies_by_actor(actor: str, limit: Optional[int] = None,
+                        after: Optional[Dict[str, Any]] = None,
+                        fields: str = 'full') -> List[Dict[str, Any]]:
+    """Get movies featuring a specific actor (case-insensitive partial match, fuzzy fallback)."""
+    return _get_movies_by_person(actor, 'actor', ('m.rating', 'm.id'), limit, after, fields)
+
+
+def _get_movies_by_person(name: str, role: str, sort_columns: tuple, limit: Optional[int],
+                          after: Optional[Dict[str, Any]], fields: str) -> List[Dict[str, Any]]:
+    """Look up movies through the normalized rag_people / rag_movie_people tables."""
+    columns = _columns(fields, 'm')
+    keyset, keyset_params = keyset_clause(after, sort_columns)
+    order_by = ', '.join(f'{c} DESC' for c in sort_columns)
+    exact_sql = f"""
+        SELECT {columns}
+        FROM rag_movies m
+        WHERE m.id IN (
+            SELECT mp.movie_id
+            FROM rag_people p
+            JOIN rag_movie_people mp ON mp.person_id = p.id AND mp.role = %s
+            WHERE LOWER(p.name) LIKE LOWER(%s)
+        ) AND {keyset}
+        ORDER BY {order_by}
+        LIMIT %s
+    """
+    fuzzy_sql = f"""
+        SELECT {columns}
+        FROM rag_movies m
+        JOIN (
+            SELECT mp.movie_id, MAX(word_similarity(LOWER(%s), LOWER(p.name))) AS score
+            FROM rag_people p
+            JOIN rag_movie_people mp ON mp.person_id = p.id AND mp.role = %s
+            WHERE LOWER(%s) <%% LOWER(p.name)
+            GROUP BY mp.movie_id
+        ) matches ON matches.movie_id = m.id
+        ORDER BY matches.score DESC, {order_by}
+        LIMIT %s
+    """
+    return _lookup_with_fuzzy_fallback(
+        exact_sql, (role, f'%{name}%', *keyset_params, limit),
+        fuzzy_sql, (name, role, name, limit),
+        after
+    )
+
+
+def search_movies_by_title(title: str, limit: Optional[int] = None,
+                           after: Optional[Dict[str, Any]] = None,
+                           fields: str = 'full') -> List[Dict[str, Any]]:
+    """Find movies by title (case-insensitive partial match, fuzzy fallback)."""
+    columns = _columns(fields)
+    keyset, keyset_params = keyset_clause(after, ('rating', 'id'))
+    exact_sql = f"""
+        SELECT {columns}
+        FROM rag_movies
+        WHERE LOWER(title) LIKE LOWER(%s) AND {keyset}
+        ORDER BY rating DESC, id DESC
+        LIMIT %s
+    """
+    fuzzy_sql = f"""
+        SELECT {columns}
+        FROM rag_movies
+        WHERE LOWER(title) %% LOWER(%s)
+        ORDER BY similarity(LOWER(title), LOWER(%s)) DESC, rating DESC, id DESC
+        LIMIT %s
+    """
+    return _lookup_with_fuzzy_fallback(
+        exact_sql, (f'%{title}%', *keyset_params, limit),
+        fuzzy_sql, (title, title, limit),
+        after
+    )
+
+
+def get_top_rated_movies(limit: int = 10, after: Optional[Dict[str, Any]] = None,
+                         fields: str = 'full') -> List[Dict[str, Any]]:
+    """Get the highest rated movies (keyset-paginated by rating, id)."""
+    columns = _columns(fields)
+    keyset, keyset_params = keyset_clause(after, ('rating', 'id'))
+    sql = f"""
+        SELECT {columns}
+        FROM rag_movies
+        WHERE {keyset}
+        ORDER BY rating DESC, id DESC
+        LIMIT %s
+    """
+    return _rows(sql, (*keyset_params, limit))
 
 
-def get_movies_by_rating_range(min_rating: float, max_rating: float = 10.0) -> List[Dict[str, Any]]:
-    """Get movies within a rating range."""
-    sql = """
-        SELECT id, title, year, director, genre, plot, rating, runtime_minutes, actors
+def get_movies_by_rating_range(min_rating: float, max_rating: float = 10.0, limit: Optional[int] = None,
+                               after: Optional[Dict[str, Any]] = None,
+                               fields: str = 'full') -> List[Dict[str, Any]]:
+    """Get movies within a rating range (keyset-paginated by rating, id)."""
+    columns = _columns(fields)
+    keyset, keyset_params = keyset_clause(after, ('rating', 'id'))
+    sql = f"""
+        SELECT {columns}
         FROM rag_movies
-        WHERE rating >= %s AND rating <= %s
-        ORDER BY rating DESC
+        WHERE rating >= %s AND rating <= %s AND {keyset}
+        ORDER BY rating DESC, id DESC
+        LIMIT %s
     """
-    results = execute_query(sql, (min_rating, max_rating))
-    return [dict(row) for row in results] if results else []
+    return _rows(sql, (min_rating, max_rating, *keyset_params, limit))
 
 
-def get_movie_with_reviews(movie_id: int) -> Optional[Dict[str, Any]]:
-    """Get a movie with all its reviews."""
-    movie_sql = """
-        SELECT id, title, year, director, genre, plot, rating, runtime_minutes, actors
+def get_movies_by_ids(movie_ids: List[int], fields: str = 'full') -> List[Dict[str, Any]]:
+    """Hydrate movies by primary key, returned in the order of `movie_ids`."""
+    if not movie_ids:
+        return []
+
+    sql = f"""
+        SELECT {_columns(fields)}
         FROM rag_movies
-        WHERE id = %s
-    """
-    reviews_sql = """
-        SELECT id, reviewer_name, review_text, rating, review_date
-        FROM rag_reviews
-        WHERE movie_id = %s
-        ORDER BY review_date DESC
+        WHERE id = ANY(%s)
     """
+    by_id = {row['id']: row for row in _rows(sql, (list(movie_ids),))}
+    return [by_id[movie_id] for movie_id in movie_ids if movie_id in by_id]
 
-    movies = execute_query(movie_sql, (movie_id,))
-    if not movies:
-        return None
 
-    movie = dict(movies[0])
-    reviews = execute_query(reviews_sql, (movie_id,))
-    movie['reviews'] = [dict(r) for r in reviews] if reviews else []
-
-    return movie
+def get_movie_with_reviews(movie_id: int) -> Optional[Dict[str, Any]]:
+    """Get a movie with all its reviews."""
+    movies = get_movies_with_reviews([movie_id])
+    return movies[0] if movies else None
 
 
-def search_movies_keyword(keyword: str) -> List[Dict[str, Any]]:
-    """Search movies by keyword in title or plot."""
-    sql = """
-        SELECT id, title, year, director, genre, plot, rating, runtime_minutes, actors
+def get_movies_with_reviews(movie_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    Get several movies with all their reviews, in the order of movie_ids.
+    Each movie and its reviews (aggregated to JSON) come back in one query; payloads
+    are cached per movie in Redis when MOVIE_DETAIL_CACHE_TTL is set. Unknown ids are skipped.
+    """
+    from config import config
+    from services.redis_cache import movie_detail_key, cache_get_many, cache_set_many
+
+    ids = list(dict.fromkeys(movie_ids))
+    if not ids:
+        return []
+
+    use_cache = config.MOVIE_DETAIL_CACHE_TTL > 0
+    cached = cache_get_many([movie_detail_key(i) for i in ids]) if use_cache else [None] * len(ids)
+    by_id = {i: movie for i, movie in zip(ids, cached) if movie is not None}
+
+    missing = [i for i in ids if i not in by_id]
+    if missing:
+        sql = """
+            SELECT m.id, m.title, m.year, m.director, m.genre, m.plot, m.rating,
+                   m.runtime_minutes, m.actors,
+                   COALESCE(r.reviews, '[]'::json) as reviews
+            FROM rag_movies m
+            LEFT JOIN LATERAL (
+                SELECT json_agg(json_build_object(
+                           'id', id,
+                           'reviewer_name', reviewer_name,
+                           'review_text', review_text,
+                           'rating', rating,
+                           'review_date', review_date
+                       ) ORDER BY review_date DESC, id DESC) as reviews
+                FROM rag_reviews
+                WHERE movie_id = m.id
+            ) r ON TRUE
+            WHERE m.id = ANY(%s)
+        """
+        fetched = {row['id']: row for row in _rows(sql, (missing,))}
+        by_id.update(fetched)
+        if use_cache and fetched:
+            cache_set_many({movie_detail_key(i): movie for i, movie in fetched.items()},
+                           ttl=config.MOVIE_DETAIL_CACHE_TTL)
+
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def search_movies_keyword(keyword: str, limit: Optional[int] = None,
+                          after: Optional[Dict[str, Any]] = None,
+                          fields: str = 'full') -> List[Dict[str, Any]]:
+    """Search movies by keyword in title or plot (keyset-paginated by rating, id)."""
+    columns = _columns(fields)
+    keyset, keyset_params = keyset_clause(after, ('rating', 'id'))
+    sql = f"""
+        SELECT {columns}
         FROM rag_movies
-        WHERE LOWER(title) LIKE LOWER(%s) OR LOWER(plot) LIKE LOWER(%s)
-        ORDER BY rating DESC
+        WHERE (LOWER(title) LIKE LOWER(%s) OR LOWER(plot) LIKE LOWER(%s)) AND {keyset}
+        ORDER BY rating DESC, id DESC
+        LIMIT %s
     """
     pattern = f'%{keyword}%'
-    results = execute_query(sql, (pattern, pattern))
-    return [dict(row) for row in results] if results else []
+    return _rows(sql, (pattern, pattern, *keyset_params, limit))
 
 
 def get_statistics() -> Dict[str, Any]:
-    """Get basic database statistics."""
+    """
+    Get basic database statistics.
+    Reads the trigger-maintained catalog counters (migration 010), so the cost is
+    summing a few small sharded tables regardless of catalog size.
+    """
     sql = """
+        WITH c AS (
+            SELECT COALESCE(SUM(movie_count), 0)::bigint as movie_count, SUM(rating_sum) as rating_sum
+            FROM rag_catalog_counters
+        ),
+        d AS (
+            SELECT
+                COALESCE(SUM(distinct_count) FILTER (WHERE dimension = 'director'), 0)::bigint as unique_directors,
+                COALESCE(SUM(distinct_count) FILTER (WHERE dimension = 'genre'), 0)::bigint as unique_genres,
+                COALESCE(SUM(distinct_count) FILTER (WHERE dimension = 'reviewer'), 0)::bigint as unique_reviewers,
+                COALESCE(SUM(distinct_count) FILTER (WHERE dimension = 'actor'), 0)::bigint as unique_actors
+            FROM rag_catalog_distinct
+        )
         SELECT
-            COUNT(*) as total_movies,
-            AVG(rating) as avg_rating,
-            MIN(year) as earliest_year,
-            MAX(year) as latest_year,
-            COUNT(DISTINCT director) as unique_directors,
-            COUNT(DISTINCT genre) as unique_genres,
-            (SELECT COUNT(DISTINCT reviewer_name) FROM rag_reviews) as unique_reviewers,
-            (SELECT COUNT(DISTINCT a) FROM rag_movies, unnest(actors) AS a) as unique_actors
-        FROM rag_movies
+            c.movie_count as total_movies,
+            c.rating_sum / NULLIF(c.movie_count, 0) as avg_rating,
+            (SELECT bucket::int FROM rag_catalog_distribution
+             WHERE dimension = 'year' ORDER BY bucket LIMIT 1) as earliest_year,
+            (SELECT bucket::int FROM rag_catalog_distribution
+             WHERE dimension = 'year' ORDER BY bucket DESC LIMIT 1) as latest_year,
+            d.unique_directors, d.unique_genres, d.unique_reviewers, d.unique_actors
+        FROM c, d
     """
     results = execute_query(sql)
     return dict(results[0]) if results else {}
 
 
-def get_detailed_statistics() -> Dict[str, Any]:
-    """Get comprehensive database and vector statistics (cached in Redis for 1 hour)."""
-    from services.redis_cache import get_cached_stats, cache_stats
-
-    # Check cache first
-    cached = get_cached_stats()
-    if cached is not None:
-        return cached
+def rebuild_catalog_counters():
+    """
+    Recompute the catalog counters from the base tables.
+    Only needed after loading data with the counter triggers disabled, or to repair drift.
+    """
+    with get_cursor() as cursor:
+        cursor.execute("SELECT rag_rebuild_catalog_counters()")
 
-    stats = {}
 
-    # Basic movie stats
-    basic_sql = """
-        SELECT
-            COUNT(*) as total_movies,
-            ROUND(AVG(rating)::numeric, 2) as avg_rating,
-            ROUND(MIN(rating)::numeric, 2) as min_rating,
-            ROUND(MAX(rating)::numeric, 2) as max_rating,
-            ROUND(STDDEV(rating)::numeric, 2) as rating_stddev,
-            MIN(year) as earliest_year,
-            MAX(year) as latest_year,
-            COUNT(DISTINCT director) as unique_directors,
-            COUNT(DISTINCT genre) as unique_genres,
-            ROUND(AVG(runtime_minutes)::numeric, 0) as avg_runtime,
-            MIN(runtime_minutes) as min_runtime,
-            MAX(runtime_minutes) as max_runtime,
-            SUM(runtime_minutes) as total_runtime_minutes
-        FROM rag_movies
+def get_detailed_statistics() -> Dict[str, Any]:
     """
-    basic = execute_query(basic_sql)
-    if basic:
-        stats['movies'] = dict(basic[0])
-
-    # Review stats
-    reviews_sql = """
-        SELECT
-            COUNT(*) as total_reviews,
-            ROUND(AVG(rating)::numeric, 2) as avg_review_rating,
-            COUNT(DISTINCT reviewer_name) as unique_reviewers,
-            COUNT(DISTINCT movie_id) as movies_with_reviews
-        FROM rag_reviews
-    """
-    reviews = execute_query(reviews_sql)
-    if reviews:
-        stats['reviews'] = dict(reviews[0])
-
-    # Vector embedding stats
-    vector_sql = """
-        SELECT
-            COUNT(*) as movies_with_embeddings,
-            (SELECT COUNT(*) FROM rag_movies) as total_movies,
-            ROUND(
-                (COUNT(*)::float / NULLIF((SELECT COUNT(*) FROM rag_movies), 0) * 100)::numeric,
-                1
-            ) as embedding_coverage_percent
-        FROM rag_movies
-        WHERE plot_embedding IS NOT NULL
+    Get comprehensive database and vector statistics (cached in Redis for 1 hour).
+    Aggregates are precomputed in the rag_detailed_stats materialized view, so a cache
+    miss is a single round trip; storage and index sizes are read live from the catalog.
+    Expired stats are served stale while one caller refreshes them.
     """
-    vectors = execute_query(vector_sql)
-    if vectors:
-        stats['vector_db'] = dict(vectors[0])
+    from services.redis_cache import cached_compute
 
-    # Review embeddings
-    review_vectors_sql = """
-        SELECT
-            COUNT(*) as reviews_with_embeddings,
-            (SELECT COUNT(*) FROM rag_reviews) as total_reviews,
-            ROUND(
-                (COUNT(*)::float / NULLIF((SELECT COUNT(*) FROM rag_reviews), 0) * 100)::numeric,
-                1
-            ) as embedding_coverage_percent
-        FROM rag_reviews
-        WHERE review_embedding IS NOT NULL
-    """
-    review_vectors = execute_query(review_vectors_sql)
-    if review_vectors:
-        stats['review_vector_db'] = dict(review_vectors[0])
-
-    # Embedding dimension info
-    embedding_dim_sql = """
+    return cached_compute("stats:detailed", _compute_detailed_statistics, ttl=3600)
+
+
+def _compute_detailed_statistics() -> Dict[str, Any]:
+    """Build the detailed statistics payload (uncached)."""
+    from services.redis_cache import get_redis_stats
+
+    sql = """
         SELECT
-            vector_dims(plot_embedding) as embedding_dimensions
-        FROM rag_movies
-        WHERE plot_embedding IS NOT NULL
-        LIMIT 1
+            s.movies,
+            s.reviews,
+            s.vector_db,
+            s.review_vector_db,
+            s.embedding_dimensions,
+            s.genre_distribution,
+            s.decade_distribution,
+            s.rating_distribution,
+            s.top_directors,
+            s.runtime_distribution,
+            s.refreshed_at,
+            jsonb_build_object(
+                'movies_table_size', pg_size_pretty(pg_total_relation_size('rag_movies')),
+                'reviews_table_size', pg_size_pretty(pg_total_relation_size('rag_reviews')),
+                'total_size', pg_size_pretty(
+                    pg_total_relation_size('rag_movies') + pg_total_relation_size('rag_reviews')
+                )
+            ) as storage,
+            COALESCE((
+                SELECT jsonb_agg(jsonb_build_object('indexname', i.indexname, 'size', i.size) ORDER BY i.bytes DESC)
+                FROM (
+                    SELECT
+                        indexname,
+                        pg_size_pretty(pg_relation_size(format('%I.%I', schemaname, indexname)::regclass)) as size,
+                        pg_relation_size(format('%I.%I', schemaname, indexname)::regclass) as bytes
+                    FROM pg_indexes
+                    WHERE tablename IN ('rag_movies', 'rag_reviews')
+                ) i
+            ), '[]'::jsonb) as indexes
+        FROM rag_detailed_stats s
     """
-    embedding_dim = execute_query(embedding_dim_sql)
-    if embedding_dim and embedding_dim[0]['embedding_dimensions']:
+    results = execute_query(sql)
+    if not results:
+        return {}
+
+    row = dict(results[0])
+    stats = {
+        'movies': row['movies'],
+        'reviews': row['reviews'],
+        'vector_db': row['vector_db'],
+        'review_vector_db': row['review_vector_db'],
+    }
+
+    if row['embedding_dimensions']:
         stats['vector_config'] = {
-            'embedding_dimensions': embedding_dim[0]['embedding_dimensions'],
+            'embedding_dimensions': row['embedding_dimensions'],
             'embedding_model': 'text-embedding-3-small',
             'distance_metric': 'cosine_similarity',
             'index_type': 'ivfflat'
         }
 
-    # Genre distribution
-    genre_sql = """
-        SELECT genre, COUNT(*) as count
-        FROM rag_movies
-        GROUP BY genre
-        ORDER BY count DESC
-        LIMIT 15
-    """
-    genres = execute_query(genre_sql)
-    if genres:
-        stats['genre_distribution'] = [dict(g) for g in genres]
+    stats['genre_distribution'] = row['genre_distribution']
+    stats['decade_distribution'] = row['decade_distribution']
+    stats['rating_distribution'] = row['rating_distribution']
+    stats['top_directors'] = row['top_directors']
+    stats['runtime_distribution'] = row['runtime_distribution']
+    stats['storage'] = row['storage']
+    stats['indexes'] = row['indexes']
+    stats['refreshed_at'] = row['refreshed_at'].isoformat()
 
-    # Decade distribution
-    decade_sql = """
-        SELECT
-            (year / 10) * 10 as decade,
-            COUNT(*) as count,
-            ROUND(AVG(rating)::numeric, 2) as avg_rating
-        FROM rag_movies
-        GROUP BY (year / 10) * 10
-        ORDER BY decade
-    """
-    decades = execute_query(decade_sql)
-    if decades:
-        stats['decade_distribution'] = [dict(d) for d in decades]
+    # Add Redis cache statistics
+    stats['redis_cache'] = get_redis_stats()
 
-    # Rating distribution (buckets)
-    rating_dist_sql = """
-        SELECT
-            CASE
-                WHEN rating >= 9 THEN '9-10 (Excellent)'
-                WHEN rating >= 8 THEN '8-9 (Great)'
-                WHEN rating >= 7 THEN '7-8 (Good)'
-                WHEN rating >= 6 THEN '6-7 (Above Average)'
-                WHEN rating >= 5 THEN '5-6 (Average)'
-                ELSE 'Below 5 (Poor)'
-            END as rating_bucket,
-            COUNT(*) as count
-        FROM rag_movies
-        GROUP BY rating_bucket
-        ORDER BY MIN(rating) DESC
-    """
-    rating_dist = execute_query(rating_dist_sql)
-    if rating_dist:
-        stats['rating_distribution'] = [dict(r) for r in rating_dist]
+    return stats
 
-    # Top directors by movie count
-    directors_sql = """
-        SELECT
-            director,
-            COUNT(*) as movie_count,
-            ROUND(AVG(rating)::numeric, 2) as avg_rating
-        FROM rag_movies
-        GROUP BY director
-        ORDER BY movie_count DESC
-        LIMIT 10
-    """
-    directors = execute_query(directors_sql)
-    if directors:
-        stats['top_directors'] = [dict(d) for d in directors]
 
-    # Runtime distribution
-    runtime_sql = """
-        SELECT
-            CASE
-                WHEN runtime_minutes < 90 THEN 'Short (<90 min)'
-                WHEN runtime_minutes < 120 THEN 'Standard (90-120 min)'
-                WHEN runtime_minutes < 150 THEN 'Long (120-150 min)'
-                ELSE 'Epic (150+ min)'
-            END as runtime_category,
-            COUNT(*) as count
-        FROM rag_movies
-        GROUP BY runtime_category
-        ORDER BY MIN(runtime_minutes)
+def refresh_statistics(concurrently: bool = True) -> None:
     """
-    runtime = execute_query(runtime_sql)
-    if runtime:
-        stats['runtime_distribution'] = [dict(r) for r in runtime]
+    Recompute the rag_detailed_stats materialized view (call after ingestion).
+    CONCURRENTLY keeps the old row readable while the new one is built.
+    """
+    from services.redis_cache import invalidate_stats, bump_data_version
 
-    # Database storage info
-    storage_sql = """
-        SELECT
-            pg_size_pretty(pg_total_relation_size('rag_movies')) as movies_table_size,
-            pg_size_pretty(pg_total_relation_size('rag_reviews')) as reviews_table_size,
-            pg_size_pretty(
-                pg_total_relation_size('rag_movies') + pg_total_relation_size('rag_reviews')
-            ) as total_size
-    """
-    storage = execute_query(storage_sql)
-    if storage:
-        stats['storage'] = dict(storage[0])
-
-    # Index information
-    index_sql = """
-        SELECT
-            indexname,
-            pg_size_pretty(pg_relation_size(indexname::regclass)) as size
-        FROM pg_indexes
-        WHERE tablename IN ('rag_movies', 'rag_reviews')
-        ORDER BY pg_relation_size(indexname::regclass) DESC
-    """
-    try:
-        indexes = execute_query(index_sql)
-        if indexes:
-            stats['indexes'] = [dict(i) for i in indexes]
-    except:
-        stats['indexes'] = []
+    mode = "CONCURRENTLY " if concurrently else ""
+    with get_cursor(dict_cursor=False) as cursor:
+        cursor.execute(f"REFRESH MATERIALIZED VIEW {mode}rag_detailed_stats")
 
-    # Add Redis cache statistics
-    from services.redis_cache import get_redis_stats
-    stats['redis_cache'] = get_redis_stats()
+    invalidate_stats()
+    # Stats read before the refresh may be cached under the current ETag; move it on
+    bump_data_version()
 
-    # Cache the stats for 1 hour
-    cache_stats(stats, ttl=3600)
 
-    return stats
+def publish_data_change():
+    """
+    Make a bulk data change visible: rebuild the precomputed stats, drop cached
+    searches, movie details and stats, and bump the data version (ETags).
+    """
+    from services.redis_cache import invalidate_cache
 
+    refresh_statistics()
+    invalidate_cache()
 
-def get_reviews_for_movie(movie_id: int) -> List[Dict[str, Any]]:
-    """Get all reviews for a specific movie."""
-    sql = """
+
+def get_similar_movies(movie_id: int, limit: int = 10, fields: str = 'card') -> Optional[List[Dict[str, Any]]]:
+    """
+    Get the precomputed most similar movies (best first, with similarity).
+    One range scan of the rag_movie_neighbors (movie_id, rank) key; see neighbor_service.
+    Returns None if the movie does not exist (checked only when it has no neighbors).
+    """
+    sql = f"""
+        SELECT {_columns(fields, 'm')}, n.similarity
+        FROM rag_movie_neighbors n
+        JOIN rag_movies m ON m.id = n.neighbor_id
+        WHERE n.movie_id = %s
+        ORDER BY n.rank
+        LIMIT %s
+    """
+    movies = _rows(sql, (movie_id, limit))
+    if not movies and not execute_query("SELECT 1 FROM rag_movies WHERE id = %s", (movie_id,)):
+        return None
+    return movies
+
+
+def get_reviews_for_movie(movie_id: int, limit: Optional[int] = None,
+                          after: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Get reviews for a specific movie (keyset-paginated by review_date, id)."""
+    keyset, keyset_params = keyset_clause(after, ('r.review_date', 'r.id'))
+    sql = f"""
         SELECT r.id, r.reviewer_name, r.review_text, r.rating, r.review_date,
                m.title as movie_title
         FROM rag_reviews r
         JOIN rag_movies m ON m.id = r.movie_id
-        WHERE r.movie_id = %s
-        ORDER BY r.review_date DESC
+        WHERE r.movie_id = %s AND {keyset}
+        ORDER BY r.review_date DESC, r.id DESC
+        LIMIT %s
     """
-    results = execute_query(sql, (movie_id,))
-    return [dict(row) for row in results] if results else []
+    return _rows(sql, (movie_id, *keyset_params, limit))
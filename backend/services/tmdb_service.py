@@ -0,0 +1,211 @@
+"""
+TMDB client for catalog ingestion.
+One pooled HTTP session, bounded-concurrency fetches under a shared rate limiter,
+and an on-disk cache of raw JSON responses, so re-runs and re-parses are free.
+
+The cache is content-addressed: response bodies live under objects/<sha256>.json
+and each request (path + params, without the API key) maps to the body it returned.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import sys
+sys.path.append('..')
+from config import config
+from utils.rate_limit import TokenBucket
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.tmdb_cache')
+
+
+class ResponseCache:
+    """
+    Raw JSON responses on disk, addressed by the SHA-256 of their content.
+
+    Args:
+        root: Cache directory (created on first write)
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def request_key(path: str, params: Dict[str, Any]) -> str:
+        canonical = json.dumps([path, {k: v for k, v in params.items() if k != 'api_key'}],
+                               sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.root, kind, key[:2], key)
+
+    def get(self, path: str, params: Dict[str, Any]) -> Optional[bytes]:
+        """Cached body for a request, if any."""
+        try:
+            with open(self._path('requests', self.request_key(path, params))) as f:
+                digest = f.read().strip()
+            with open(self._path('objects', digest) + '.json', 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, path: str, params: Dict[str, Any], body: bytes):
+        """Store a body (once per distinct content) and point the request at it."""
+        digest = hashlib.sha256(body).hexdigest()
+        object_path = self._path('objects', digest) + '.json'
+        if not os.path.exists(object_path):
+            self._write(object_path, body)
+        self._write(self._path('requests', self.request_key(path, params)), digest.encode())
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class TMDBClient:
+    """
+    Rate-limited, cached TMDB API client (safe to share between threads).
+
+    Args:
+        api_key: TMDB API key (default: config.TMDB_API_KEY)
+        base_url: API root (default: config.TMDB_BASE_URL; point it at a fixture server in tests)
+        requests_per_second: Shared request rate across all threads
+        concurrency: Parallel requests in fetch_movies (and HTTP connections kept open)
+        cache_dir: Response cache directory (None disables caching)
+        refresh: Ignore cached responses (they are still rewritten)
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 requests_per_second: Optional[float] = None, concurrency: Optional[int] = None,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR, refresh: bool = False):
+        self.api_key = api_key or config.TMDB_API_KEY
+        self.base_url = (base_url or config.TMDB_BASE_URL).rstrip('/')
+        self.concurrency = concurrency or config.TMDB_CONCURRENCY
+        rate = requests_per_second or config.TMDB_REQUESTS_PER_SECOND
+        self.limiter = TokenBucket(rate * 60, capacity=max(1.0, rate))
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.refresh = refresh
+
+        # Retries back off on 429/5xx and honour Retry-After
+        retry = Retry(total=4, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency,
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.errors = 0
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """GET an API path (from the cache when possible); None on errors."""
+        params = dict(params or {})
+        if self.cache and not self.refresh:
+            body = self.cache.get(path, params)
+            if body is not None:
+                with self._lock:
+                    self.cache_hits += 1
+                return json.loads(body)
+
+        self.limiter.acquire()
+        with self._lock:
+            self.requests += 1
+        try:
+            response = self.session.get(f"{self.base_url}{path}", params={**params, 'api_key': self.api_key},
+                                        timeout=10)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            with self._lock:
+                self.errors += 1
+            print(f"  ✗ Error fetching {path}: {e}", file=sys.stderr)
+            return None
+
+        if self.cache:
+            self.cache.put(path, params, response.content)
+        return data
+
+    def movie(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        """Raw movie details including credits."""
+        return self.get_json(f"/movie/{movie_id}", {'append_to_response': 'credits'})
+
+    def discover(self, page: int = 1, min_votes: int = 1000) -> List[int]:
+        """Movie ids from one page of the most-voted discover listing."""
+        data = self.get_json("/discover/movie", {
+            'sort_by': 'vote_count.desc',  # Most voted movies (quality indicator)
+            'vote_count.gte': min_votes,
+            'page': page
+        })
+        return [movie['id'] for movie in (data or {}).get('results', [])]
+
+    def discover_pages(self, pages: Iterable[int], min_votes: int = 1000) -> List[int]:
+        """Movie ids from several discover pages (fetched concurrently), de-duplicated in page order."""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="tmdb") as pool:
+            ids = [movie_id for page_ids in pool.map(lambda page: self.discover(page, min_votes), pages)
+                   for movie_id in page_ids]
+        return list(dict.fromkeys(ids))
+
+    def fetch_movies(self, movie_ids: Iterable[int]) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """Fetch movie details concurrently; yields (id, raw data or None) as they complete."""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="tmdb") as pool:
+            futures = {pool.submit(self.movie, movie_id): movie_id for movie_id in movie_ids}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def stats(self) -> Dict[str, int]:
+        return {'requests': self.requests, 'cache_hits': self.cache_hits, 'errors': self.errors}
+
+    def close(self):
+        self.session.close()
+
+
+def page_range(spec: str) -> List[int]:
+    """Pages from a range like '1-25' or a single page like '7'."""
+    first, _, last = spec.partition('-')
+    return list(range(int(first), int(last or first) + 1))
+
+
+def parse_movie(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map a TMDB movie (with credits) to a rag_movies row keyed by external_id."""
+    try:
+        # Extract cast (limit to top 6 actors)
+        cast = data.get('credits', {}).get('cast', [])
+        actors = [actor['name'] for actor in cast[:6]]
+
+        # Extract genres
+        genres = [g['name'] for g in data.get('genres', [])]
+        genre = genres[0] if genres else 'Drama'
+
+        # Extract director
+        crew = data.get('credits', {}).get('crew', [])
+        directors = [person['name'] for person in crew if person['job'] == 'Director']
+        director = directors[0] if directors else 'Unknown'
+
+        return {
+            'external_id': f"tmdb:{data['id']}",
+            'title': data.get('title') or 'Unknown',
+            'year': int(data['release_date'][:4]) if data.get('release_date') else 2000,
+            'director': director,
+            'genre': genre,
+            'plot': data.get('overview') or 'No plot available.',
+            'rating': round(data.get('vote_average') or 7.0, 1),
+            'runtime_minutes': data.get('runtime') or 120,
+            'actors': actors
+        }
+    except (KeyError, ValueError, IndexError, TypeError) as e:
+        print(f"  ✗ Error parsing movie {data.get('id')}: {e}", file=sys.stderr)
+        return None
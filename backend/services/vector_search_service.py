@@ -3,78 +3,126 @@ Vector search service for semantic similarity queries.
 Uses pgvector for efficient vector similarity search with Redis caching.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 import sys
 sys.path.append('..')
 from config import config
 from utils.database import execute_query
-from services.embedding_service import create_search_embedding
-from services.redis_cache import get_cached_search, cache_search_results
+from services.embedding_service import create_search_embedding, create_search_embeddings
+from services.redis_cache import cached_compute, get_query_hash, get_search_version
 
 
-def search_movies_by_similarity(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+def search_movies_by_similarity(query: str, limit: int = 5,
+                                query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
     """
     Search movies using vector similarity on plot embeddings.
-    Results are cached in Redis for 5 minutes.
+    Results are cached in Redis for 5 minutes (served stale while refreshing).
 
     Args:
         query: Natural language search query
         limit: Maximum number of results
+        query_embedding: Embedding of query, if the caller already has it
 
     Returns:
         List of movies with similarity scores
     """
-    # Check cache first
-    cache_key = f"{query}:{limit}"
-    cached = get_cached_search(cache_key)
-    if cached is not None:
-        return cached
-
-    # Generate embedding for the query
-    query_embedding = create_search_embedding(query)
+    def compute() -> List[Dict[str, Any]]:
+        # Generate embedding for the query
+        embedding = query_embedding or create_search_embedding(query)
+
+        # Convert to pgvector format
+        embedding_str = '[' + ','.join(map(str, embedding)) + ']'
+
+        sql = """
+            SELECT
+                m.id,
+                m.title,
+                m.year,
+                m.director,
+                m.genre,
+                m.plot,
+                m.rating,
+                m.runtime_minutes,
+                m.actors,
+                1 - (m.plot_embedding <=> %s::vector) as similarity
+            FROM rag_movies m
+            WHERE m.plot_embedding IS NOT NULL
+            ORDER BY m.plot_embedding <=> %s::vector
+            LIMIT %s
+        """
+
+        results = execute_query(sql, (embedding_str, embedding_str, limit))
+        return [dict(row) for row in results] if results else []
+
+    # Versioned so ingestion can retire every cached search without scanning for keys
+    cache_key = f"search:{get_search_version()}:{get_query_hash(f'{query}:{limit}')}"
+    return cached_compute(cache_key, compute, ttl=300)
+
+
+def search_movies_by_similarity_batch(queries: List[str], limit: int = 5) -> List[List[Dict[str, Any]]]:
+    """
+    Run several movie similarity searches at once.
+    All query embeddings come from one provider call (cache misses only), and every
+    ANN lookup runs in a single round trip via a LATERAL join over the query vectors.
 
-    # Convert to pgvector format
-    embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
+    Args:
+        queries: Natural language search queries
+        limit: Maximum number of results per query
 
-    sql = """
-        SELECT
-            m.id,
-            m.title,
-            m.year,
-            m.director,
-            m.genre,
-            m.plot,
-            m.rating,
-            m.runtime_minutes,
-            m.actors,
-            1 - (m.plot_embedding <=> %s::vector) as similarity
-        FROM rag_movies m
-        WHERE m.plot_embedding IS NOT NULL
-        ORDER BY m.plot_embedding <=> %s::vector
-        LIMIT %s
+    Returns:
+        One list of movies with similarity scores per query, in the order of queries
     """
+    if not queries:
+        return []
 
-    results = execute_query(sql, (embedding_str, embedding_str, limit))
-    result_list = [dict(row) for row in results] if results else []
+    embeddings = create_search_embeddings(queries)
+    embedding_strs = ['[' + ','.join(map(str, e)) + ']' for e in embeddings]
 
-    # Cache the results
-    cache_search_results(cache_key, result_list, ttl=300)  # 5 minutes
+    sql = """
+        SELECT q.ord, m.*
+        FROM unnest(%s::vector[]) WITH ORDINALITY AS q(embedding, ord)
+        CROSS JOIN LATERAL (
+            SELECT
+                id,
+                title,
+                year,
+                director,
+                genre,
+                plot,
+                rating,
+                runtime_minutes,
+                actors,
+                1 - (plot_embedding <=> q.embedding) as similarity
+            FROM rag_movies
+            WHERE plot_embedding IS NOT NULL
+            ORDER BY plot_embedding <=> q.embedding
+            LIMIT %s
+        ) m
+        ORDER BY q.ord, m.similarity DESC
+    """
 
-    return result_list
+    results = execute_query(sql, (embedding_strs, limit)) or []
+    grouped: List[List[Dict[str, Any]]] = [[] for _ in queries]
+    for row in results:
+        movie = dict(row)
+        grouped[movie.pop('ord') - 1].append(movie)
+    return grouped
 
 
-def search_reviews_by_similarity(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+def search_reviews_by_similarity(query: str, limit: int = 5,
+                                 query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
     """
-    Search movie reviews using vector similarity.
+    Search movie reviews using vector similarity (ANN over every review).
 
     Args:
         query: Natural language search query
         limit: Maximum number of results
+        query_embedding: Embedding of query, if the caller already has it
 
     Returns:
         List of reviews with similarity scores
     """
-    query_embedding = create_search_embedding(query)
+    query_embedding = query_embedding or create_search_embedding(query)
     embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
 
     sql = """
@@ -98,18 +146,84 @@ def search_reviews_by_similarity(query: str, limit: int = 5) -> List[Dict[str, A
     return [dict(row) for row in results] if results else []
 
 
-def hybrid_search(query: str, vector_limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+def search_reviews_for_movies(query: str, movie_ids: Iterable[int], limit: int = 5,
+                              query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+    """
+    Search the reviews of the given movies only.
+    Candidates come from the movie_id index and are ranked by exact distance, which
+    for the handful of movies a chat retrieves is cheaper than an ANN over every
+    review and keeps the reviews about the movies in the context.
+
+    Args:
+        query: Natural language search query
+        movie_ids: Movies whose reviews are searched
+        limit: Maximum number of results
+        query_embedding: Embedding of query, if the caller already has it
+
+    Returns:
+        List of reviews with similarity scores
+    """
+    movie_ids = list(dict.fromkeys(movie_ids))
+    if not movie_ids:
+        return []
+    query_embedding = query_embedding or create_search_embedding(query)
+    embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
+
+    # MATERIALIZED keeps the planner from swapping the movie_id lookup for the ANN index
+    sql = """
+        WITH candidates AS MATERIALIZED (
+            SELECT
+                id,
+                movie_id,
+                reviewer_name,
+                review_text,
+                rating,
+                review_date,
+                review_embedding <=> %s::vector as distance
+            FROM rag_reviews
+            WHERE movie_id = ANY(%s) AND review_embedding IS NOT NULL
+        )
+        SELECT
+            c.id,
+            c.movie_id,
+            m.title as movie_title,
+            c.reviewer_name,
+            c.review_text,
+            c.rating,
+            c.review_date,
+            1 - c.distance as similarity
+        FROM candidates c
+        JOIN rag_movies m ON m.id = c.movie_id
+        ORDER BY c.distance
+        LIMIT %s
+    """
+
+    results = execute_query(sql, (embedding_str, movie_ids, limit))
+    return [dict(row) for row in results] if results else []
+
+
+def hybrid_search(query: str, vector_limit: int = 5,
+                  movie_ids: Optional[Iterable[int]] = None) -> Dict[str, List[Dict[str, Any]]]:
     """
     Perform hybrid search combining vector and keyword results.
 
+    In 'scoped' review retrieval mode (config.REVIEW_RETRIEVAL_MODE) reviews are
+    searched only among the movies found here plus movie_ids; in 'global' mode
+    they come from an ANN search over all reviews. The query is embedded once.
+
     Args:
         query: Search query
         vector_limit: Max results per vector search
+        movie_ids: Movies found by other retrievers (e.g. SQL filters)
 
     Returns:
         Dictionary with 'movies' and 'reviews' results
     """
-    return {
-        'movies': search_movies_by_similarity(query, vector_limit),
-        'reviews': search_reviews_by_similarity(query, vector_limit)
-    }
+    query_embedding = create_search_embedding(query)
+    movies = search_movies_by_similarity(query, vector_limit, query_embedding)
+    if config.REVIEW_RETRIEVAL_MODE == 'global':
+        reviews = search_reviews_by_similarity(query, vector_limit, query_embedding)
+    else:
+        scope = [movie['id'] for movie in movies] + list(movie_ids or [])
+        reviews = search_reviews_for_movies(query, scope, vector_limit, query_embedding)
+    return {'movies': movies, 'reviews': reviews}
@@ -0,0 +1,145 @@
+"""
+Streaming bulk loads with COPY.
+Generator shards run in a process pool and render their rows to COPY text; the
+parent streams each chunk into the table and commits it, keeping at most a few
+chunks in memory. Secondary indexes and user triggers can be set aside for the
+load and restored afterwards.
+"""
+
+import io
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from psycopg2 import sql
+
+import sys
+sys.path.append('..')
+from utils.database import get_connection, get_cursor
+
+# make_chunk(count, seed) -> COPY text for `count` rows (must be a module-level function)
+ChunkFactory = Callable[[int, int], str]
+
+
+def secondary_indexes(table: str) -> List[Tuple[str, str]]:
+    """(name, definition) of the table's indexes that do not back a constraint."""
+    with get_cursor() as cursor:
+        cursor.execute("""
+            SELECT i.relname as name, pg_get_indexdef(x.indexrelid) as definition
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = %s::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+            ORDER BY i.relname
+        """, (table,))
+        return [(row['name'], row['definition']) for row in cursor.fetchall()]
+
+
+def drop_indexes(table: str) -> List[Tuple[str, str]]:
+    """Drop the table's secondary indexes; returns their definitions for rebuild_indexes."""
+    indexes = secondary_indexes(table)
+    with get_cursor() as cursor:
+        for name, _ in indexes:
+            cursor.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(name)))
+    return indexes
+
+
+def rebuild_indexes(indexes: Sequence[Tuple[str, str]], maintenance_work_mem: str = '1GB'):
+    """Recreate dropped indexes, one transaction each, with a larger sort/build budget."""
+    for name, definition in indexes:
+        start = time.time()
+        with get_cursor() as cursor:
+            cursor.execute("SELECT set_config('maintenance_work_mem', %s, true)", (maintenance_work_mem,))
+            cursor.execute(definition)
+        print(f"  ✓ Rebuilt {name} ({time.time() - start:.1f}s)")
+
+
+def set_user_triggers(table: str, enabled: bool):
+    """Enable or disable every user-defined trigger on the table."""
+    action = "ENABLE" if enabled else "DISABLE"
+    with get_cursor() as cursor:
+        cursor.execute(sql.SQL("ALTER TABLE {} {} TRIGGER USER").format(sql.Identifier(table), sql.SQL(action)))
+
+
+def _run_chunk(make_chunk: ChunkFactory, count: int, seed: int) -> str:
+    # Forked workers inherit the parent's RNG state; seed each chunk independently
+    random.seed(seed)
+    return make_chunk(count, seed)
+
+
+def parallel_copy(table: str, columns: Sequence[str], make_chunk: ChunkFactory, total: int,
+                  chunk_size: int = 10000, workers: Optional[int] = None,
+                  drop_secondary_indexes: bool = False, disable_triggers: bool = False,
+                  maintenance_work_mem: str = '1GB', seed: Optional[int] = None) -> int:
+    """
+    Generate `total` rows in a process pool and COPY them into `table`, one commit per chunk.
+
+    Args:
+        table: Target table
+        columns: Columns in the order make_chunk writes them
+        make_chunk: Renders `count` rows as COPY text (module-level so it can be pickled)
+        total: Rows to load
+        chunk_size: Rows per chunk (and per COPY/commit)
+        workers: Generator processes (default: CPU count)
+        drop_secondary_indexes: Drop non-constraint indexes before loading and rebuild them after
+        disable_triggers: Disable user triggers during the load (callers must rebuild
+            anything the triggers maintain)
+        maintenance_work_mem: Memory budget for index rebuilds
+        seed: Base random seed (default: random)
+
+    Returns:
+        Number of rows loaded
+    """
+    workers = workers or os.cpu_count() or 1
+    base_seed = seed if seed is not None else random.randrange(2 ** 31)
+    counts = [min(chunk_size, total - start) for start in range(0, total, chunk_size)]
+    copy_sql = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table), sql.SQL(', ').join(sql.Identifier(c) for c in columns)
+    )
+
+    indexes = drop_indexes(table) if drop_secondary_indexes else []
+    if indexes:
+        print(f"  Dropped {len(indexes)} indexes on {table} for the load")
+    if disable_triggers:
+        set_user_triggers(table, False)
+
+    loaded = 0
+    start = time.time()
+    conn = get_connection()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool, conn.cursor() as cursor:
+            statement = copy_sql.as_string(cursor)
+            in_flight: deque = deque()
+            chunks = iter(enumerate(counts))
+
+            def submit_next():
+                for index, count in chunks:
+                    in_flight.append((count, pool.submit(_run_chunk, make_chunk, count, base_seed + index)))
+                    return
+
+            # Keep a couple of chunks per worker queued; memory stays bounded by them
+            for _ in range(workers * 2):
+                submit_next()
+            while in_flight:
+                count, future = in_flight.popleft()
+                data = future.result()
+                submit_next()
+                cursor.copy_expert(statement, io.StringIO(data))
+                conn.commit()
+                loaded += count
+                elapsed = time.time() - start
+                print(f"  Loaded {loaded:,}/{total:,} rows ({loaded / elapsed:,.0f}/sec)")
+    finally:
+        conn.close()
+        if disable_triggers:
+            set_user_triggers(table, True)
+        if indexes:
+            print(f"  Rebuilding {len(indexes)} indexes...")
+            rebuild_indexes(indexes, maintenance_work_mem)
+
+    with get_cursor() as cursor:
+        cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table)))
+    return loaded
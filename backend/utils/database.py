@@ -3,10 +3,12 @@ Database connection utilities.
 Provides connection pooling and query execution helpers.
 """
 
+import io
 import psycopg2
+from psycopg2 import sql
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
-from typing import Generator, Any, List, Dict, Optional
+from typing import Generator, Any, Iterable, List, Dict, Optional, Sequence
 
 import sys
 sys.path.append('..')
@@ -77,3 +79,74 @@ def execute_many(query: str, params_list: List[tuple]) -> None:
     """
     with get_cursor() as cursor:
         cursor.executemany(query, params_list)
+
+
+def _copy_value(value: Any) -> str:
+    """Format a value for COPY text format (float lists become pgvector literals)."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, tuple)):
+        value = '[' + ','.join(map(str, value)) + ']'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def text_array(values: Iterable[str]) -> str:
+    """Literal for a TEXT[] value (pass it where a list would become a vector)."""
+    items = ('"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values)
+    return '{' + ','.join(items) + '}'
+
+
+def copy_row(values: Sequence[Any]) -> str:
+    """Format one row as a line of COPY text format."""
+    return '\t'.join(_copy_value(v) for v in values) + '\n'
+
+
+def bulk_update(table: str, key_column: str, columns: Sequence[str],
+                rows: Iterable[Sequence[Any]], cursor=None) -> int:
+    """
+    Update many rows with one COPY and one set-based UPDATE.
+
+    Rows are streamed into a temporary table shaped like the target columns, then
+    applied with UPDATE ... FROM. Float lists are written as pgvector literals.
+
+    Args:
+        table: Target table
+        key_column: Column identifying the row (first value of each row)
+        columns: Columns to set (remaining values of each row, in order)
+        rows: (key, value, ...) tuples
+        cursor: Run inside this cursor's transaction (default: own connection and commit)
+
+    Returns:
+        Number of rows updated
+    """
+    if cursor is None:
+        with get_cursor(dict_cursor=False) as own_cursor:
+            return bulk_update(table, key_column, columns, rows, own_cursor)
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(copy_row(row))
+    if buffer.tell() == 0:
+        return 0
+    buffer.seek(0)
+
+    staging = sql.Identifier(f"_bulk_{table}")
+    target = sql.Identifier(table)
+    key = sql.Identifier(key_column)
+    cols = [sql.Identifier(c) for c in columns]
+
+    cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(staging))
+    cursor.execute(sql.SQL(
+        "CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {key}, {cols} FROM {target} WITH NO DATA"
+    ).format(staging=staging, key=key, cols=sql.SQL(', ').join(cols), target=target))
+    cursor.copy_expert(sql.SQL("COPY {} FROM STDIN").format(staging).as_string(cursor), buffer)
+    # Row estimates for the join plan (temp tables are never auto-analyzed)
+    cursor.execute(sql.SQL("ANALYZE {}").format(staging))
+    cursor.execute(sql.SQL("UPDATE {target} t SET {assignments} FROM {staging} s WHERE t.{key} = s.{key}").format(
+        target=target,
+        staging=staging,
+        key=key,
+        assignments=sql.SQL(', ').join(sql.SQL("{c} = s.{c}").format(c=c) for c in cols)
+    ))
+    return cursor.rowcount
@@ -0,0 +1,55 @@
+"""
+HTTP conditional GET support.
+Weak ETags are derived from the request URL and the catalog data-version token,
+so an unchanged resource can be answered with 304 before any query runs. They are
+weak because the compression middleware sends the same resource in several
+encodings, which a strong validator must not cover (RFC 9110).
+"""
+
+import hashlib
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+
+# Clients may cache but must revalidate with If-None-Match on every use
+CACHE_CONTROL = "no-cache"
+
+
+def compute_etag(request: Request, version: Optional[str]) -> Optional[str]:
+    """Weak ETag for this URL at the given data version (None if no version is tracked)."""
+    if version is None:
+        return None
+    resource = f"{request.url.path}?{request.url.query}:{version}"
+    return 'W/"' + hashlib.sha1(resource.encode()).hexdigest()[:24] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return any((tag[2:] if tag.startswith('W/') else tag) == opaque for tag in candidates)
+
+
+def conditional_response(request: Request, version: Optional[str], build: Callable[[], Response]) -> Response:
+    """
+    Answer with 304 Not Modified when the client's ETag is current,
+    otherwise build the response and tag it.
+
+    Args:
+        request: Incoming request (If-None-Match is read from it)
+        version: Current data-version token (None disables ETags)
+        build: Produces the full response; only called on a miss
+    """
+    etag = compute_etag(request, version)
+    if etag and etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+    response = build()
+    if etag and response.status_code == 200:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -0,0 +1,45 @@
+"""
+Request latency tracking.
+A fixed-size ring buffer of recent request durations, fed by an HTTP middleware,
+so background work can back off when live traffic slows down.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class LatencyTracker:
+    """
+    Recent request durations with windowed percentiles.
+
+    Args:
+        size: Requests remembered (oldest are dropped first)
+        window_seconds: Only requests finished this recently count towards percentiles
+    """
+
+    def __init__(self, size: int = 2048, window_seconds: float = 30.0):
+        self.window = window_seconds
+        self._samples: deque = deque(maxlen=size)  # (finished at, milliseconds)
+        self._lock = threading.Lock()
+
+    def record(self, duration_ms: float):
+        with self._lock:
+            self._samples.append((time.monotonic(), duration_ms))
+
+    def percentile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """Latency (ms) at quantile q (0-1) over the window; None with too few samples to judge."""
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            recent = sorted(ms for at, ms in self._samples if at >= cutoff)
+        if len(recent) < min_samples:
+            return None
+        return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+    def p99(self) -> Optional[float]:
+        return self.percentile(0.99)
+
+
+# Fed by the middleware in main.py
+request_latency = LatencyTracker()
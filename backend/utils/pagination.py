@@ -0,0 +1,75 @@
+"""
+Keyset pagination helpers.
+Encodes the sort-key values of the last row of a page into an opaque cursor.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Sort keys carried in list cursors; every movie list orders by a subset of these plus id
+MOVIE_CURSOR_KEYS = ('rating', 'year', 'id')
+REVIEW_CURSOR_KEYS = ('review_date', 'id')
+
+
+class LastPage(list):
+    """
+    Rows that cannot be continued by a cursor, e.g. similarity-ranked fuzzy matches:
+    their order is not a keyset, so next_cursor never offers a following page.
+    """
+
+
+def encode_cursor(row: Dict[str, Any], keys: Sequence[str]) -> str:
+    """Encode the sort-key values of a row into an opaque URL-safe cursor."""
+    # Decimal ratings and dates are sent as strings; Postgres coerces them back when compared
+    payload = json.dumps({k: row[k] for k in keys}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid pagination cursor")
+    return position
+
+
+def next_cursor(rows: List[Dict[str, Any]], limit: Optional[int], keys: Sequence[str]) -> Optional[str]:
+    """Return the cursor for the page after `rows`, or None if this was the last page."""
+    if not limit or len(rows) < limit or isinstance(rows, LastPage):
+        return None
+    return encode_cursor(rows[-1], keys)
+
+
+def keyset_clause(after: Optional[Dict[str, Any]], columns: Sequence[str]) -> tuple:
+    """
+    Build the WHERE fragment continuing a descending keyset after a cursor position.
+
+    Args:
+        after: Decoded cursor (None for the first page)
+        columns: Sort columns in ORDER BY order, optionally table-qualified (e.g. 'm.rating')
+
+    Returns:
+        Tuple of (SQL fragment, params)
+    """
+    if not after:
+        return "TRUE", ()
+    keys = [c.split('.')[-1] for c in columns]
+    if any(k not in after for k in keys):
+        raise ValueError("Pagination cursor does not match this listing")
+    placeholders = ', '.join(['%s'] * len(columns))
+    return f"({', '.join(columns)}) < ({placeholders})", tuple(after[k] for k in keys)
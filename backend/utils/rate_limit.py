@@ -0,0 +1,67 @@
+"""
+Thread-safe token-bucket rate limiting.
+Used to keep API clients under provider requests-per-minute and tokens-per-minute quotas.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+
+    Args:
+        rate_per_minute: Sustained rate (tokens per minute)
+        capacity: Burst size (default: one second's worth, at least 1)
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """Take `amount` tokens if available; otherwise return the seconds to wait (0 on success)."""
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1):
+        """Block until `amount` tokens have been taken."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits combined.
+
+    Args:
+        rpm: Requests per minute
+        tpm: Tokens per minute
+    """
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm, capacity=tpm / 6)  # Allow ~10s bursts of tokens
+
+    def acquire(self, tokens: int):
+        """Block until one request carrying `tokens` tokens may be sent."""
+        self.tokens.acquire(tokens)
+        self.requests.acquire(1)
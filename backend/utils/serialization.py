@@ -0,0 +1,47 @@
+"""
+Fast JSON serialization for API responses.
+Uses orjson when installed and falls back to the stdlib encoder otherwise.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    """Encode the non-JSON types psycopg2 returns (NUMERIC ratings, DATE review dates)."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to UTF-8 JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Returning an instance directly from a route skips FastAPI's response_model
+    validation and jsonable_encoder pass - use it for rows that come straight
+    from trusted SQL queries.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)